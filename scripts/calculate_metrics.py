@@ -5,7 +5,6 @@ import json
 import csv
 import sys
 import time
-import random
 import subprocess
 from pathlib import Path
 from typing import Dict
@@ -16,6 +15,9 @@ import skvideo.io
 from skvideo.measure import psnr, ssim
 
 PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.core.compare import ComparisonRenderer
 
 def log(message: str):
     print(f"[{time.strftime('%H:%M:%S')}] {message}")
@@ -101,75 +103,20 @@ def save_metrics(metrics: Dict, output_dir: Path):
         writer.writerow(metrics)
     log(f"Saved CSV to {csv_path}")
 
-def create_side_by_side(ref_path: str, interp_path: str, output_path: str) -> bool:
-    """Create side-by-side comparison video."""
-    log("Creating side-by-side comparison")
-
-    cmd = [
-        "ffmpeg", "-y",
-        "-i", ref_path,
-        "-i", interp_path,
-        "-filter_complex",
-        "[0:v][1:v]hstack=inputs=2[v];" +
-        "[v]drawtext=text='Original 60fps':x=10:y=10:fontsize=48:fontcolor=white:box=1:boxcolor=black@0.5," +
-        "drawtext=text='RIFE Interpolated':x=w/2+10:y=10:fontsize=48:fontcolor=white:box=1:boxcolor=black@0.5[vout]",
-        "-map", "[vout]",
-        "-c:v", "libx264",
-        "-preset", "medium",
-        "-crf", "23",
-        "-t", "10",
-        output_path
-    ]
+def create_comparisons(ref_path: str, interp_path: str, output_dir: Path) -> bool:
+    """Create side-by-side, blind test, difference and slow-motion videos from one decode."""
+    log("Creating comparison videos")
 
     try:
-        subprocess.run(cmd, check=True, capture_output=True)
-        log(f"Created {output_path}")
-        return True
-    except subprocess.CalledProcessError as e:
-        log(f"Error: {e.stderr.decode()}")
+        stats = ComparisonRenderer().render(ref_path, interp_path, str(output_dir))
+    except RuntimeError as e:
+        log(f"Error: {e}")
         return False
 
-def create_blind_test(ref_path: str, interp_path: str, output_path: str, answer_path: str) -> bool:
-    """Create A/B blind test video."""
-    log("Creating A/B blind test")
-
-    # Randomly decide order
-    is_original_first = random.choice([True, False])
-    first_label = "A"
-    second_label = "B"
-    first_video = ref_path if is_original_first else interp_path
-    second_video = interp_path if is_original_first else ref_path
-
-    # Save answer
-    with open(answer_path, "w") as f:
-        f.write(f"Clip A: {'Original 60fps' if is_original_first else 'RIFE Interpolated'}\n")
-        f.write(f"Clip B: {'RIFE Interpolated' if is_original_first else 'Original 60fps'}\n")
-        f.write(f"\nGuess which clip is the AI-interpolated one!\n")
-
-    # Concatenate videos with labels
-    cmd = [
-        "ffmpeg", "-y",
-        "-i", first_video,
-        "-i", second_video,
-        "-filter_complex",
-        f"[0:v]drawtext=text='Clip {first_label}':x=10:y=10:fontsize=72:fontcolor=yellow:box=1:boxcolor=black@0.5[v0];" +
-        f"[1:v]drawtext=text='Clip {second_label}':x=10:y=10:fontsize=72:fontcolor=yellow:box=1:boxcolor=black@0.5[v1];" +
-        "[v0][v1]concat=n=2:v=1:a=0[vout]",
-        "-map", "[vout]",
-        "-c:v", "libx264",
-        "-preset", "medium",
-        "-crf", "23",
-        output_path
-    ]
-
-    try:
-        subprocess.run(cmd, check=True, capture_output=True)
-        log(f"Created {output_path}")
-        log(f"Answer saved to {answer_path}")
-        return True
-    except subprocess.CalledProcessError as e:
-        log(f"Error: {e.stderr.decode()}")
-        return False
+    for path in stats["outputs"].values():
+        log(f"Created {path}")
+    log(f"Answer saved to {stats['answer']}")
+    return True
 
 def main():
     # Paths
@@ -178,7 +125,7 @@ def main():
     metrics_dir = PROJECT_ROOT / "results" / "metrics"
     metrics_dir.mkdir(parents=True, exist_ok=True)
 
-    ref_video = str(input_dir / "arc_clip_60fps.mp4")
+    ref_video = str(input_dir / "arc_clip_60fps.mkv")
     interp_video = str(output_dir / "arc_interpolated_60fps.mp4")
 
     log("="*60)
@@ -210,12 +157,7 @@ def main():
     save_metrics(metrics, metrics_dir)
 
     # Create comparison videos
-    comparison_path = str(output_dir / "comparison_sidebyside.mp4")
-    create_side_by_side(ref_video, interp_video, comparison_path)
-
-    blind_test_path = str(output_dir / "blind_test.mp4")
-    answer_path = str(output_dir / "blind_test_answer.txt")
-    create_blind_test(ref_video, interp_video, blind_test_path, answer_path)
+    create_comparisons(ref_video, interp_video, output_dir)
 
     log("="*60)
     log("Processing Complete!")
@@ -4,31 +4,36 @@ Comprehensive experiment runner for RIFE gameplay interpolation project.
 Handles the full pipeline from video preprocessing to metrics calculation.
 """
 
-import os
 import sys
 import json
 import csv
 import subprocess
 import time
-import random
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import cv2
 import numpy as np
-import torch
-import skvideo.io
-from skvideo.measure import psnr, ssim
 
 # Add project root to path
-PROJECT_ROOT = Path(__file__).parent.parent
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
+from src.core.compare import OUTPUTS, ComparisonRenderer
+from src.core.pipeline import Pipeline, Step
+
 class ExperimentRunner:
-    def __init__(self, source_video: str, clip_duration: int = 10, scale: float = 0.5):
+    # Intermediate artifacts (ground truth, RIFE input) are stored losslessly so
+    # nothing but the interpolation itself differs between the 30fps input and
+    # the 60fps reference. FFV1 is intra-only and encodes far faster than
+    # libx264 -preset slow; lossy encoding is kept for the final deliverables.
+    LOSSLESS_CODEC = ["-c:v", "ffv1", "-level", "3", "-g", "1"]
+
+    def __init__(self, source_video: str, clip_duration: int = 10, scale: float = 0.5, workers: int = 3):
         self.source_video = Path(source_video)
         self.clip_duration = clip_duration
         self.scale = scale
+        self.workers = workers
 
         # Setup paths
         self.data_dir = PROJECT_ROOT / "data"
@@ -43,21 +48,23 @@ class ExperimentRunner:
             d.mkdir(parents=True, exist_ok=True)
 
         # File paths
-        self.clip_60fps = self.input_dir / "arc_clip_60fps.mp4"
-        self.clip_30fps = self.input_dir / "arc_clip_30fps.mp4"
+        self.clip_60fps = self.input_dir / "arc_clip_60fps.mkv"
+        self.clip_30fps = self.input_dir / "arc_clip_30fps.mkv"
         self.interpolated_60fps = self.output_dir / "arc_interpolated_60fps.mp4"
-        self.comparison_side_by_side = self.output_dir / "comparison_sidebyside.mp4"
-        self.blind_test = self.output_dir / "blind_test.mp4"
+        self.metrics_json = self.metrics_dir / "arc_raiders_metrics.json"
+        self.metrics_csv = self.metrics_dir / "arc_raiders_metrics.csv"
+        # Step keys, output stamps and results of the last runs
+        self.manifest = self.results_dir / "experiment_cache.json"
 
     def log(self, message: str):
         """Print timestamped log message."""
         print(f"[{time.strftime('%H:%M:%S')}] {message}")
 
-    def run_command(self, cmd: List[str], description: str) -> bool:
+    def run_command(self, cmd: List[str], description: str, cwd: Optional[Path] = None) -> bool:
         """Run a shell command and return success status."""
         self.log(f"{description}...")
         try:
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+            result = subprocess.run(cmd, check=True, capture_output=True, text=True, cwd=cwd)
             return True
         except subprocess.CalledProcessError as e:
             self.log(f"Error: {e.stderr}")
@@ -67,17 +74,11 @@ class ExperimentRunner:
         """Extract 10-second clip from source video at 60fps."""
         self.log("Step 1: Extracting 10-second clip from source video")
 
-        if self.clip_60fps.exists():
-            self.log(f"Clip already exists at {self.clip_60fps}")
-            return True
-
         cmd = [
             "ffmpeg", "-y",
             "-i", str(self.source_video),
             "-t", str(self.clip_duration),
-            "-c:v", "libx264",
-            "-preset", "slow",
-            "-crf", "18",
+            *self.LOSSLESS_CODEC,
             "-an",  # No audio for simplicity
             str(self.clip_60fps)
         ]
@@ -88,35 +89,29 @@ class ExperimentRunner:
         """Downsample 60fps clip to 30fps by selecting every other frame."""
         self.log("Step 2: Downsampling to 30fps")
 
-        if self.clip_30fps.exists():
-            self.log(f"30fps clip already exists at {self.clip_30fps}")
-            return True
-
         # Read video and extract every other frame
         cap = cv2.VideoCapture(str(self.clip_60fps))
         if not cap.isOpened():
             self.log(f"Error: Could not open {self.clip_60fps}")
             return False
 
-        fps = int(cap.get(cv2.CAP_PROP_FPS))
+        fps = cap.get(cv2.CAP_PROP_FPS)
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
 
-        self.log(f"Source: {width}x{height} @ {fps}fps")
+        self.log(f"Source: {width}x{height} @ {fps:.2f}fps")
 
-        # Use ffmpeg to downsample
+        # Even frames of the lossless 60fps clip, copied bit-exactly
         cmd = [
             "ffmpeg", "-y",
             "-i", str(self.clip_60fps),
-            "-vf", "select='not(mod(n\\,2))',setpts=N/FRAME_RATE/TB",
-            "-r", "30",
-            "-c:v", "libx264",
-            "-preset", "slow",
-            "-crf", "18",
+            "-vf", f"select='not(mod(n\\,2))',setpts=N/({fps}/2)/TB",
+            "-r", f"{fps / 2}",
+            *self.LOSSLESS_CODEC,
             str(self.clip_30fps)
         ]
 
-        cap.release()
         return self.run_command(cmd, "Downsampling to 30fps")
 
     def interpolate_with_rife(self) -> Tuple[bool, Dict]:
@@ -136,9 +131,8 @@ class ExperimentRunner:
             "--fp16"
         ]
 
-        os.chdir(self.rife_dir)
-        success = self.run_command(cmd, "Running RIFE")
-        os.chdir(PROJECT_ROOT)
+        # cwd rather than os.chdir: other steps may be running in this process
+        success = self.run_command(cmd, "Running RIFE", cwd=self.rife_dir)
 
         elapsed_time = time.time() - start_time
 
@@ -164,6 +158,9 @@ class ExperimentRunner:
     def calculate_metrics(self) -> Dict:
         """Calculate PSNR and SSIM between interpolated and original 60fps."""
         self.log("Step 4: Calculating quality metrics (PSNR/SSIM)")
+        # Only this step needs scikit-video
+        import skvideo.io
+        from skvideo.measure import psnr, ssim
 
         # Load videos
         self.log("Loading reference video...")
@@ -214,109 +211,124 @@ class ExperimentRunner:
         combined["scale"] = self.scale
 
         # Save JSON
-        json_path = self.metrics_dir / "arc_raiders_metrics.json"
+        json_path = self.metrics_json
         with open(json_path, "w") as f:
             json.dump(combined, f, indent=2)
         self.log(f"Saved JSON to {json_path}")
 
         # Save CSV
-        csv_path = self.metrics_dir / "arc_raiders_metrics.csv"
+        csv_path = self.metrics_csv
         with open(csv_path, "w", newline="") as f:
             writer = csv.DictWriter(f, fieldnames=combined.keys())
             writer.writeheader()
             writer.writerow(combined)
         self.log(f"Saved CSV to {csv_path}")
 
-    def create_side_by_side_comparison(self) -> bool:
-        """Create side-by-side comparison video."""
-        self.log("Step 6: Creating side-by-side comparison")
-
-        cmd = [
-            "ffmpeg", "-y",
-            "-i", str(self.clip_60fps),
-            "-i", str(self.interpolated_60fps),
-            "-filter_complex",
-            "[0:v][1:v]hstack=inputs=2[v];" +
-            "[v]drawtext=text='Original 60fps':x=10:y=10:fontsize=48:fontcolor=white:box=1:boxcolor=black@0.5," +
-            "drawtext=text='RIFE Interpolated':x=w/2+10:y=10:fontsize=48:fontcolor=white:box=1:boxcolor=black@0.5[vout]",
-            "-map", "[vout]",
-            "-c:v", "libx264",
-            "-preset", "medium",
-            "-crf", "23",
-            str(self.comparison_side_by_side)
-        ]
-
-        return self.run_command(cmd, "Creating side-by-side comparison")
-
-    def create_blind_test(self) -> bool:
-        """Create A/B blind test video with random ordering."""
-        self.log("Step 7: Creating A/B blind test")
-
-        # Randomly decide order
-        is_original_first = random.choice([True, False])
-        first_label = "A" if is_original_first else "B"
-        second_label = "B" if is_original_first else "A"
-        first_video = str(self.clip_60fps) if is_original_first else str(self.interpolated_60fps)
-        second_video = str(self.interpolated_60fps) if is_original_first else str(self.clip_60fps)
+    def create_comparisons(self) -> bool:
+        """Create side-by-side, blind test, difference and slow-motion videos from one decode."""
+        self.log("Step 6: Creating comparison videos")
 
-        # Create metadata file with answer
-        answer_file = self.output_dir / "blind_test_answer.txt"
-        with open(answer_file, "w") as f:
-            f.write(f"Clip A: {'Original' if is_original_first else 'Interpolated'}\n")
-            f.write(f"Clip B: {'Interpolated' if is_original_first else 'Original'}\n")
-
-        # Concatenate videos with labels
-        cmd = [
-            "ffmpeg", "-y",
-            "-i", first_video,
-            "-i", second_video,
-            "-filter_complex",
-            f"[0:v]drawtext=text='Clip {first_label}':x=10:y=10:fontsize=72:fontcolor=yellow:box=1:boxcolor=black@0.5[v0];" +
-            f"[1:v]drawtext=text='Clip {second_label}':x=10:y=10:fontsize=72:fontcolor=yellow:box=1:boxcolor=black@0.5[v1];" +
-            "[v0][v1]concat=n=2:v=1:a=0[vout]",
-            "-map", "[vout]",
-            "-c:v", "libx264",
-            "-preset", "medium",
-            "-crf", "23",
-            str(self.blind_test)
-        ]
+        try:
+            stats = ComparisonRenderer().render(
+                str(self.clip_60fps), str(self.interpolated_60fps), str(self.output_dir)
+            )
+        except RuntimeError as e:
+            self.log(f"Error: {e}")
+            return False
 
-        success = self.run_command(cmd, "Creating blind test")
-        if success:
-            self.log(f"Answer saved to {answer_file}")
-        return success
+        self.log(f"Created {len(stats['outputs'])} comparison videos in {stats['elapsed']:.1f}s")
+        self.log(f"Answer saved to {stats['answer']}")
+        return True
 
-    def run_full_experiment(self) -> bool:
-        """Run the complete experiment pipeline."""
+    @staticmethod
+    def _check(success: bool, description: str):
+        if not success:
+            raise RuntimeError(f"{description} failed")
+
+    def _interpolate_step(self, upstream: Dict) -> Dict:
+        success, stats = self.interpolate_with_rife()
+        self._check(success, "RIFE interpolation")
+        return stats
+
+    def _comparisons_step(self, upstream: Dict):
+        self._check(self.create_comparisons(), "Creating comparison videos")
+
+    def build_pipeline(self) -> Pipeline:
+        """Experiment steps as a dependency graph with cache keys."""
+        clip_60fps, clip_30fps = str(self.clip_60fps), str(self.clip_30fps)
+        interpolated = str(self.interpolated_60fps)
+        weights = PROJECT_ROOT / "train_log" / "flownet.pkl"
+
+        pipeline = Pipeline(str(self.manifest), workers=self.workers)
+        pipeline.add(Step(
+            "extract",
+            lambda upstream: self._check(self.extract_clip(), "Extracting clip"),
+            inputs=[str(self.source_video)],
+            outputs=[clip_60fps],
+            params={"duration": self.clip_duration, "codec": self.LOSSLESS_CODEC},
+        ))
+        pipeline.add(Step(
+            "downsample",
+            lambda upstream: self._check(self.downsample_to_30fps(), "Downsampling"),
+            inputs=[clip_60fps],
+            outputs=[clip_30fps],
+            params={"skip": 2, "codec": self.LOSSLESS_CODEC},
+        ))
+        pipeline.add(Step(
+            "interpolate",
+            self._interpolate_step,
+            inputs=[clip_30fps] + ([str(weights)] if weights.exists() else []),
+            outputs=[interpolated],
+            params={"scale": self.scale, "multi": 2, "fp16": True},
+        ))
+        # Metrics and comparisons only read the clips, so they run side by side
+        pipeline.add(Step(
+            "metrics",
+            lambda upstream: self.calculate_metrics(),
+            inputs=[clip_60fps, interpolated],
+        ))
+        pipeline.add(Step(
+            "comparisons",
+            self._comparisons_step,
+            inputs=[clip_60fps, interpolated],
+            outputs=[str(self.output_dir / name) for name in (
+                "comparison_sidebyside.mp4", "blind_test.mp4",
+                "comparison_diff.mp4", "comparison_slowmo.mp4", "blind_test_answer.txt"
+            )],
+            params={"outputs": list(OUTPUTS)},
+        ))
+        pipeline.add(Step(
+            "save_metrics",
+            lambda upstream: self.save_metrics(upstream["metrics"], upstream["interpolate"]),
+            outputs=[str(self.metrics_json), str(self.metrics_csv)],
+            params={"source_video": str(self.source_video), "scale": self.scale},
+            after=["metrics", "interpolate"],
+        ))
+        return pipeline
+
+    def run_full_experiment(self, force: Iterable[str] = ()) -> bool:
+        """
+        Run the experiment, redoing only steps whose inputs or settings changed.
+
+        Args:
+            force: Step names to rerun even if cached
+        """
         self.log("="*60)
         self.log("Starting RIFE Gameplay Interpolation Experiment")
         self.log("="*60)
 
-        # Step 1: Extract clip
-        if not self.extract_clip():
-            return False
+        pipeline = self.build_pipeline()
+        pipeline.run(force=force)
 
-        # Step 2: Downsample to 30fps
-        if not self.downsample_to_30fps():
-            return False
+        for name in pipeline.steps:
+            status = pipeline.status.get(name, "skipped")
+            error = pipeline.errors.get(name)
+            self.log(f"{name:<12} {status}" + (f": {error}" if error else ""))
 
-        # Step 3: Interpolate with RIFE
-        success, processing_stats = self.interpolate_with_rife()
-        if not success:
+        if any(status not in ("ran", "cached") for status in pipeline.status.values()):
+            self.log("Experiment failed")
             return False
 
-        # Step 4: Calculate metrics
-        metrics = self.calculate_metrics()
-
-        # Step 5: Save metrics
-        self.save_metrics(metrics, processing_stats)
-
-        # Step 6: Create side-by-side comparison
-        self.create_side_by_side_comparison()
-
-        # Step 7: Create blind test
-        self.create_blind_test()
-
         self.log("="*60)
         self.log("Experiment completed successfully!")
         self.log("="*60)
@@ -4,6 +4,7 @@ RIFE Gameplay Interpolation CLI
 A beautiful command-line interface for AI-powered frame interpolation.
 """
 
+import json
 import os
 import sys
 from datetime import datetime
@@ -18,11 +19,11 @@ from rich.table import Table
 from rich.text import Text
 from rich import box
 
-from src.core.interpolator import RIFEInterpolator
-from src.core.metrics import MetricsCalculator
-from src.core.benchmark import Benchmarker
+# torch / cv2 take seconds to import: core modules are imported inside the
+# commands that use them so --help, completion and light commands stay fast
 from src.utils.logger import setup_logger, log
-from src.utils.config import Config
+from src.utils.config import BACKENDS, CPU_MODES, Config, DEFAULT_CONFIG_PATH
+from src.utils.threads import apply_thread_profile
 
 console = Console()
 
@@ -35,33 +36,125 @@ BANNER = """
 def print_banner():
     console.print(Panel(BANNER, border_style="cyan", box=box.DOUBLE))
 
+def _scale_option(ctx, param, value):
+    """A flow scale factor, or ``auto`` for motion-adaptive selection."""
+    if value is None or value == "auto":
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        raise click.BadParameter(f"expected a number or 'auto', got {value!r}")
+
 @click.group()
 @click.option("--verbose", "-v", is_flag=True, help="Enable verbose logging")
 @click.option("--config", "-c", type=click.Path(), help="Config file path")
+@click.option("--profile", type=click.Path(), help="Write a Chrome/Perfetto trace of the command")
+@click.option("--perf-profile", "-p", metavar="NAME",
+              help="Performance profile: fast, quality, realtime or one defined in the config")
+@click.option("--telemetry", type=click.Path(file_okay=False), metavar="DIR",
+              help="Stream counters and timings to DIR/events.jsonl and DIR/rife.prom")
 @click.pass_context
-def cli(ctx, verbose, config):
+def cli(ctx, verbose, config, profile, perf_profile, telemetry):
     """🎮 RIFE Gameplay Interpolation - AI-powered frame enhancement for gaming videos."""
     ctx.ensure_object(dict)
+    if profile:
+        from src.utils.profiling import ProfileSession
+        
+        session = ProfileSession(profile)
+        session.start()
+        ctx.call_on_close(session.stop)
+    
     ctx.obj["verbose"] = verbose
-    ctx.obj["config"] = Config(config) if config else Config()
+    ctx.obj["config_path"] = config or DEFAULT_CONFIG_PATH
+    ctx.obj["config"] = Config(ctx.obj["config_path"])
+    
+    perf_profile = perf_profile or ctx.obj["config"].profile
+    if perf_profile:
+        try:
+            ctx.obj["config"] = ctx.obj["config"].with_profile(perf_profile)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--perf-profile")
+    
+    from src.core.weights import configure_pool
+    
+    model_settings = ctx.obj["config"].model
+    configure_pool(model_settings.cache_dir, model_settings.memory_budget_mb)
+    
+    settings = ctx.obj["config"].telemetry
+    telemetry = telemetry or settings.dir
+    if telemetry:
+        from src.utils.telemetry import TelemetrySink
+        
+        sink = TelemetrySink(
+            os.path.join(telemetry, "events.jsonl"),
+            os.path.join(telemetry, "rife.prom"),
+            capacity=settings.capacity,
+            interval=settings.flush_interval
+        )
+        sink.start()
+        ctx.call_on_close(sink.stop)
     setup_logger(verbose)
     print_banner()
 
 @cli.command()
 @click.argument("input_video", type=click.Path(exists=True))
 @click.argument("output_video", type=click.Path())
-@click.option("--multi", "-m", default=2, type=click.Choice(["2", "4", "8"]), help="Frame multiplier")
-@click.option("--model", default="4.25", help="RIFE model version")
-@click.option("--scale", "-s", default=1.0, type=float, help="Input scale factor (0.5 for half res)")
+@click.option("--multi", "-m", type=click.Choice(["2", "4", "8"]),
+              help="Frame multiplier (default: config)")
+@click.option("--model", help="RIFE model version (default: config)")
+@click.option("--scale", "-s", callback=_scale_option,
+              help="Input scale factor, 0.5 for half res, or 'auto' to follow the motion "
+                   "(default: config)")
+@click.option("--target-fps", type=float,
+              help="With --scale auto: coarsen the scale to keep this many pairs/s")
+@click.option("--retime", is_flag=True,
+              help="Follow the input's timestamps (VFR captures): synthesize only where the "
+                   "output timeline has gaps")
+@click.option("--fps", "output_fps", type=float,
+              help="With --retime: output frame rate (default: input rate × multi)")
+@click.option("--game",
+              help="Copy this game's static HUD regions from the source (mask cached per game)")
+@click.option("--cpu-mode", type=click.Choice(CPU_MODES),
+              help="CPU inference mode (default: config)")
+@click.option("--backend", type=click.Choice(BACKENDS),
+              help="Inference runtime; onnx runs an exported graph with ONNX Runtime on CPU "
+                   "(default: config)")
+@click.option("--frame-cache", type=click.Path(file_okay=False),
+              help="Reuse synthesized frames stored here by earlier runs (default: config)")
+@click.option("--remote", is_flag=False, flag_value="127.0.0.1:8765", default=None,
+              metavar="ADDRESS",
+              help="Submit to a running `rife serve` (default 127.0.0.1:8765, or unix:/path)")
+@click.option("--priority", default=0, type=int,
+              help="Job priority with --remote (higher runs first)")
 @click.pass_context
-def interpolate(ctx, input_video, output_video, multi, model, scale):
+def interpolate(ctx, input_video, output_video, multi, model, scale, target_fps, retime, output_fps,
+                game, cpu_mode, backend, frame_cache, remote, priority):
     """🚀 Interpolate video frames using RIFE.
     
     Examples:
         rife interpolate gameplay.mp4 gameplay_60fps.mp4
         rife interpolate input.mp4 output.mp4 --multi 4
+        rife interpolate input.mp4 output.mp4 --remote
+        rife -p fast interpolate input.mp4 output.mp4
+        rife interpolate input.mp4 output.mp4 --scale auto --target-fps 20
+        rife interpolate capture_vfr.mp4 output.mp4 --retime --fps 60
+        rife interpolate tarkov.mp4 output.mp4 --game tarkov
+        rife interpolate input.mp4 output.mp4 --backend onnx
     """
-    multi = int(multi)
+    config = ctx.obj["config"]
+    multi = int(multi) if multi else config.interpolation.default_multi
+    frame_cache = frame_cache or config.frame_cache.dir
+    cpu_mode = cpu_mode or config.hardware.cpu_mode
+    backend = backend or config.hardware.backend
+    if backend != "torch" and remote:
+        raise click.UsageError("--backend applies to local runs; the server uses its own engine")
+    if scale is None:
+        scale = "auto" if config.interpolation.adaptive else config.interpolation.scale
+    target_fps = target_fps or config.interpolation.target_fps
+    adaptive = scale == "auto"
+    model = model or config.model.version
+    if not remote:
+        apply_thread_profile(config.threads)
     
     console.print(f"\n[bold green]►[/] Starting interpolation...\n")
     
@@ -71,15 +164,31 @@ def interpolate(ctx, input_video, output_video, multi, model, scale):
     table.add_column("Value", style="white")
     table.add_row("Input", str(input_video))
     table.add_row("Output", str(output_video))
-    table.add_row("Multiplier", f"{multi}x")
+    if retime:
+        table.add_row("Retime", f"{output_fps:g} FPS" if output_fps else f"{multi}x input rate")
+    else:
+        table.add_row("Multiplier", f"{multi}x")
     table.add_row("Model", f"RIFE v{model}")
-    table.add_row("Scale", f"{scale}")
+    table.add_row(
+        "Scale", f"auto (≤{target_fps:g} pairs/s)" if adaptive and target_fps else f"{scale}"
+    )
+    table.add_row("Batch", f"{config.hardware.batch_size}")
+    if backend != "torch":
+        table.add_row("Backend", "ONNX Runtime (CPU)")
+    elif cpu_mode != "fp32" and not remote:
+        table.add_row("CPU mode", cpu_mode)
+    if game:
+        table.add_row("HUD", game)
+    if frame_cache:
+        table.add_row("Frame cache", frame_cache)
+    if config.profile:
+        table.add_row("Profile", config.profile)
+    if remote:
+        table.add_row("Server", remote)
     console.print(table)
     console.print()
     
     try:
-        interpolator = RIFEInterpolator(model_version=model)
-        
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -93,13 +202,87 @@ def interpolate(ctx, input_video, output_video, multi, model, scale):
             def update_progress(pct):
                 progress.update(task, completed=pct)
             
-            stats = interpolator.process(
-                input_video, 
-                output_video, 
-                multi=multi,
-                scale=scale,
-                progress_callback=update_progress
-            )
+            if remote:
+                from src.core.server import JobClient
+                
+                # The server resolves paths against its own working directory
+                params = {
+                    "input": os.path.abspath(input_video),
+                    "output": os.path.abspath(output_video),
+                    "multi": multi,
+                    "scale": scale,
+                    "batch_size": config.hardware.batch_size,
+                    "model": model,
+                    "scene_detection": config.interpolation.scene_detection,
+                }
+                if adaptive:
+                    params["motion_reach"] = config.interpolation.motion_reach
+                    params["motion_still"] = config.interpolation.motion_still
+                    params["target_fps"] = target_fps
+                if retime:
+                    params["retime"] = True
+                    params["fps"] = output_fps
+                if game:
+                    params["game"] = game
+                    params["hud"] = config.hud.model_dump()
+                if frame_cache:
+                    params["frame_cache"] = os.path.abspath(frame_cache)
+                    params["frame_cache_mb"] = config.frame_cache.max_mb
+                stats = JobClient(remote).run(
+                    "interpolate", params, priority, progress_callback=update_progress
+                )
+            else:
+                from src.core.adaptive import ScaleSelector
+                from src.core.encoder import VideoEncoder
+                from src.core.interpolator import RIFEInterpolator
+                
+                selector = ScaleSelector(
+                    reach=config.interpolation.motion_reach,
+                    still=config.interpolation.motion_still,
+                    target_fps=target_fps
+                ) if adaptive else None
+                hud = None
+                if game:
+                    from src.core.hud import HudAnalyzer
+                    
+                    hud = HudAnalyzer(**config.hud.model_dump()).for_game(game, input_video)
+                cache = None
+                if frame_cache:
+                    from src.core.framecache import FrameCache
+                    
+                    cache = FrameCache(frame_cache, max_bytes=config.frame_cache.max_mb << 20)
+                interpolator = RIFEInterpolator(
+                    model_version=model,
+                    batch_size=config.hardware.batch_size,
+                    encoder=VideoEncoder(config.output),
+                    fp16=config.interpolation.fp16,
+                    cpu_mode=cpu_mode,
+                    backend=backend,
+                    scene_detection=config.interpolation.scene_detection
+                )
+                if retime:
+                    stats = interpolator.retime(
+                        input_video,
+                        output_video,
+                        fps=output_fps,
+                        multi=multi,
+                        scale=1.0 if adaptive else scale,
+                        progress_callback=update_progress,
+                        adaptive=selector,
+                        hud=hud,
+                        cache=cache
+                    )
+                else:
+                    stats = interpolator.process(
+                        input_video, 
+                        output_video, 
+                        multi=multi,
+                        scale=1.0 if adaptive else scale,
+                        progress_callback=update_progress,
+                        adaptive=selector,
+                        hud=hud,
+                        cache=cache
+                    )
         
         # Results
         console.print(f"\n[bold green]✓[/] Interpolation complete!\n")
@@ -112,6 +295,34 @@ def interpolate(ctx, input_video, output_video, multi, model, scale):
         results.add_row("Frames", f"{stats['input_frames']} → {stats['output_frames']}")
         results.add_row("Processing Time", f"{stats['elapsed']:.1f}s")
         results.add_row("Speed", f"{stats['processing_fps']:.1f} fps")
+        if "synthesized" in stats:
+            results.add_row(
+                "Synthesized",
+                f"{stats['synthesized']} in {stats['gaps']} gaps "
+                f"({stats['reused']} source frames reused)"
+            )
+        if "scales" in stats:
+            scales = stats["scales"]
+            results.add_row("Scales", ", ".join(
+                f"{scale}×{pairs}" for scale, pairs in scales["pairs_per_scale"].items()
+            ))
+            results.add_row(
+                "Motion",
+                f"{scales['motion_mean']:.1f} px mean, {scales['motion_max']:.1f} px max"
+            )
+        if "hud" in stats:
+            results.add_row(
+                "HUD",
+                f"{stats['hud']['static_fraction']:.1%} static, "
+                f"model on {stats['hud']['model_fraction']:.1%} of the frame"
+            )
+        if "cache" in stats:
+            cached = stats["cache"]
+            lookups = cached["hits"] + cached["misses"]
+            results.add_row(
+                "Frame cache",
+                f"{cached['hits']}/{lookups} hits, {cached['bytes'] / 1e6:.0f} MB on disk"
+            )
         console.print(results)
         
         log.success(f"Output saved to: {output_video}")
@@ -125,8 +336,8 @@ def interpolate(ctx, input_video, output_video, multi, model, scale):
 @click.argument("interpolated", type=click.Path(exists=True))
 @click.argument("reference", type=click.Path(exists=True))
 @click.option("--output", "-o", type=click.Path(), help="Output JSON path")
-@click.option("--metrics", "-m", multiple=True, default=["psnr", "ssim", "vmaf"], 
-              help="Metrics to calculate")
+@click.option("--metrics", "-m", multiple=True,
+              help="Metrics to calculate (default: config, psnr/ssim/vmaf)")
 @click.pass_context
 def metrics(ctx, interpolated, reference, output, metrics):
     """📊 Calculate quality metrics (PSNR, SSIM, VMAF).
@@ -135,9 +346,14 @@ def metrics(ctx, interpolated, reference, output, metrics):
         rife metrics output.mp4 ground_truth.mp4
         rife metrics output.mp4 reference.mp4 -m psnr -m ssim
     """
+    from src.core.metrics import MetricsCalculator
+    
+    config = ctx.obj["config"]
+    metrics = list(metrics) or config.metrics.default
+    apply_thread_profile(config.threads)
     console.print(f"\n[bold green]►[/] Calculating quality metrics...\n")
     
-    calc = MetricsCalculator()
+    calc = MetricsCalculator(sample_every=config.metrics.sample_every)
     
     with Progress(
         SpinnerColumn(),
@@ -145,7 +361,7 @@ def metrics(ctx, interpolated, reference, output, metrics):
         console=console,
     ) as progress:
         task = progress.add_task("[cyan]Analyzing frames...", total=None)
-        results = calc.calculate(interpolated, reference, list(metrics), output)
+        results = calc.calculate(interpolated, reference, metrics, output)
     
     console.print(f"\n[bold green]✓[/] Analysis complete!\n")
     
@@ -172,20 +388,53 @@ def metrics(ctx, interpolated, reference, output, metrics):
 
 @cli.command()
 @click.argument("input_video", type=click.Path(exists=True))
-@click.option("--resolutions", "-r", multiple=True, default=["720p", "1080p", "1440p"])
+@click.option("--resolutions", "-r", multiple=True, help="Resolutions to test (default: config)")
+@click.option("--batch-size", "-b", multiple=True, type=int,
+              help="Frame pairs per forward pass (repeatable; default: config)")
+@click.option("--max-frames", type=int, help="Frames to process per run")
+@click.option("--simulate", is_flag=True, help="Also replay the clip live under frame deadlines")
+@click.option("--fps", type=float, help="Source cadence for --simulate (default: clip FPS)")
+@click.option("--deadline-ms", type=float,
+              help="Per-frame deadline for --simulate (default: 1/fps)")
 @click.option("--output", "-o", type=click.Path(), help="Output JSON path")
 @click.pass_context
-def benchmark(ctx, input_video, resolutions, output):
-    """⚡ Benchmark interpolation performance.
+def benchmark(ctx, input_video, resolutions, batch_size, max_frames, simulate, fps, deadline_ms,
+              output):
+    """⚡ Benchmark interpolation performance and memory usage.
     
     Examples:
         rife benchmark gameplay.mp4
         rife benchmark input.mp4 -r 720p -r 1080p -r 4k
+        rife benchmark input.mp4 -r 1080p -b 1 -b 4
+        rife benchmark input.mp4 -r 1080p --simulate --fps 30
     """
+    from src.core.benchmark import Benchmarker
+    from src.core.encoder import VideoEncoder
+    from src.core.engine import RIFEEngine
+    
+    config = ctx.obj["config"]
+    apply_thread_profile(config.threads)
     console.print(f"\n[bold green]►[/] Running performance benchmark...\n")
     
-    benchmarker = Benchmarker()
-    results = benchmarker.run(input_video, list(resolutions))
+    benchmarker = Benchmarker(
+        engine=RIFEEngine(
+            scale=config.interpolation.scale,
+            fp16=config.interpolation.fp16,
+            version=config.model.version
+        ),
+        max_frames=max_frames,
+        encoder=VideoEncoder(config.output),
+        duration=config.benchmark.test_duration,
+        warmup_frames=config.benchmark.warmup_frames
+    )
+    results = benchmarker.run(
+        input_video,
+        list(resolutions) or config.benchmark.resolutions,
+        list(batch_size) or [config.hardware.batch_size],
+        simulate=simulate,
+        fps=fps,
+        deadline_ms=deadline_ms
+    )
     
     console.print(f"\n[bold green]✓[/] Benchmark complete!\n")
     
@@ -196,58 +445,530 @@ def benchmark(ctx, input_video, resolutions, output):
     # Results table
     table = Table(title="Performance Results", box=box.ROUNDED, border_style="green")
     table.add_column("Resolution", style="cyan")
+    table.add_column("Batch", style="cyan")
     table.add_column("Inference FPS", style="white")
     table.add_column("Real-time", style="yellow")
+    table.add_column("Peak RSS", style="white")
+    table.add_column("Torch Peak", style="white")
+    table.add_column("Buffers", style="white")
     table.add_column("Status", style="white")
     
     for r in results["benchmarks"]:
         status = "[green]✓[/]" if r["realtime"] else "[red]✗[/]"
         table.add_row(
             r["resolution"],
+            str(r["batch_size"]),
             f"{r['fps']:.1f}",
             f"{r['realtime_ratio']:.2f}x",
+            f"{r['peak_rss_mb']:.0f} MB",
+            f"{r['torch_peak_mb']:.0f} MB",
+            f"{r['frame_buffer_mb']:.0f} MB",
             status
         )
     
     console.print(table)
     
+    if simulate:
+        sim_table = Table(title="Real-time Simulation", box=box.ROUNDED, border_style="green")
+        sim_table.add_column("Resolution", style="cyan")
+        sim_table.add_column("Cadence", style="white")
+        sim_table.add_column("Missed", style="yellow")
+        sim_table.add_column("Dropped", style="yellow")
+        sim_table.add_column("Latency p50/p99", style="white")
+        sim_table.add_column("Jitter σ", style="white")
+        sim_table.add_column("Status", style="white")
+        
+        for r in results["realtime"]:
+            status = "[green]✓[/]" if r["realtime"] else "[red]✗[/]"
+            sim_table.add_row(
+                r["resolution"],
+                f"{r['fps']:.1f} fps / {r['deadline_ms']:.1f} ms",
+                f"{r['missed_deadlines']}/{r['processed']}",
+                f"{r['dropped']}/{r['frames']}",
+                f"{r['latency_ms']['p50']:.1f} / {r['latency_ms']['p99']:.1f} ms",
+                f"{r['jitter_ms']['std']:.2f} ms",
+                status
+            )
+        
+        console.print(sim_table)
+    
     if output:
         benchmarker.save_results(results, output)
         log.info(f"Results saved to: {output}")
 
+@cli.command("cpu-modes")
+@click.argument("input_video", type=click.Path(exists=True))
+@click.option("--mode", "-m", "modes", multiple=True, type=click.Choice(CPU_MODES),
+              help="Modes to compare with fp32 (repeatable; default: all)")
+@click.option("--resolution", "-r", help="Resize the clip first, e.g. 720p (default: as is)")
+@click.option("--batch-size", "-b", type=int, help="Frame pairs per forward pass (default: config)")
+@click.option("--max-frames", default=16, show_default=True, type=int,
+              help="Frames to process per mode")
+@click.option("--onnx", is_flag=True,
+              help="Also run the ONNX Runtime backend (exports the graph if needed)")
+@click.option("--output", "-o", type=click.Path(), help="Output JSON path")
+@click.pass_context
+def cpu_modes(ctx, input_video, modes, resolution, batch_size, max_frames, onnx, output):
+    """🧮 Compare CPU inference modes: speed and accuracy against fp32.
+    
+    Examples:
+        rife cpu-modes gameplay.mp4
+        rife cpu-modes input.mp4 -r 720p -m int8-static -m bf16
+        rife cpu-modes input.mp4 -r 720p -m fp32 --onnx
+    """
+    import tempfile
+    
+    from src.core.benchmark import Benchmarker
+    from src.core.engine import RIFEEngine
+    
+    config = ctx.obj["config"]
+    apply_thread_profile(config.threads)
+    console.print(f"\n[bold green]►[/] Comparing CPU inference modes...\n")
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        benchmarker = Benchmarker(
+            output_dir=tmpdir,
+            engine=RIFEEngine(
+                scale=config.interpolation.scale, device="cpu", version=config.model.version
+            ),
+            max_frames=max_frames,
+            duration=config.benchmark.test_duration
+        )
+        if resolution:
+            input_video = benchmarker.resize_video(
+                input_video, resolution, os.path.join(tmpdir, "input.mkv")
+            )
+        results = benchmarker.compare_cpu_modes(
+            input_video,
+            list(modes) or [mode for mode in CPU_MODES if mode != "fp32"],
+            batch_size or config.hardware.batch_size,
+            onnx=onnx
+        )
+    
+    console.print(f"[bold]CPU:[/] {results['cpu']}, {results['threads']} threads, "
+                  f"bf16 {'native' if results['bf16_native'] else 'emulated'}\n")
+    
+    table = Table(
+        title=f"CPU Modes ({results['pairs']} pairs)", box=box.ROUNDED, border_style="green"
+    )
+    table.add_column("Mode", style="cyan")
+    table.add_column("Pairs/s", style="white")
+    table.add_column("Speedup", style="yellow")
+    table.add_column("PSNR vs fp32", style="white")
+    table.add_column("Max Diff", style="white")
+    
+    for r in results["modes"]:
+        if "error" in r:
+            table.add_row(r["mode"], "[red]failed[/]", "", "", r["error"][:40])
+            continue
+        table.add_row(
+            r["mode"],
+            f"{r['fps']:.2f}",
+            f"{r['speedup']:.2f}x",
+            "identical" if r["max_diff"] == 0 else f"{r['psnr_vs_fp32']:.1f} dB",
+            str(r["max_diff"])
+        )
+    console.print(table)
+    
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        log.info(f"Results saved to: {output}")
+
 @cli.command()
 @click.argument("input_video", type=click.Path(exists=True))
 @click.argument("output_video", type=click.Path())
-@click.option("--skip", "-s", default=2, type=int, help="Keep every Nth frame")
+@click.option("--skip", "-s", multiple=True, default=[2], type=int,
+              help="Keep every Nth frame (repeatable)")
 @click.pass_context  
 def downsample(ctx, input_video, output_video, skip):
     """📉 Create synthetic low-FPS test data.
     
-    Extracts every Nth frame to simulate lower framerates.
+    Extracts every Nth frame to simulate lower framerates. Several skip
+    factors are produced from a single decode; OUTPUT_VIDEO must then
+    contain a {fps} or {skip} placeholder.
     
     Examples:
         rife downsample 60fps.mp4 30fps.mp4 --skip 2
+        rife downsample 60fps.mp4 "clip_{fps}fps.mp4" -s 2 -s 3 -s 4
     """
+    from src.core.encoder import VideoEncoder
     from src.core.extractor import FrameExtractor
     
-    console.print(f"\n[bold green]►[/] Downsampling video (every {skip} frames)...\n")
+    skips = ", ".join(str(s) for s in skip)
+    console.print(f"\n[bold green]►[/] Downsampling video (every {skips} frames)...\n")
     
-    extractor = FrameExtractor()
-    stats = extractor.downsample(input_video, output_video, skip)
+    config = ctx.obj["config"]
+    apply_thread_profile(config.threads, ffmpeg_only=True)
+    extractor = FrameExtractor(encoder=VideoEncoder(config.output))
+    if len(skip) == 1:
+        results = {skip[0]: extractor.downsample(input_video, output_video, skip[0])}
+    else:
+        results = extractor.downsample_many(input_video, output_video, list(skip))
     
     console.print(f"[bold green]✓[/] Done!")
-    console.print(f"    {stats['input_fps']:.1f} FPS → {stats['output_fps']:.1f} FPS")
-    console.print(f"    {stats['input_frames']} → {stats['output_frames']} frames")
+    for stats in results.values():
+        console.print(f"    {stats['input_fps']:.1f} FPS → {stats['output_fps']:.1f} FPS "
+                      f"({stats['input_frames']} → {stats['output_frames']} frames"
+                      f"{', estimated' if stats['frames_estimated'] else ''}): "
+                      f"{stats['output_path']}")
+
+@cli.command()
+@click.argument("input_video", type=click.Path(exists=True))
+@click.option("--max-frames", default=30, type=int, help="Frames to interpolate per trial")
+@click.option("--save/--no-save", default=True, help="Persist the best profile to the config")
+@click.pass_context
+def tune(ctx, input_video, max_frames, save):
+    """🎛️  Find the fastest CPU thread split for this machine.
+    
+    Tries torch / ffmpeg thread counts and worker counts on a short
+    interpolation run and saves the winner to the config's `threads`
+    section. Its thread counts are per worker; interpolate, metrics and
+    benchmark run one job and scale them up to the whole split.
+    
+    Examples:
+        rife tune gameplay.mp4
+        rife -c my.yaml tune input.mp4 --max-frames 60
+    """
+    from src.core.encoder import VideoEncoder
+    from src.core.tuner import ThreadTuner
+    
+    console.print(f"\n[bold green]►[/] Tuning CPU threads...\n")
+    
+    tuner = ThreadTuner(max_frames=max_frames, encoder=VideoEncoder(ctx.obj["config"].output))
+    candidates = tuner.candidates()
+    
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        console=console,
+    ) as progress:
+        progress.add_task(f"[cyan]Running {len(candidates)} trials...", total=None)
+        try:
+            results = tuner.run(input_video, candidates)
+        except Exception as e:
+            console.print(f"[bold red]✗ Error:[/] {e}")
+            sys.exit(1)
+    
+    table = Table(
+        title=f"Thread Splits ({results['cores']} cores)", box=box.ROUNDED, border_style="green"
+    )
+    table.add_column("Workers", style="cyan")
+    table.add_column("Torch", style="white")
+    table.add_column("FFmpeg", style="white")
+    table.add_column("Pinned", style="white")
+    table.add_column("Throughput", style="yellow")
+    
+    for trial in sorted(results["trials"], key=lambda t: -t["fps"]):
+        profile = trial["profile"]
+        marker = " [green]★[/]" if profile == results["best"] else ""
+        table.add_row(
+            str(profile["workers"]),
+            str(profile["torch_threads"]),
+            str(profile["ffmpeg_threads"]),
+            "yes" if profile["pin_cores"] else "no",
+            f"{trial['fps']:.1f} fps{marker}"
+        )
+    
+    console.print(table)
+    
+    if save:
+        Config.save_section(ctx.obj["config_path"], "threads", results["best"])
+        log.success(f"Saved thread profile to {ctx.obj['config_path']}")
+
+@cli.command()
+@click.argument("manifest", type=click.Path(exists=True))
+@click.option("--output-dir", "-o", default="results/batch", type=click.Path(),
+              help="Work and results directory")
+@click.option("--workers", "-w", type=int, help="Steps running at once (default: manifest or 4)")
+@click.option("--limit", "-l", multiple=True, metavar="STAGE=N",
+              help="Per-stage concurrency (extract, downsample, interpolate, evaluate)")
+@click.option("--force", is_flag=True, help="Rerun every step, ignoring the cache")
+@click.pass_context
+def batch(ctx, manifest, output_dir, workers, limit, force):
+    """🗂️  Evaluate many clips across games from a manifest.
+    
+    Every clip is extracted losslessly from its source, downsampled,
+    interpolated and scored against the ground truth. Steps run on a
+    bounded worker pool with per-stage limits; finished steps are cached,
+    so an interrupted run picks up where it stopped.
+    
+    Examples:
+        rife batch configs/batch.example.yaml
+        rife batch corpus.yaml -w 6 -l interpolate=2 -l extract=3
+    """
+    from src.core.batch import STAGES, BatchManifest, BatchRunner
+    from src.core.encoder import VideoEncoder
+    
+    config = ctx.obj["config"]
+    # Steps run concurrently: keep the profile's per-worker split
+    apply_thread_profile(config.threads, jobs=config.threads.workers)
+    
+    spec = BatchManifest.load(manifest)
+    limits = dict(spec.limits)
+    for item in limit:
+        stage, _, value = item.partition("=")
+        if stage not in STAGES or not value.isdigit() or int(value) < 1:
+            raise click.BadParameter(
+                f"expected STAGE=N with STAGE in {', '.join(STAGES)} and N >= 1",
+                param_hint="--limit"
+            )
+        limits[stage] = int(value)
+    
+    games = {game.id: game.name for game in config.games}
+    for game_id in sorted({clip.game for clip in spec.clips} - set(games)):
+        log.warning(f"Game '{game_id}' is not listed in the config's games")
+    
+    console.print(f"\n[bold green]►[/] Running {len(spec.clips)} clips "
+                  f"across {len({clip.game for clip in spec.clips})} games...\n")
+    
+    try:
+        runner = BatchRunner(
+            output_dir,
+            encoder=VideoEncoder(config.output),
+            workers=workers or spec.workers or 4,
+            limits=limits,
+            batch_size=config.hardware.batch_size,
+            games=games,
+            sample_every=config.metrics.sample_every,
+            version=config.model.version,
+            scale=config.interpolation.scale,
+            fp16=config.interpolation.fp16,
+            cpu_mode=config.hardware.cpu_mode,
+            backend=config.hardware.backend,
+            scene_detection=config.interpolation.scene_detection
+        )
+    except ValueError as e:
+        # Limits from the manifest
+        raise click.BadParameter(str(e), param_hint=manifest)
+    
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        console=console,
+    ) as progress:
+        progress.add_task("[cyan]Processing clips...", total=None)
+        summary = runner.run(spec.clips, force=force)
+    
+    clips = Table(title="Clips", box=box.ROUNDED, border_style="blue")
+    clips.add_column("Game", style="cyan")
+    clips.add_column("Clip", style="white")
+    clips.add_column("PSNR", style="white")
+    clips.add_column("SSIM", style="white")
+    clips.add_column("Speed", style="white")
+    clips.add_column("Status", style="yellow")
+    
+    for row in summary["clips"]:
+        if row["ok"]:
+            metrics = row["metrics"]
+            clips.add_row(
+                row["game"], row["clip"],
+                f"{metrics.get('psnr_synthesized', metrics['psnr']):.2f} dB",
+                f"{metrics.get('ssim_synthesized', metrics['ssim']):.4f}",
+                f"{row['interpolation']['processing_fps']:.1f} fps",
+                "[dim]cached[/]" if row["cached"] else "[green]done[/]"
+            )
+        else:
+            clips.add_row(row["game"], row["clip"], "-", "-", "-",
+                          f"[red]{row['failed_stage']} failed[/]")
+    console.print(clips)
+    
+    games_table = Table(
+        title="Per Game (synthesized frames)", box=box.ROUNDED, border_style="green"
+    )
+    games_table.add_column("Game", style="cyan")
+    games_table.add_column("Clips", style="white")
+    games_table.add_column("Frames", style="white")
+    games_table.add_column("PSNR", style="white")
+    games_table.add_column("SSIM", style="white")
+    games_table.add_column("Speed", style="white")
+    
+    for game in summary["games"].values():
+        ok = game["clips"] - game["failed"]
+        games_table.add_row(
+            game["name"],
+            f"{ok}/{game['clips']}",
+            str(game["frames"]),
+            f"{game['psnr']:.2f} dB" if game["psnr"] is not None else "-",
+            f"{game['ssim']:.4f}" if game["ssim"] is not None else "-",
+            f"{game['processing_fps']:.1f} fps" if game["processing_fps"] is not None else "-"
+        )
+    console.print(games_table)
+    
+    log.info(f"Finished in {summary['elapsed']:.1f}s; results in {output_dir}")
+    if any(not row["ok"] for row in summary["clips"]):
+        sys.exit(1)
+
+@cli.command()
+@click.option("--host", default="127.0.0.1", help="Interface to listen on (keep it local)")
+@click.option("--port", "-p", default=8765, type=int, help="TCP port")
+@click.option("--socket", "socket_path", type=click.Path(),
+              help="Listen on a Unix socket instead of TCP")
+@click.option("--workers", "-w", default=1, type=int, help="Jobs running at once")
+@click.option("--allow-remote", is_flag=True,
+              help="Allow a non-loopback --host (jobs read and write any path this user can)")
+@click.pass_context
+def serve(ctx, host, port, socket_path, workers, allow_remote):
+    """🛰️  Keep the model warm and run jobs from a local queue.
+    
+    Clients submit interpolate and metrics jobs over HTTP (localhost or a
+    Unix socket); jobs run by priority and stream their progress. Requests
+    need the server's token, written to a file only this user can read.
+    
+    Examples:
+        rife serve
+        rife serve --socket /tmp/rife.sock
+        rife interpolate in.mp4 out.mp4 --remote unix:/tmp/rife.sock
+    """
+    import time
+    
+    from src.core.encoder import VideoEncoder
+    from src.core.engine import RIFEEngine
+    from src.core.server import LOOPBACK_HOSTS, JobServer
+    
+    if not socket_path and host not in LOOPBACK_HOSTS:
+        if not allow_remote:
+            raise click.UsageError(
+                f"Refusing to listen on {host}: jobs can read and write any path this user can. "
+                "Pass --allow-remote to do it anyway."
+            )
+        log.warning(f"Listening on {host}: jobs can read and write any path this user can")
+    
+    config = ctx.obj["config"]
+    apply_thread_profile(config.threads, jobs=workers)
+    
+    address = f"unix:{socket_path}" if socket_path else f"{host}:{port}"
+    
+    server = JobServer(
+        engine=RIFEEngine(
+            scale=config.interpolation.scale,
+            fp16=config.interpolation.fp16,
+            version=config.model.version,
+            cpu_mode=config.hardware.cpu_mode
+        ),
+        encoder=VideoEncoder(config.output),
+        workers=workers,
+        batch_size=config.hardware.batch_size
+    )
+    
+    console.print(f"\n[bold green]►[/] Loading model...\n")
+    try:
+        server.start(address)
+    except Exception as e:
+        console.print(f"[bold red]✗ Error:[/] {e}")
+        sys.exit(1)
+    
+    console.print(f"[bold green]✓[/] Serving on [cyan]{server.address}[/] (Ctrl+C to stop)")
+    console.print(f"[dim]Token: {server.token_file}[/]")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        console.print("\n[dim]Shutting down...[/]")
+    finally:
+        server.stop()
+
+@cli.command()
+@click.argument("watch_dir", type=click.Path(file_okay=False))
+@click.option("--output-dir", "-o", default="data/output", type=click.Path(),
+              help="Where interpolated videos go")
+@click.option("--workers", "-w", type=int,
+              help="Files processed at once (default: config threads.workers)")
+@click.option("--multi", "-m", type=click.Choice(["2", "4", "8"]),
+              help="Frame multiplier (default: config)")
+@click.option("--scale", "-s", type=float, help="Input scale factor (default: config)")
+@click.option("--interval", default=2.0, type=float, help="Seconds between folder scans")
+@click.option("--stable", default=2, type=int,
+              help="Scans a file's size must stay unchanged before it is picked up")
+@click.option("--once", is_flag=True, help="Process what is in the folder now, then exit")
+@click.option("--remote", is_flag=False, flag_value="127.0.0.1:8765", default=None,
+              metavar="ADDRESS",
+              help="Send files to a running `rife serve` instead of loading the model here")
+@click.pass_context
+def watch(ctx, watch_dir, output_dir, workers, multi, scale, interval, stable, once, remote):
+    """👀 Interpolate every video that lands in a folder.
+    
+    A file is picked up once its size stops changing, so recordings still
+    being written are left alone. Processed files are listed in a ledger
+    in the output directory and are not redone after a restart.
+    
+    Examples:
+        rife watch data/raw
+        rife watch ~/Videos/captures -w 2 --remote
+    """
+    from src.core.encoder import VideoEncoder
+    from src.core.watcher import FolderWatcher
+    
+    config = ctx.obj["config"]
+    multi = int(multi) if multi else config.interpolation.default_multi
+    scale = scale if scale is not None else config.interpolation.scale
+    workers = workers or config.threads.workers
+    if not remote:
+        apply_thread_profile(config.threads, jobs=workers)
+    
+    process = None
+    if remote:
+        from src.core.server import JobClient
+        
+        client = JobClient(remote)
+        
+        def process(input_path, output_path):
+            params = {
+                "input": os.path.abspath(input_path),
+                "output": os.path.abspath(output_path),
+                "multi": multi,
+                "scale": scale,
+                "batch_size": config.hardware.batch_size,
+                "model": config.model.version,
+                "scene_detection": config.interpolation.scene_detection,
+            }
+            return client.run("interpolate", params)
+    
+    watcher = FolderWatcher(
+        watch_dir,
+        output_dir,
+        encoder=VideoEncoder(config.output),
+        multi=multi,
+        scale=scale,
+        batch_size=config.hardware.batch_size,
+        concurrency=workers,
+        interval=interval,
+        stable_polls=stable,
+        process=process,
+        version=config.model.version,
+        fp16=config.interpolation.fp16,
+        cpu_mode=config.hardware.cpu_mode,
+        backend=config.hardware.backend,
+        scene_detection=config.interpolation.scene_detection
+    )
+    
+    console.print(f"\n[bold green]►[/] Watching [cyan]{watch_dir}[/] → [cyan]{output_dir}[/] "
+                  f"({multi}x, scale {scale}, {workers} at a time)"
+                  + ("" if once else " — Ctrl+C to stop") + "\n")
+    try:
+        watcher.run(once=once)
+    except KeyboardInterrupt:
+        console.print("\n[dim]Finishing files in progress...[/]")
+        watcher.stop()
+        watcher.drain()
+    
+    done = sum(entry["status"] == "done" for entry in watcher.processed)
+    failed = len(watcher.processed) - done
+    log.info(f"Processed {done} file(s), {failed} failed; ledger: {watcher.ledger.path}")
+    if once and failed:
+        sys.exit(1)
 
 @cli.command()
 @click.option("--model", "-m", default="4.25", help="Model version to download")
+@click.option("--code", "code_dir", type=click.Path(exists=True, file_okay=False),
+              help="train_log directory with this version's flownet code, stored with it")
 @click.pass_context
-def setup(ctx, model):
+def setup(ctx, model, code_dir):
     """🔧 Download models and setup environment.
     
     Examples:
         rife setup
-        rife setup --model 4.25.lite
+        rife setup --model 4.25.lite --code ~/Downloads/lite/train_log
     """
     from src.utils.setup import setup_environment
     
@@ -259,17 +980,99 @@ def setup(ctx, model):
         console=console,
     ) as progress:
         task = progress.add_task("[cyan]Downloading components...", total=None)
-        setup_environment(model, progress_callback=lambda msg: progress.update(task, description=msg))
+        setup_environment(
+            model,
+            progress_callback=lambda msg: progress.update(task, description=msg),
+            cache_dir=ctx.obj["config"].model.cache_dir,
+            code_dir=code_dir
+        )
     
     console.print(f"\n[bold green]✓[/] Setup complete! Run [cyan]rife interpolate --help[/] to get started.")
 
+@cli.command()
+@click.argument("video", type=click.Path(exists=True))
+@click.option("--game", "-g", required=True, help="Game id the mask is cached under")
+@click.option("--refresh", is_flag=True, help="Re-analyse even if a mask is cached")
+@click.pass_context
+def hud(ctx, video, game, refresh):
+    """🎯 Detect a game's static HUD regions and cache the mask.
+    
+    Examples:
+        rife hud tarkov_capture.mp4 --game tarkov
+        rife hud arc.mp4 -g arc --refresh
+    """
+    from src.core.hud import HudAnalyzer
+    
+    config = ctx.obj["config"]
+    analyzer = HudAnalyzer(**config.hud.model_dump())
+    mask = analyzer.for_game(game, video, refresh=refresh)
+    
+    tiles = mask.static_tiles()
+    y0, y1, x0, x1 = mask.box
+    table = Table(title=f"HUD Mask ({game})", box=box.ROUNDED, border_style="blue")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", style="white")
+    table.add_row("Mask", str(analyzer.cache_path(game, mask.width, mask.height)))
+    table.add_row("Static pixels", f"{mask.static_fraction:.1%}")
+    table.add_row("Static tiles", f"{int(tiles.sum())} / {tiles.size} ({mask.tile}px)")
+    table.add_row(
+        "Model region",
+        f"{x1 - x0}x{y1 - y0} at ({x0}, {y0}), {mask.model_fraction:.1%} of the frame"
+    )
+    console.print(table)
+
+@cli.command()
+@click.option("--verify", is_flag=True, help="Re-hash every cached model against its checksum")
+@click.pass_context
+def models(ctx, verify):
+    """📦 List cached model versions.
+    
+    Examples:
+        rife models
+        rife models --verify
+    """
+    from src.core.weights import model_pool
+    
+    store = model_pool().store
+    versions = store.versions()
+    if not versions:
+        console.print(f"\n[yellow]No models cached in {store.root}.[/] Run [cyan]rife setup[/].")
+        return
+    
+    table = Table(title=f"Models ({store.root})", box=box.ROUNDED, border_style="blue")
+    table.add_column("Version", style="cyan")
+    table.add_column("SHA-256", style="white")
+    table.add_column("Size", style="white")
+    table.add_column("Source", style="dim")
+    table.add_column("Code", style="dim")
+    if verify:
+        table.add_column("Check", style="white")
+    
+    failed = False
+    for version, entry in sorted(versions.items()):
+        row = [version, entry["sha256"][:12], f"{entry['size'] / 1e6:.1f} MB", entry["source"],
+               "stored" if store.code_dir(version) else "installed"]
+        if verify:
+            try:
+                ok = store.verify(version)
+            except RuntimeError:
+                ok = False
+            failed |= not ok
+            row.append("[green]✓[/]" if ok else "[red]✗[/]")
+        table.add_row(*row)
+    console.print(table)
+    
+    if failed:
+        sys.exit(1)
+
 @cli.command()
 @click.pass_context
 def info(ctx):
     """ℹ️  Show system information and GPU status."""
-    import torch
     import platform
     
+    import torch
+    
     console.print(f"\n[bold cyan]System Information[/]\n")
     
     table = Table(box=box.ROUNDED, border_style="blue")
@@ -0,0 +1,128 @@
+"""Motion-Adaptive Scale Selection"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# RIFE flow scales from finest (full-resolution flow) to coarsest
+SCALES = (1.0, 0.5, 0.25)
+
+
+def estimate_motion(frame0: np.ndarray, frame1: np.ndarray, width: int = 160) -> float:
+    """
+    Motion magnitude between two frames, in source pixels.
+
+    Dense Farneback flow on small grayscale copies (about a millisecond at
+    the default probe width), summarised by the 90th percentile so a
+    moving object counts even over a static background.
+    """
+    height, source_width = frame0.shape[:2]
+    factor = min(1.0, width / source_width)
+    size = (max(8, int(source_width * factor)), max(8, int(height * factor)))
+
+    def prepare(frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+    flow = cv2.calcOpticalFlowFarneback(
+        prepare(frame0), prepare(frame1), None,
+        pyr_scale=0.5, levels=3, winsize=9, iterations=2, poly_n=5, poly_sigma=1.1, flags=0
+    )
+    magnitude = np.sqrt((flow ** 2).sum(axis=2))
+    return float(np.percentile(magnitude, 90)) / factor
+
+
+class ScaleSelector:
+    """Pick the RIFE flow scale per segment from the motion in it.
+
+    RIFE estimates flow on frames resized by ``scale``: 1.0 resolves fine
+    detail but only follows moderate displacements and costs the most,
+    while 0.5 / 0.25 are cheaper and follow larger motion. For each
+    segment (one batch of frame pairs) the selector takes the largest
+    motion among its pairs and chooses the finest scale at which that
+    motion stays within ``reach`` flow pixels. Segments that barely move
+    (largest motion under ``still`` pixels) have no displacement for the
+    fine flow to resolve and run at the coarsest, cheapest scale instead;
+    ``still=0`` keeps the finest scale for them.
+
+    With ``target_fps`` the selector also steers throughput: after each
+    segment it compares the measured pairs per second with the target and
+    caps the finest allowed scale one step coarser (or relaxes the cap once
+    there is 25% headroom).
+    """
+
+    def __init__(
+        self,
+        scales: Sequence[float] = SCALES,
+        reach: float = 48.0,
+        still: float = 8.0,
+        target_fps: Optional[float] = None,
+        probe_width: int = 160
+    ):
+        self.scales = tuple(sorted(scales, reverse=True))
+        self.reach = reach
+        self.still = still
+        self.target_fps = target_fps
+        self.probe_width = probe_width
+        self._cap = 0                       # index of the finest scale allowed
+        self.segments: List[dict] = []
+        self._motion: List[float] = []
+
+    def scale_for(self, motion: float) -> float:
+        """Finest scale (within the throughput cap) that can follow ``motion`` pixels."""
+        if motion < self.still:
+            return self.scales[-1]
+        for scale in self.scales[self._cap:]:
+            if motion * scale <= self.reach:
+                return scale
+        return self.scales[-1]
+
+    def choose(
+        self, frames0: Sequence[np.ndarray], frames1: Sequence[np.ndarray]
+    ) -> Tuple[float, float]:
+        """Scale for a segment of pairs and the motion it was based on."""
+        motion = max(
+            estimate_motion(a, b, self.probe_width) for a, b in zip(frames0, frames1)
+        )
+        scale = self.scale_for(motion)
+        self._motion.append(motion)
+
+        last = self.segments[-1] if self.segments else None
+        start = last["start"] + last["pairs"] if last else 0
+        if last and last["scale"] == scale:
+            last["pairs"] += len(frames0)
+            last["motion"] = max(last["motion"], motion)
+        else:
+            self.segments.append(
+                {"start": start, "pairs": len(frames0), "scale": scale, "motion": motion}
+            )
+        return scale, motion
+
+    def update(self, pairs: int, elapsed: float):
+        """Feed back the time a segment took (only used with ``target_fps``)."""
+        if not self.target_fps or elapsed <= 0:
+            return
+        fps = pairs / elapsed
+        if fps < self.target_fps and self._cap < len(self.scales) - 1:
+            self._cap += 1
+        elif fps > 1.25 * self.target_fps and self._cap > 0:
+            self._cap -= 1
+
+    def summary(self) -> Dict:
+        """Pairs per scale, the segment list and motion statistics for the stats dict."""
+        pairs = {}
+        for segment in self.segments:
+            pairs[segment["scale"]] = pairs.get(segment["scale"], 0) + segment["pairs"]
+        motion = np.array(self._motion) if self._motion else np.zeros(1)
+        return {
+            "pairs_per_scale": {
+                f"{scale:g}": count for scale, count in sorted(pairs.items(), reverse=True)
+            },
+            "segments": self.segments,
+            "motion_mean": float(motion.mean()),
+            "motion_max": float(motion.max()),
+            "reach": self.reach,
+            "still": self.still,
+            "target_fps": self.target_fps,
+        }
@@ -0,0 +1,333 @@
+"""Multi-Clip Batch Runner"""
+
+import csv
+import json
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+from pydantic import BaseModel
+
+from src.core.encoder import VideoEncoder
+from src.core.engine import RIFEEngine
+from src.core.extractor import FrameExtractor
+from src.core.interpolator import RIFEInterpolator
+from src.core.metrics import MetricsCalculator
+from src.core.pipeline import Pipeline, Step, check_limits
+from src.core.weights import DEFAULT_VERSION, model_pool
+from src.utils.config import OutputConfig
+from src.utils.logger import log
+from src.utils.threads import ffmpeg_thread_args
+
+STAGES = ("extract", "downsample", "interpolate", "evaluate")
+
+# Interpolation saturates the CPU/GPU on its own; the FFmpeg stages overlap with it
+DEFAULT_LIMITS = {"extract": 2, "downsample": 2, "interpolate": 1, "evaluate": 2}
+
+
+class BatchClip(BaseModel):
+    """One clip of a batch manifest."""
+
+    game: str
+    source: str
+    name: Optional[str] = None
+    start: float = 0.0                      # seconds into the source
+    duration: Optional[float] = 10.0        # seconds (None = to the end)
+    multi: int = 2
+    scale: Optional[float] = None           # None: the runner's (config / profile) scale
+
+
+class BatchManifest(BaseModel):
+    """Clips to evaluate, with defaults applied to every clip."""
+
+    clips: List[BatchClip]
+    workers: Optional[int] = None
+    limits: Dict[str, int] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "BatchManifest":
+        with open(path) as f:
+            data = yaml.safe_load(f) or {}
+        defaults = data.pop("defaults", {}) or {}
+        data["clips"] = [{**defaults, **clip} for clip in data.get("clips", [])]
+        return cls(**data)
+
+
+class BatchRunner:
+    """Evaluate many clips across games on a bounded worker pool.
+
+    Each clip goes through extract (lossless ground truth from the
+    source), downsample (keep every ``multi``-th frame), interpolate and
+    evaluate (PSNR / SSIM against the ground truth). All steps of all
+    clips form one cached :class:`Pipeline`, so at most ``workers`` steps
+    run at once, each stage is capped by ``limits``, and an interrupted
+    run resumes where it stopped. The model (``version``, in ``cpu_mode``)
+    is loaded once and shared by all interpolation steps, whose cache
+    entries are keyed on the version and the checksum of its weights.
+
+    Layout under ``output_dir``::
+
+        <game>/<clip>/reference.mkv, input.mkv, interpolated.mp4, metrics.json
+        summary.json, summary.csv
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        encoder: Optional[VideoEncoder] = None,
+        workers: int = 4,
+        limits: Optional[Dict[str, int]] = None,
+        model=None,
+        batch_size: int = 1,
+        games: Optional[Dict[str, str]] = None,
+        sample_every: int = 1,
+        version: str = DEFAULT_VERSION,
+        scale: float = 1.0,
+        fp16: bool = False,
+        cpu_mode: str = "fp32",
+        backend: str = "torch",
+        scene_detection: bool = True
+    ):
+        self.output_dir = Path(output_dir)
+        self.encoder = encoder or VideoEncoder()
+        self.lossless = VideoEncoder(OutputConfig(codec="ffv1", audio=False))
+        self.workers = workers
+        self.limits = check_limits({**DEFAULT_LIMITS, **(limits or {})})
+        self.batch_size = batch_size
+        self.games = games or {}
+        self.sample_every = sample_every
+        self.version = version
+        self.scale = scale
+        self.fp16 = fp16
+        self.cpu_mode = cpu_mode
+        self.backend = backend
+        self.scene_detection = scene_detection
+        self._source = model                # None: load ``version`` on first use
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self):
+        """The shared model, wrapped for ``cpu_mode`` once."""
+        with self._model_lock:
+            if self._model is None:
+                self._model = RIFEEngine(
+                    model=self._source, fp16=self.fp16, version=self.version,
+                    cpu_mode=self.cpu_mode
+                ).load()
+            return self._model
+
+    def _engine(self):
+        """Engine for one interpolation step (steps may differ in scale)."""
+        if self.backend == "onnx":
+            from src.core.onnx_backend import OnnxEngine
+
+            return OnnxEngine(version=self.version, cache_dir=model_pool().store.root)
+        # The shared model is already wrapped for the CPU mode and is not wrapped again
+        return RIFEEngine(
+            model=self.model, fp16=self.fp16, version=self.version, cpu_mode=self.cpu_mode
+        )
+
+    def clip_scale(self, clip: BatchClip) -> float:
+        return self.scale if clip.scale is None else clip.scale
+
+    @staticmethod
+    def clip_names(clips: List[BatchClip]) -> List[str]:
+        """Unique directory name per clip."""
+        names, seen = [], {}
+        for clip in clips:
+            name = clip.name or f"{Path(clip.source).stem}_{clip.start:g}s"
+            seen[(clip.game, name)] = seen.get((clip.game, name), 0) + 1
+            if seen[(clip.game, name)] > 1:
+                name = f"{name}_{seen[(clip.game, name)]}"
+            names.append(name)
+        return names
+
+    def _extract(self, clip: BatchClip, output_path: Path):
+        cmd = ["ffmpeg", "-y", "-loglevel", "error", *ffmpeg_thread_args()]
+        if clip.start:
+            cmd += ["-ss", f"{clip.start}"]
+        cmd += ["-i", clip.source]
+        if clip.duration:
+            cmd += ["-t", f"{clip.duration}"]
+        cmd += ["-map", "0:v:0", *self.lossless.codec_args(output_path=str(output_path))]
+        cmd += ["-an", str(output_path)]
+
+        log.debug(f"Running: {' '.join(cmd)}")
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"FFmpeg failed: {result.stderr}")
+
+    def _interpolate(self, clip: BatchClip, input_path: Path, output_path: Path) -> dict:
+        interpolator = RIFEInterpolator(
+            engine=self._engine(),
+            batch_size=self.batch_size,
+            encoder=self.encoder,
+            scene_detection=self.scene_detection
+        )
+        return interpolator.process(
+            str(input_path), str(output_path), multi=clip.multi, scale=self.clip_scale(clip)
+        )
+
+    def _evaluate(
+        self, clip: BatchClip, interpolated: Path, reference: Path, output_path: Path
+    ) -> dict:
+        calc = MetricsCalculator(output_dir=str(output_path.parent), sample_every=self.sample_every)
+        result = calc.frame_metrics(str(interpolated), str(reference), multi=clip.multi)
+        with open(output_path, "w") as f:
+            json.dump(result, f, indent=2)
+        return result
+
+    def build_pipeline(self, clips: List[BatchClip]) -> Pipeline:
+        """One extract → downsample → interpolate → evaluate chain per clip."""
+        pipeline = Pipeline(
+            str(self.output_dir / "batch_cache.json"),
+            workers=self.workers,
+            limits=self.limits
+        )
+        model = {
+            "version": self.version,
+            "weights": model_pool().store.sha256(self.version),
+            "fp16": self.fp16,
+            "cpu_mode": self.cpu_mode,
+            "backend": self.backend,
+        }
+
+        for clip, name in zip(clips, self.clip_names(clips)):
+            work = self.output_dir / clip.game / name
+            work.mkdir(parents=True, exist_ok=True)
+            reference = work / "reference.mkv"
+            downsampled = work / "input.mkv"
+            interpolated = work / "interpolated.mp4"
+            metrics = work / "metrics.json"
+            prefix = f"{clip.game}/{name}"
+
+            pipeline.add(Step(
+                f"{prefix}/extract",
+                lambda upstream, c=clip, out=reference: self._extract(c, out),
+                inputs=[clip.source],
+                outputs=[str(reference)],
+                params={"start": clip.start, "duration": clip.duration,
+                        "codec": self.lossless.codec_args()},
+                stage="extract",
+            ))
+            pipeline.add(Step(
+                f"{prefix}/downsample",
+                lambda upstream, c=clip, src=reference, out=downsampled: FrameExtractor(
+                    encoder=self.lossless
+                ).downsample(str(src), str(out), skip=c.multi),
+                inputs=[str(reference)],
+                outputs=[str(downsampled)],
+                params={"skip": clip.multi, "codec": self.lossless.codec_args()},
+                stage="downsample",
+            ))
+            pipeline.add(Step(
+                f"{prefix}/interpolate",
+                lambda upstream, c=clip, src=downsampled, out=interpolated: self._interpolate(
+                    c, src, out
+                ),
+                inputs=[str(downsampled)],
+                outputs=[str(interpolated)],
+                params={"multi": clip.multi, "scale": self.clip_scale(clip), "model": model,
+                        "scene_detection": self.scene_detection,
+                        "codec": self.encoder.codec_args()},
+                stage="interpolate",
+            ))
+            pipeline.add(Step(
+                f"{prefix}/evaluate",
+                lambda upstream, c=clip, a=interpolated, b=reference, out=metrics: self._evaluate(
+                    c, a, b, out
+                ),
+                inputs=[str(interpolated), str(reference)],
+                outputs=[str(metrics)],
+                params={"multi": clip.multi, "sample_every": self.sample_every},
+                stage="evaluate",
+            ))
+
+        return pipeline
+
+    def run(self, clips: List[BatchClip], force: bool = False) -> dict:
+        """
+        Process every clip and aggregate the results per game.
+
+        Args:
+            clips: Clips to evaluate
+            force: Rerun every step even if cached
+
+        Returns:
+            dict with per-clip results and per-game aggregates
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        pipeline = self.build_pipeline(clips)
+
+        start = time.time()
+        pipeline.run(force=pipeline.steps if force else ())
+        elapsed = time.time() - start
+
+        rows = []
+        for clip, name in zip(clips, self.clip_names(clips)):
+            prefix = f"{clip.game}/{name}"
+            status = {stage: pipeline.status.get(f"{prefix}/{stage}") for stage in STAGES}
+            failed = next(
+                (stage for stage in STAGES if status[stage] not in ("ran", "cached")), None
+            )
+            error = pipeline.errors.get(f"{prefix}/{failed}") if failed else None
+            rows.append({
+                "game": clip.game,
+                "clip": name,
+                "source": clip.source,
+                "ok": failed is None,
+                "failed_stage": failed,
+                "error": str(error) if error else None,
+                "cached": all(s == "cached" for s in status.values()),
+                "interpolation": pipeline.results.get(f"{prefix}/interpolate"),
+                "metrics": pipeline.results.get(f"{prefix}/evaluate"),
+            })
+
+        summary = {"elapsed": elapsed, "clips": rows, "games": self.aggregate(rows)}
+        self._save(summary)
+        return summary
+
+    def aggregate(self, rows: List[dict]) -> Dict[str, dict]:
+        """Frame-weighted mean scores and mean interpolation speed per game."""
+        games = {}
+        for row in rows:
+            game = games.setdefault(row["game"], {
+                "name": self.games.get(row["game"], row["game"]),
+                "clips": 0, "failed": 0, "frames": 0,
+                "_psnr": 0.0, "_ssim": 0.0, "_fps": [],
+            })
+            game["clips"] += 1
+            if not row["ok"]:
+                game["failed"] += 1
+                continue
+
+            metrics = row["metrics"]
+            frames = metrics.get("synthesized_frames", metrics["frames"])
+            game["frames"] += frames
+            game["_psnr"] += metrics.get("psnr_synthesized", metrics["psnr"]) * frames
+            game["_ssim"] += metrics.get("ssim_synthesized", metrics["ssim"]) * frames
+            game["_fps"].append(row["interpolation"]["processing_fps"])
+
+        for game in games.values():
+            frames = game["frames"]
+            psnr, ssim, fps = game.pop("_psnr"), game.pop("_ssim"), game.pop("_fps")
+            game["psnr"] = psnr / frames if frames else None
+            game["ssim"] = ssim / frames if frames else None
+            game["processing_fps"] = sum(fps) / len(fps) if fps else None
+        return games
+
+    def _save(self, summary: dict):
+        with open(self.output_dir / "summary.json", "w") as f:
+            json.dump(summary, f, indent=2)
+
+        fields = ["game", "name", "clips", "failed", "frames", "psnr", "ssim", "processing_fps"]
+        with open(self.output_dir / "summary.csv", "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for game_id, game in summary["games"].items():
+                writer.writerow({"game": game_id, **game})
+        log.info(f"Batch summary saved to: {self.output_dir / 'summary.json'}")
@@ -7,12 +7,19 @@ import tempfile
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional, Sequence
 
 import cv2
+import numpy as np
 import torch
 
+from src.core.encoder import VideoEncoder
+from src.core.engine import RIFEEngine
+from src.core.realtime import RealtimeSimulator
 from src.utils.logger import log
+from src.utils.memory import PeakRSSSampler, TorchAllocationTracker
+from src.utils.profiling import span
+from src.utils.threads import ffmpeg_thread_args
 
 
 class Benchmarker:
@@ -25,9 +32,29 @@ class Benchmarker:
         "4k": (3840, 2160)
     }
     
-    def __init__(self, output_dir: str = "results/benchmarks"):
+    def __init__(
+        self,
+        output_dir: str = "results/benchmarks",
+        engine: Optional[RIFEEngine] = None,
+        max_frames: Optional[int] = None,
+        encoder: Optional[VideoEncoder] = None,
+        duration: float = 5.0,
+        warmup_frames: int = 0
+    ):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._engine = engine
+        self.max_frames = max_frames
+        self.duration = duration
+        self.warmup_frames = warmup_frames
+        # Resized inputs are scratch files: favour speed over size
+        self.encoder = (encoder or VideoEncoder()).with_options(preset="ultrafast")
+    
+    @property
+    def engine(self) -> RIFEEngine:
+        if self._engine is None:
+            self._engine = RIFEEngine()
+        return self._engine
     
     def get_gpu_info(self) -> dict:
         """Get GPU information."""
@@ -49,46 +76,130 @@ class Benchmarker:
         
         cmd = [
             "ffmpeg", "-y",
+            *ffmpeg_thread_args(),
             "-i", input_path,
             "-vf", f"scale={w}:{h}",
-            "-c:v", "libx264",
-            "-preset", "ultrafast",
-            "-crf", "23",
-            "-t", "5",  # Only first 5 seconds
+            *self.encoder.codec_args(output_path=output_path),
+            "-t", f"{self.duration}",  # Only the start of the clip
+            *ffmpeg_thread_args(),
             output_path
         ]
         
-        subprocess.run(cmd, capture_output=True, check=True)
+        with span("resize"):
+            subprocess.run(cmd, capture_output=True, check=True)
         return output_path
     
-    def benchmark_resolution(self, input_path: str, resolution: str) -> dict:
-        """Benchmark at a specific resolution."""
+    def iter_batches(self, input_path: str, batch_size: int) -> Iterator[tuple]:
+        """Decode a video into overlapping frame-pair batches."""
+        cap = cv2.VideoCapture(input_path)
+        ok, prev = cap.read()
+        read = 1 if ok else 0
+        # Warm-up pairs come on top of the measured frames
+        limit = None if self.max_frames is None else self.max_frames + self.warmup_frames
+        
+        while ok:
+            frames = [prev]
+            while len(frames) <= batch_size and (limit is None or read < limit):
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                frames.append(frame)
+                read += 1
+            if len(frames) < 2:
+                break
+            yield frames[:-1], frames[1:]
+            prev = frames[-1]
+        
+        cap.release()
+    
+    def benchmark_resolution(self, input_path: str, resolution: str, batch_size: int = 1) -> dict:
+        """Benchmark at a specific resolution and batch size."""
         cap = cv2.VideoCapture(input_path)
         fps = cap.get(cv2.CAP_PROP_FPS)
-        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         cap.release()
         
-        # Time a simulated benchmark (replace with actual RIFE call)
-        start = time.time()
+        engine = self.engine
+        engine.load()
         
-        # Placeholder - actual implementation would call RIFE
-        time.sleep(0.5)  # Simulate processing
+        if torch.cuda.is_available():
+            torch.cuda.reset_peak_memory_stats()
         
-        elapsed = time.time() - start
-        inference_fps = frames / max(elapsed, 0.01)
+        pairs = 0
+        warmup = 0
+        elapsed = 0.0
+        first_batch = None
         
-        return {
+        with PeakRSSSampler() as rss:
+            for frames0, frames1 in self.iter_batches(input_path, batch_size):
+                if first_batch is None:
+                    first_batch = (frames0, frames1)
+                start = time.time()
+                engine.interpolate_batch(frames0, frames1)
+                # Leave lazy init and allocator / cache warm-up out of the timing
+                if warmup < self.warmup_frames:
+                    warmup += len(frames0)
+                    continue
+                elapsed += time.time() - start
+                pairs += len(frames0)
+        
+        if first_batch is None:
+            raise RuntimeError(f"Could not decode frame pairs from {input_path}")
+        if pairs == 0:
+            raise RuntimeError(f"{input_path} has no frames left after {warmup} warm-up pairs")
+        
+        # Allocation tracking slows every op, so measure one batch separately
+        with TorchAllocationTracker() as allocations:
+            engine.interpolate_batch(*first_batch)
+        
+        inference_fps = pairs / max(elapsed, 0.01)
+        
+        result = {
             "resolution": resolution,
+            "batch_size": batch_size,
             "fps": inference_fps,
             "realtime_ratio": inference_fps / fps if fps > 0 else 0,
             "realtime": inference_fps >= fps,
-            "frames": frames,
-            "elapsed": elapsed
+            "frames": pairs,
+            "elapsed": elapsed,
+            "peak_rss_mb": rss.peak / 1e6,
+            "rss_growth_mb": (rss.peak - rss.baseline) / 1e6,
+            "torch_peak_mb": allocations.peak / 1e6,
+            "frame_buffer_mb": engine.buffer_bytes(height, width, batch_size) / 1e6,
         }
+        
+        if torch.cuda.is_available():
+            result["peak_vram_mb"] = torch.cuda.max_memory_allocated() / 1e6
+        
+        return result
+    
+    def simulate_realtime(
+        self,
+        input_path: str,
+        resolution: str,
+        fps: Optional[float] = None,
+        deadline_ms: Optional[float] = None
+    ) -> dict:
+        """Replay a clip at its frame rate against the wall clock."""
+        simulator = RealtimeSimulator(
+            self.engine, fps=fps, deadline_ms=deadline_ms, max_frames=self.max_frames
+        )
+        return {"resolution": resolution, **simulator.run(input_path)}
     
-    def run(self, input_path: str, resolutions: List[str]) -> dict:
+    def run(
+        self,
+        input_path: str,
+        resolutions: List[str],
+        batch_sizes: Optional[List[int]] = None,
+        simulate: bool = False,
+        fps: Optional[float] = None,
+        deadline_ms: Optional[float] = None
+    ) -> dict:
         """Run full benchmark suite."""
         gpu_info = self.get_gpu_info()
+        batch_sizes = batch_sizes or [1]
+        simulations = []
         
         log.info(f"GPU: {gpu_info['gpu']}")
         log.info(f"Testing resolutions: {', '.join(resolutions)}")
@@ -97,28 +208,144 @@ class Benchmarker:
         
         with tempfile.TemporaryDirectory() as tmpdir:
             for res in resolutions:
-                log.debug(f"Benchmarking {res}...")
-                
                 try:
                     # Resize to target resolution
-                    resized = os.path.join(tmpdir, f"input_{res}.mp4")
+                    resized = os.path.join(tmpdir, f"input_{res}.mkv")
                     self.resize_video(input_path, res, resized)
-                    
-                    # Run benchmark
-                    result = self.benchmark_resolution(resized, res)
-                    benchmarks.append(result)
-                    
-                    log.info(f"{res}: {result['fps']:.1f} FPS ({result['realtime_ratio']:.2f}x realtime)")
-                    
                 except Exception as e:
-                    log.warning(f"Failed to benchmark {res}: {e}")
+                    log.warning(f"Failed to prepare {res}: {e}")
+                    continue
+                
+                for batch_size in batch_sizes:
+                    log.debug(f"Benchmarking {res} (batch {batch_size})...")
+                    
+                    try:
+                        result = self.benchmark_resolution(resized, res, batch_size)
+                        benchmarks.append(result)
+                        
+                        log.info(
+                            f"{res} x{batch_size}: {result['fps']:.1f} FPS "
+                            f"({result['realtime_ratio']:.2f}x realtime), "
+                            f"peak RSS {result['peak_rss_mb']:.0f} MB"
+                        )
+                        
+                    except Exception as e:
+                        log.warning(f"Failed to benchmark {res} (batch {batch_size}): {e}")
+                
+                if simulate:
+                    try:
+                        sim = self.simulate_realtime(resized, res, fps, deadline_ms)
+                        simulations.append(sim)
+                        
+                        log.info(
+                            f"{res} live: {sim['missed_deadlines']} missed, "
+                            f"{sim['dropped']} dropped, "
+                            f"p99 latency {sim['latency_ms']['p99']:.1f} ms"
+                        )
+                        
+                    except Exception as e:
+                        log.warning(f"Failed to simulate {res}: {e}")
         
-        return {
+        results = {
             "timestamp": datetime.now().isoformat(),
             "gpu": gpu_info["gpu"],
             "vram": gpu_info["vram"],
             "benchmarks": benchmarks
         }
+        if simulate:
+            results["realtime"] = simulations
+        return results
+    
+    def compare_cpu_modes(
+        self,
+        input_path: str,
+        modes: Sequence[str],
+        batch_size: int = 1,
+        onnx: bool = False
+    ) -> dict:
+        """
+        Speed and accuracy of CPU execution modes against fp32 on the same frames.
+        
+        Every mode first runs a few untimed batches (compilation, int8
+        calibration, allocator warm-up), then the whole clip is timed and
+        each synthesized frame is compared with the fp32 result.
+        
+        Args:
+            input_path: Reference clip (``max_frames`` bounds the frames used)
+            modes: Modes from :data:`~src.core.cpu_modes.CPU_MODES`; fp32 always runs first
+            batch_size: Frame pairs per forward pass
+            onnx: Also run the ONNX Runtime backend (reported as mode ``onnx``)
+        """
+        from src.core.cpu_modes import bf16_supported
+        from src.core.weights import model_pool
+        
+        base = self.engine
+        if base.device.type != "cpu":
+            raise RuntimeError(f"CPU modes need a CPU engine, not {base.device}")
+        batches = list(self.iter_batches(input_path, batch_size))
+        if not batches:
+            raise RuntimeError(f"Could not decode frame pairs from {input_path}")
+        pairs = sum(len(frames0) for frames0, _ in batches)
+        warmup = batches[:4]
+        
+        reference = None
+        results = []
+        runs = ["fp32"] + [m for m in modes if m != "fp32"] + (["onnx"] if onnx else [])
+        for mode in runs:
+            try:
+                if mode == "onnx":
+                    from src.core.onnx_backend import OnnxEngine
+                    
+                    engine = OnnxEngine(
+                        version=base.version, scale=base.scale,
+                        cache_dir=model_pool().store.root, model=base.model
+                    )
+                else:
+                    engine = RIFEEngine(
+                        model=base.model, scale=base.scale, device="cpu", cpu_mode=mode
+                    )
+                for frames0, frames1 in warmup:
+                    engine.interpolate_batch(frames0, frames1)
+                outputs = []
+                start = time.time()
+                for frames0, frames1 in batches:
+                    synthesized = engine.interpolate_batch(frames0, frames1)
+                    outputs.extend(between[0] for between in synthesized)
+                elapsed = time.time() - start
+            except Exception as e:
+                if mode == "fp32":
+                    raise
+                log.warning(f"CPU mode {mode} failed: {e}")
+                results.append({"mode": mode, "error": str(e)})
+                continue
+            
+            if reference is None:
+                reference = outputs
+            errors = [
+                np.abs(out.astype(np.int16) - ref.astype(np.int16))
+                for out, ref in zip(outputs, reference)
+            ]
+            mse = float(np.mean([np.mean(err.astype(np.float32) ** 2) for err in errors]))
+            fps = pairs / max(elapsed, 1e-6)
+            results.append({
+                "mode": mode,
+                "fps": fps,
+                "speedup": fps / results[0]["fps"] if results else 1.0,
+                # Identical output is reported as 100 dB rather than infinity
+                "psnr_vs_fp32": min(100.0, 10 * np.log10(255 ** 2 / mse)) if mse > 0 else 100.0,
+                "max_diff": int(max(err.max() for err in errors)),
+            })
+            log.info(f"{mode}: {fps:.2f} pairs/s, {results[-1]['psnr_vs_fp32']:.1f} dB vs fp32")
+        
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "cpu": torch.backends.cpu.get_cpu_capability(),
+            "threads": torch.get_num_threads(),
+            "bf16_native": bf16_supported(),
+            "pairs": pairs,
+            "batch_size": batch_size,
+            "modes": results,
+        }
     
     def save_results(self, results: dict, output_path: str):
         """Save benchmark results to JSON."""
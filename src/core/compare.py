@@ -0,0 +1,289 @@
+"""Comparison Video Rendering"""
+
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+
+from src.core.encoder import VideoEncoder, encoded_frames
+from src.utils.logger import log
+from src.utils.profiling import span
+from src.utils.threads import ffmpeg_thread_args
+
+OUTPUTS = ("side_by_side", "blind", "diff", "slowmo")
+
+_FILENAMES = {
+    "side_by_side": "comparison_sidebyside.mp4",
+    "blind": "blind_test.mp4",
+    "diff": "comparison_diff.mp4",
+    "slowmo": "comparison_slowmo.mp4",
+}
+
+
+@lru_cache(maxsize=None)
+def has_filter(name: str) -> bool:
+    """Whether the installed FFmpeg was built with a filter."""
+    result = subprocess.run(["ffmpeg", "-hide_banner", "-filters"], capture_output=True, text=True)
+    return any(line.split()[1:2] == [name] for line in result.stdout.splitlines())
+
+
+class ComparisonRenderer:
+    """Render every comparison video for a reference/interpolated pair in one pass.
+
+    Both videos are decoded once and fanned out with ``split`` into one
+    filter branch per output:
+
+    - ``side_by_side``: reference | interpolated, labelled
+    - ``blind``: the two clips one after the other in random order as
+      "Clip A" / "Clip B", with the answer written to a text file
+    - ``diff``: absolute difference, amplified and false-coloured
+    - ``slowmo``: side-by-side crop of a region, slowed down
+
+    The blind test's two halves are encoded as separate outputs of the
+    same graph and joined by stream copy, so neither clip is buffered in
+    memory while the other plays.
+    """
+
+    def __init__(
+        self,
+        encoder: Optional[VideoEncoder] = None,
+        labels: Tuple[str, str] = ("Original 60fps", "RIFE Interpolated"),
+        diff_gain: float = 4.0,
+        slowmo_factor: int = 4,
+        crop: Optional[Tuple[int, int, int, int]] = None
+    ):
+        self.encoder = encoder or VideoEncoder()
+        self.labels = labels
+        self.diff_gain = diff_gain
+        self.slowmo_factor = slowmo_factor
+        self.crop = crop
+
+    @staticmethod
+    def _label(text: str, size: int, color: str) -> str:
+        if not has_filter("drawtext"):
+            return ""
+        text = text.replace("\\", "\\\\").replace("'", "\\'").replace(":", "\\:")
+        return (
+            f",drawtext=text='{text}':x=10:y=10:fontsize={size}:"
+            f"fontcolor={color}:box=1:boxcolor=black@0.5"
+        )
+
+    def _crop_region(self, width: int, height: int) -> Tuple[int, int, int, int]:
+        """``(w, h, x, y)`` of the slow-motion crop; the centre quarter by default."""
+        if self.crop:
+            return self.crop
+        w, h = width // 4 * 2, height // 4 * 2
+        return w, h, (width - w) // 2, (height - h) // 2
+
+    def build_graph(
+        self,
+        outputs: Sequence[str],
+        width: int,
+        height: int,
+        reference_first: bool = True
+    ) -> Tuple[str, List[Tuple[str, str]]]:
+        """
+        Filter graph for the requested outputs.
+
+        Returns:
+            ``(filter_complex, [(pad, kind), ...])`` with one output pad per
+            encoded stream; ``blind`` contributes two (``blind_a``, ``blind_b``)
+        """
+        branches = [kind for kind in outputs if kind != "blind"]
+        blind = ["blind_a", "blind_b"] if "blind" in outputs else []
+        for kind in branches:
+            if kind not in OUTPUTS:
+                raise ValueError(f"Unknown comparison output: {kind}")
+
+        # Every branch but the blind halves reads both videos; each half reads one
+        n = len(branches) + len(blind) // 2
+        ref_pads = [f"[r{i}]" for i in range(n)]
+        int_pads = [f"[i{i}]" for i in range(n)]
+        # Bring the interpolated video to the reference size so the branches line up
+        graph = [
+            f"[0:v]setpts=PTS-STARTPTS,split={n}{''.join(ref_pads)}",
+            f"[1:v]setpts=PTS-STARTPTS,scale={width}:{height},split={n}{''.join(int_pads)}",
+        ]
+        ref_label, int_label = self.labels
+        pads = []
+
+        for i, kind in enumerate(branches + blind):
+            out = f"[o{i}]"
+            if kind in ("blind_a", "blind_b"):
+                first_is_ref = (kind == "blind_a") == reference_first
+                source = ref_pads.pop() if first_is_ref else int_pads.pop()
+                letter = kind[-1].upper()
+                graph.append(f"{source}null{self._label(f'Clip {letter}', 72, 'yellow')}{out}")
+                pads.append((out, kind))
+                continue
+
+            ref, interp = ref_pads[i], int_pads[i]
+            if kind == "side_by_side":
+                graph.append(
+                    f"{ref}{interp}hstack=inputs=2:shortest=1"
+                    f"{self._label(ref_label, 48, 'white')}"
+                    f"{self._label(int_label, 48, 'white').replace('x=10', 'x=w/2+10')}{out}"
+                )
+            elif kind == "diff":
+                graph.append(
+                    f"{ref}{interp}blend=all_mode=difference:shortest=1,format=gray,"
+                    f"lut=y='min(val*{self.diff_gain}\\,255)',format=yuv444p,"
+                    f"pseudocolor=p=turbo{out}"
+                )
+            elif kind == "slowmo":
+                w, h, x, y = self._crop_region(width, height)
+                graph.append(f"{ref}crop={w}:{h}:{x}:{y}[rc{i}]")
+                graph.append(f"{interp}crop={w}:{h}:{x}:{y}[ic{i}]")
+                graph.append(
+                    f"[rc{i}][ic{i}]hstack=inputs=2:shortest=1,"
+                    f"setpts={self.slowmo_factor}*PTS{out}"
+                )
+            pads.append((out, kind))
+
+        return ";".join(graph), pads
+
+    def render(
+        self,
+        reference: str,
+        interpolated: str,
+        output_dir: str,
+        outputs: Sequence[str] = OUTPUTS,
+        seed: Optional[int] = None
+    ) -> Dict:
+        """
+        Render the comparison videos for one pair.
+
+        Args:
+            reference: Ground-truth video
+            interpolated: Interpolated video
+            output_dir: Directory for the comparison videos
+            outputs: Which of ``OUTPUTS`` to render
+            seed: Seed for the blind test ordering (random if None)
+
+        Returns:
+            dict with output paths, blind test answer and elapsed time
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        cap = cv2.VideoCapture(reference)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
+
+        reference_first = random.Random(seed).choice([True, False])
+        graph, pads = self.build_graph(outputs, width, height, reference_first)
+
+        tmpdir = Path(tempfile.mkdtemp(prefix="rife_compare_"))
+        paths = {
+            kind: Path(self.encoder.container_path(output_dir / _FILENAMES[kind]))
+            for kind in outputs
+        }
+        cmd = [
+            "ffmpeg", "-y",
+            "-v", "verbose",
+            "-nostats",
+            *ffmpeg_thread_args(),
+            "-i", reference,
+            "-i", interpolated,
+            "-filter_complex", graph,
+        ]
+        for pad, kind in pads:
+            rate = fps / self.slowmo_factor if kind == "slowmo" else fps
+            target = tmpdir / f"{kind}.nut" if kind.startswith("blind_") else paths[kind]
+            cmd += ["-map", pad, "-r", f"{rate}", *self.encoder.codec_args(), str(target)]
+
+        log.debug(f"Running: {' '.join(cmd)}")
+        start = time.time()
+        try:
+            with span("compare"):
+                result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(f"FFmpeg failed: {result.stderr}")
+            if "blind" in outputs:
+                counts = encoded_frames(result.stderr)
+                halves = [
+                    (tmpdir / f"{kind}.nut", counts.get(i, 0) / fps)
+                    for i, (_, kind) in enumerate(pads) if kind.startswith("blind_")
+                ]
+                self._concat(halves, paths["blind"])
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+        stats = {
+            "reference": reference,
+            "interpolated": interpolated,
+            "outputs": {kind: str(path) for kind, path in paths.items()},
+            "elapsed": time.time() - start,
+        }
+        if "blind" in outputs:
+            stats["answer"] = self._write_answer(output_dir, reference_first)
+        log.info(f"Rendered {len(paths)} comparison video(s) in {stats['elapsed']:.1f}s")
+        return stats
+
+    @staticmethod
+    def _concat(segments: List[Tuple[Path, float]], output_path: Path):
+        listing = segments[0][0].parent / "blind.txt"
+        # Explicit durations keep the joined timeline at the source frame rate
+        listing.write_text("".join(
+            f"file '{path.resolve()}'\nduration {duration:.9f}\n" for path, duration in segments
+        ))
+        cmd = [
+            "ffmpeg", "-y",
+            "-loglevel", "error",
+            "-f", "concat",
+            "-safe", "0",
+            "-i", str(listing),
+            "-c", "copy",
+            str(output_path)
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"FFmpeg concat failed: {result.stderr}")
+
+    def _write_answer(self, output_dir: Path, reference_first: bool) -> str:
+        ref_label, int_label = self.labels
+        first, second = (ref_label, int_label) if reference_first else (int_label, ref_label)
+        answer_path = output_dir / "blind_test_answer.txt"
+        with open(answer_path, "w") as f:
+            f.write(f"Clip A: {first}\n")
+            f.write(f"Clip B: {second}\n")
+            f.write("\nGuess which clip is the AI-interpolated one!\n")
+        return str(answer_path)
+
+    def render_many(
+        self,
+        pairs: Sequence[Tuple[str, str, str]],
+        outputs: Sequence[str] = OUTPUTS,
+        workers: int = 2,
+        seed: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Render comparisons for several clips concurrently.
+
+        Args:
+            pairs: ``(reference, interpolated, output_dir)`` per clip
+            outputs: Which of ``OUTPUTS`` to render
+            workers: Clips rendered at the same time
+            seed: Base seed for blind test ordering (offset per clip)
+
+        Returns:
+            Stats per clip, in input order
+        """
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [
+                pool.submit(
+                    self.render, reference, interpolated, output_dir, outputs,
+                    None if seed is None else seed + n
+                )
+                for n, (reference, interpolated, output_dir) in enumerate(pairs)
+            ]
+            return [future.result() for future in futures]
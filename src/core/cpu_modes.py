@@ -0,0 +1,140 @@
+"""CPU Execution Modes"""
+
+import copy
+from typing import Optional
+
+import torch
+import torch.nn as nn
+
+from src.utils.config import CPU_MODES
+from src.utils.logger import log
+
+
+def bf16_supported() -> bool:
+    """Whether oneDNN has native bf16 kernels on this CPU (AVX512-BF16 / AMX)."""
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+class _QuantizedConv(nn.Module):
+    """A Conv2d between quantize / dequantize stubs.
+
+    The stubs let the conv alone be swapped for an int8 kernel.
+    """
+
+    def __init__(self, conv: nn.Conv2d, qconfig):
+        super().__init__()
+        self.quant = torch.ao.quantization.QuantStub()
+        self.conv = conv
+        self.dequant = torch.ao.quantization.DeQuantStub()
+        self.qconfig = qconfig
+
+    def forward(self, x):
+        return self.dequant(self.conv(self.quant(x)))
+
+
+def _wrap_convs(module: nn.Module, qconfig) -> int:
+    count = 0
+    for name, child in module.named_children():
+        if type(child) is nn.Conv2d:
+            setattr(module, name, _QuantizedConv(child, qconfig))
+            count += 1
+        else:
+            count += _wrap_convs(child, qconfig)
+    return count
+
+
+class CpuModel:
+    """A Practical-RIFE style model run in one of the :data:`CPU_MODES`.
+
+    The network (``model.flownet``, or ``model`` itself if it is a module)
+    is copied, so the fp32 model can stay shared with other engines.
+
+    - ``channels_last``: NHWC weights and inputs, which oneDNN convolutions prefer
+    - ``bf16``: autocast to bfloat16; falls back to fp32 without native support
+    - ``compile``: ``torch.compile`` (Inductor) of the network
+    - ``int8-dynamic``: int8 weights, activations quantized per call from their range
+    - ``int8-static``: int8 weights and activations, with activation ranges
+      observed on the first ``calibration_batches`` calls (run in fp32)
+
+    The int8 modes quantize every ``Conv2d`` on its own: RIFE's other layers
+    (PReLU, transposed convs, warping) stay in fp32 between them.
+    """
+
+    def __init__(self, model, mode: str = "fp32", calibration_batches: int = 4):
+        if mode not in CPU_MODES:
+            raise ValueError(f"Unknown CPU mode: {mode} (choose from {', '.join(CPU_MODES)})")
+        if mode == "bf16" and not bf16_supported():
+            log.warning("No native bf16 support on this CPU; running fp32")
+            mode = "fp32"
+        self.mode = mode
+        self.calibration_batches = calibration_batches
+        self._calibrated = 0
+
+        self.model = copy.copy(model)
+        network = getattr(model, "flownet", model)
+        if mode != "fp32" and not isinstance(network, nn.Module):
+            raise TypeError(f"CPU mode {mode} needs a torch module, got {type(network).__name__}")
+        if mode != "fp32":
+            network = self._prepare(copy.deepcopy(network).eval())
+        self._set_network(network)
+
+    def _set_network(self, network):
+        if hasattr(self.model, "flownet"):
+            self.model.flownet = network
+        else:
+            self.model = network
+        self.network = network
+
+    def _prepare(self, network: nn.Module) -> nn.Module:
+        if self.mode == "channels_last":
+            return network.to(memory_format=torch.channels_last)
+        if self.mode == "compile":
+            return torch.compile(network)
+        if self.mode == "int8-dynamic":
+            from torch.ao.nn.quantized import dynamic as nnqd
+
+            return torch.ao.quantization.quantize_dynamic(
+                network,
+                {nn.Conv2d: torch.ao.quantization.default_dynamic_qconfig},
+                mapping={nn.Conv2d: nnqd.Conv2d}
+            )
+        if self.mode == "int8-static":
+            qconfig = torch.ao.quantization.get_default_qconfig(torch.backends.quantized.engine)
+            convs = _wrap_convs(network, qconfig)
+            log.debug(f"Calibrating {convs} convolutions for int8")
+            return torch.ao.quantization.prepare(network)
+        return network
+
+    @property
+    def calibrating(self) -> bool:
+        return self.mode == "int8-static" and self._calibrated < self.calibration_batches
+
+    def inference(self, img0, img1, timestep=0.5, scale=1.0):
+        if self.mode == "channels_last":
+            img0 = img0.contiguous(memory_format=torch.channels_last)
+            img1 = img1.contiguous(memory_format=torch.channels_last)
+        if self.mode == "bf16":
+            with torch.autocast("cpu", dtype=torch.bfloat16):
+                return self.model.inference(img0, img1, timestep, scale).float()
+        if self.calibrating:
+            out = self.model.inference(img0, img1, timestep, scale)
+            self._calibrated += 1
+            if not self.calibrating:
+                self._set_network(torch.ao.quantization.convert(self.network))
+                log.debug("int8 calibration done")
+            return out
+        return self.model.inference(img0, img1, timestep, scale)
+
+
+def apply_cpu_mode(model, mode: Optional[str], calibration_batches: int = 4):
+    """``model`` wrapped for ``mode``; unchanged for fp32 / ``None``.
+
+    A model that is already a :class:`CpuModel` (e.g. a server's wrapped
+    model shared with a per-job engine) is returned as is.
+    """
+    if not mode or mode == "fp32" or isinstance(model, CpuModel):
+        return model
+    return CpuModel(model, mode, calibration_batches)
@@ -0,0 +1,334 @@
+"""Video Encoder"""
+
+import queue
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.utils.config import OutputConfig
+from src.utils.logger import log
+from src.utils.threads import ffmpeg_thread_args
+
+# Codecs that are lossless by construction or have a lossless switch
+_LOSSLESS_ARGS = {
+    "ffv1": ["-level", "3", "-g", "1"],
+    "libx264": ["-qp", "0"],
+    "libx264rgb": ["-qp", "0"],
+    "libx265": ["-x265-params", "lossless=1"],
+}
+
+# Codecs only some containers can hold (MP4 has no FFV1 mapping)
+_CONTAINERS = {
+    "ffv1": (".mkv", ".nut", ".avi"),
+}
+
+_ENCODED = re.compile(r"Output stream #(\d+):\d+ \(video\): (\d+) frames encoded")
+
+
+def encoded_frames(stderr: str) -> Dict[int, int]:
+    """Frames encoded per output file index, from ``-v verbose`` FFmpeg stderr."""
+    return {int(index): int(frames) for index, frames in _ENCODED.findall(stderr)}
+
+
+class FrameWriter:
+    """Pipe raw BGR frames into a single FFmpeg process."""
+
+    def __init__(self, cmd: List[str]):
+        log.debug(f"Running: {' '.join(cmd)}")
+        self.output_path = cmd[-1]
+        self._process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+
+    def write(self, frame: np.ndarray):
+        self._process.stdin.write(frame.tobytes())
+
+    def close(self):
+        self._process.stdin.close()
+        stderr = self._process.stderr.read().decode(errors="replace")
+        self._process.wait()
+        if self._process.returncode != 0:
+            raise RuntimeError(f"FFmpeg encode failed: {stderr}")
+
+    def abort(self):
+        """Stop the encoder and delete the partial output."""
+        self._process.kill()
+        self._process.wait()
+        for stream in (self._process.stdin, self._process.stderr):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        Path(self.output_path).unlink(missing_ok=True)
+
+
+class SegmentedWriter:
+    """Encode consecutive GOP-aligned segments in parallel, then concatenate.
+
+    Each segment gets its own FFmpeg encoder fed from a bounded queue by a
+    feeder thread, so the caller moves on to the next segment while earlier
+    ones are still encoding. Up to ``workers`` segments are in flight; peak
+    buffering is ``workers * segment_frames`` frames. Segments start on a
+    keyframe and are joined with the concat demuxer without re-encoding.
+    """
+
+    def __init__(
+        self,
+        encoder: "VideoEncoder",
+        output_path: str,
+        width: int,
+        height: int,
+        fps: float,
+        audio_source: Optional[str] = None
+    ):
+        config = encoder.config
+        self.encoder = encoder
+        self.output_path = output_path
+        self.size = (width, height)
+        self.fps = fps
+        self.audio_source = audio_source
+        self.segment_frames = encoder.segment_frames()
+        self.workers = max(1, config.segment_workers)
+
+        self._tmpdir = Path(tempfile.mkdtemp(prefix="rife_segments_"))
+        self._segments: List[Path] = []
+        self._lengths: List[int] = []
+        self._inflight = deque()
+        self._queue = None
+        self._count = 0
+
+    def _feed(self, frames: queue.Queue, writer: FrameWriter, errors: list):
+        try:
+            while (frame := frames.get()) is not None:
+                writer.write(frame)
+        except Exception as e:
+            errors.append(e)
+            # Keep draining so the producer never blocks on a dead segment
+            while frames.get() is not None:
+                pass
+        try:
+            writer.close()
+        except Exception as e:
+            errors.append(e)
+
+    def _join_oldest(self):
+        thread, errors, _ = self._inflight.popleft()
+        thread.join()
+        if errors:
+            raise errors[0]
+
+    def _start_segment(self):
+        while len(self._inflight) >= self.workers:
+            self._join_oldest()
+
+        path = self._tmpdir / f"segment_{len(self._segments):05d}.nut"
+        self._segments.append(path)
+
+        writer = FrameWriter(self.encoder.raw_input_command(str(path), *self.size, self.fps))
+        self._queue = queue.Queue(maxsize=self.segment_frames)
+        errors = []
+        thread = threading.Thread(
+            target=self._feed, args=(self._queue, writer, errors), daemon=True
+        )
+        thread.start()
+        self._inflight.append((thread, errors, writer))
+        self._count = 0
+
+    def _finish_segment(self):
+        if self._queue is not None:
+            self._queue.put(None)
+            self._queue = None
+            self._lengths.append(self._count)
+
+    def write(self, frame: np.ndarray):
+        if self._queue is None or self._count == self.segment_frames:
+            self._finish_segment()
+            self._start_segment()
+        self._queue.put(frame)
+        self._count += 1
+
+    def close(self):
+        try:
+            self._finish_segment()
+            while self._inflight:
+                self._join_oldest()
+            self._concat()
+        finally:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+    def abort(self):
+        """Stop every segment encoder and delete the partial output."""
+        # Killed encoders make their feeders fail and drain, so nothing blocks
+        for _, _, writer in self._inflight:
+            writer.abort()
+        self._finish_segment()
+        while self._inflight:
+            thread, _, _ = self._inflight.popleft()
+            thread.join()
+        shutil.rmtree(self._tmpdir, ignore_errors=True)
+        Path(self.output_path).unlink(missing_ok=True)
+
+    def _concat(self):
+        listing = self._tmpdir / "segments.txt"
+        # Explicit durations keep the joined timeline exactly frames / fps
+        listing.write_text("".join(
+            f"file '{path.resolve()}'\nduration {frames / self.fps:.9f}\n"
+            for path, frames in zip(self._segments, self._lengths)
+        ))
+
+        cmd = [
+            "ffmpeg", "-y",
+            "-loglevel", "error",
+            "-f", "concat",
+            "-safe", "0",
+            "-i", str(listing),
+        ]
+        if self.audio_source:
+            cmd += ["-i", self.audio_source, "-map", "0:v", "-map", "1:a?"]
+            cmd += ["-c:a", "copy", "-shortest"]
+        cmd += ["-c:v", "copy", self.output_path]
+
+        log.debug(f"Concatenating {len(self._segments)} segments")
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"FFmpeg concat failed: {result.stderr}")
+
+
+class VideoEncoder:
+    """Encoding settings from the ``output`` config, shared by every FFmpeg call."""
+
+    def __init__(self, config: Optional[OutputConfig] = None):
+        self.config = config or OutputConfig()
+
+    def with_options(self, **overrides) -> "VideoEncoder":
+        """Copy of this encoder with some settings replaced."""
+        return VideoEncoder(self.config.model_copy(update=overrides))
+
+    @property
+    def lossless(self) -> bool:
+        return self.config.lossless or self.config.codec == "ffv1"
+
+    def check_container(self, output_path: str):
+        """Raise ValueError if ``output_path``'s container can't hold the codec."""
+        allowed = _CONTAINERS.get(self.config.codec)
+        suffix = Path(output_path).suffix.lower()
+        if allowed and suffix not in allowed:
+            raise ValueError(
+                f"Codec {self.config.codec} can't be written to {suffix or 'this'} files "
+                f"({output_path}); use {', '.join(allowed)}"
+            )
+
+    def container_path(self, output_path: str) -> str:
+        """``output_path`` with its extension swapped for one the codec supports."""
+        allowed = _CONTAINERS.get(self.config.codec)
+        path = Path(output_path)
+        if allowed and path.suffix.lower() not in allowed:
+            return str(path.with_suffix(allowed[0]))
+        return str(output_path)
+
+    def codec_args(self, rgb_input: bool = False, output_path: Optional[str] = None) -> List[str]:
+        """
+        ``-c:v`` and rate-control arguments for an output.
+
+        ``rgb_input`` marks raw BGR input: lossless H.264 / HEVC then
+        encode in RGB, since converting to YUV rounds the pixel values.
+        ``output_path``, if given, is checked against the codec's containers.
+        """
+        if output_path is not None:
+            self.check_container(output_path)
+        config = self.config
+        codec = config.codec
+        if self.lossless and rgb_input and codec == "libx264":
+            codec = "libx264rgb"
+        args = ["-c:v", codec]
+
+        if self.lossless:
+            if codec not in _LOSSLESS_ARGS:
+                raise ValueError(f"No lossless mode for codec: {codec}")
+            if codec != "ffv1":
+                args += ["-preset", config.preset]
+            args += _LOSSLESS_ARGS[codec]
+            if codec == "libx264rgb":
+                args += ["-pix_fmt", "bgr24"]
+            elif codec == "libx265" and rgb_input:
+                args += ["-pix_fmt", "gbrp"]
+            elif codec in ("libx264", "libx265"):
+                # 4:2:0 subsampling would throw away chroma
+                args += ["-pix_fmt", "yuv444p"]
+            return args
+
+        args += ["-preset", config.preset, "-crf", str(config.crf)]
+        if config.gop:
+            args += ["-g", str(config.gop)]
+        if config.pix_fmt:
+            args += ["-pix_fmt", config.pix_fmt]
+        return args
+
+    def segment_frames(self) -> int:
+        """Segment length rounded up to whole GOPs (0 when segmenting is off)."""
+        frames = self.config.segment_frames
+        gop = self.config.gop
+        if frames and gop:
+            frames = -(-frames // gop) * gop
+        return frames
+
+    def raw_input_command(
+        self,
+        output_path: str,
+        width: int,
+        height: int,
+        fps: float,
+        audio_source: Optional[str] = None
+    ) -> List[str]:
+        """FFmpeg command encoding raw BGR frames read from stdin."""
+        cmd = [
+            "ffmpeg", "-y",
+            "-loglevel", "error",
+            "-f", "rawvideo",
+            "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}",
+            "-r", f"{fps}",
+            "-i", "-",
+        ]
+        if audio_source:
+            cmd += ["-i", audio_source, "-map", "0:v", "-map", "1:a?", "-c:a", "copy", "-shortest"]
+        args = self.codec_args(rgb_input=True, output_path=output_path)
+        return cmd + args + ffmpeg_thread_args() + [output_path]
+
+    def open_writer(
+        self,
+        output_path: str,
+        width: int,
+        height: int,
+        fps: float,
+        audio_source: Optional[str] = None
+    ):
+        """
+        Start encoding raw frames to a file.
+
+        Args:
+            output_path: Destination video
+            width: Frame width
+            height: Frame height
+            fps: Output frame rate
+            audio_source: Video whose audio track is copied (if ``output.audio``)
+
+        Returns:
+            Writer with ``write(frame)``, ``close()`` to finish the file and
+            ``abort()`` to discard it after an error
+        """
+        audio_source = audio_source if self.config.audio else None
+        self.check_container(output_path)
+        if self.segment_frames() and self.config.segment_workers > 1:
+            return SegmentedWriter(self, output_path, width, height, fps, audio_source)
+        return FrameWriter(self.raw_input_command(output_path, width, height, fps, audio_source))
@@ -0,0 +1,318 @@
+"""In-process RIFE Inference Engine"""
+
+import hashlib
+import importlib
+import sys
+import threading
+import types
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+from torch.nn import functional
+
+from src.utils.logger import log
+from src.utils.profiling import span
+
+
+class RIFEEngine:
+    """Run the Practical-RIFE flownet in-process on decoded frames.
+
+    Frames are BGR ``uint8`` arrays as returned by OpenCV. Any object with a
+    Practical-RIFE style ``inference(img0, img1, timestep, scale)`` method can
+    be passed as ``model``; otherwise the flownet for ``version`` is taken
+    from the shared :func:`~src.core.weights.model_pool` on first use,
+    falling back to weights installed in ``Practical-RIFE/train_log``.
+
+    On CPU, ``cpu_mode`` selects one of :data:`~src.core.cpu_modes.CPU_MODES`
+    (int8 quantization, ``torch.compile``, channels_last, bf16) applied to
+    a private copy of the model.
+    """
+
+    RIFE_PATH = Path("Practical-RIFE")
+
+    def __init__(
+        self,
+        model=None,
+        scale: float = 1.0,
+        fp16: bool = False,
+        device: Optional[str] = None,
+        version: Optional[str] = None,
+        cpu_mode: str = "fp32"
+    ):
+        self.scale = scale
+        self.version = version
+        self.device = torch.device(device or ("cuda" if torch.cuda.is_available() else "cpu"))
+        # Half precision only pays off (and is only well supported) on GPU
+        self.fp16 = fp16 and self.device.type == "cuda"
+        if cpu_mode != "fp32" and self.device.type != "cpu":
+            log.warning(f"CPU mode {cpu_mode} ignored on {self.device}")
+            cpu_mode = "fp32"
+        self.cpu_mode = cpu_mode
+        # Cleared if the model turns out to need a scalar timestep
+        self.batch_timesteps = True
+        self._model = self._optimize(model) if model is not None else None
+        self._weights = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self._optimize(self._load_model())
+        return self._model
+
+    @property
+    def weights(self) -> str:
+        """sha256 of the weights for ``version`` (its name if they are not known).
+
+        Frame-cache keys use it, so weights re-added under the same version
+        never reuse frames synthesized with the old ones.
+        """
+        if self._weights is None:
+            from src.core.weights import DEFAULT_VERSION, model_pool
+
+            version = self.version or DEFAULT_VERSION
+            self._weights = model_pool().store.loaded_sha256(version) or version
+        return self._weights
+
+    def _optimize(self, model):
+        from src.core.cpu_modes import apply_cpu_mode
+
+        return apply_cpu_mode(model, self.cpu_mode)
+
+    def _load_model(self):
+        """Import and load the Practical-RIFE flownet."""
+        from src.core.weights import DEFAULT_VERSION, model_pool
+
+        pool = model_pool()
+        version = self.version or DEFAULT_VERSION
+        if version in pool.store:
+            return pool.get(version)
+
+        model_dir = self.RIFE_PATH / "train_log"
+        if not (model_dir / "flownet.pkl").exists():
+            raise RuntimeError(
+                f"Model weights for {version} not found. Run: rife setup --model {version}"
+            )
+
+        if str(self.RIFE_PATH) not in sys.path:
+            sys.path.insert(0, str(self.RIFE_PATH))
+        from train_log.RIFE_HDv3 import Model
+
+        log.debug(f"Loading flownet from {model_dir}")
+        model = Model()
+        model.load_model(str(model_dir), -1)
+        model.eval()
+        model.device()
+        return model
+
+    @classmethod
+    def build_model(cls, state_dict: dict, code_dir: Optional[Path] = None):
+        """Practical-RIFE flownet with ``state_dict`` loaded into it.
+
+        The model class comes from ``code_dir`` (a version's stored copy of
+        its ``train_log`` code) when given, else from the code installed in
+        ``Practical-RIFE/train_log``. The weights must fit that code exactly;
+        e.g. ``4.25.lite`` weights against the full 4.25 model raise
+        RuntimeError instead of running a half-initialized network.
+        """
+        if code_dir is not None:
+            model_class = _import_model_class(Path(code_dir))
+        else:
+            if str(cls.RIFE_PATH) not in sys.path:
+                sys.path.insert(0, str(cls.RIFE_PATH))
+            from train_log import RIFE_HDv3
+            model_class = RIFE_HDv3.Model
+            code_dir = cls.RIFE_PATH / "train_log"
+
+        model = model_class()
+        # Checkpoints are saved from DataParallel; drop its "module." prefix
+        weights = {key[len("module."):] if key.startswith("module.") else key: value
+                   for key, value in state_dict.items()}
+        try:
+            # assign=True keeps the memory-mapped tensors instead of copying them
+            model.flownet.load_state_dict(weights, strict=True, assign=True)
+        except RuntimeError as e:
+            raise RuntimeError(
+                f"Weights do not match the flownet code in {code_dir}; "
+                f"store this version's model code with `rife setup --code`. {e}"
+            ) from e
+        model.eval()
+        model.device()
+        return model
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self):
+        """Load the model eagerly (e.g. before timing a run)."""
+        return self.model
+
+    def padded_size(self, height: int, width: int) -> Tuple[int, int]:
+        """Size the flownet needs: both sides rounded up to its alignment."""
+        align = max(128, int(128 / self.scale))
+        return ((height - 1) // align + 1) * align, ((width - 1) // align + 1) * align
+
+    def to_tensor(self, frames: Sequence[np.ndarray]) -> torch.Tensor:
+        """Stack BGR frames into a padded ``(N, 3, H, W)`` float tensor."""
+        height, width = frames[0].shape[:2]
+        ph, pw = self.padded_size(height, width)
+
+        batch = torch.from_numpy(np.stack(frames)).to(self.device, non_blocking=True)
+        batch = batch.permute(0, 3, 1, 2).float().div_(255.0)
+        batch = functional.pad(batch, (0, pw - width, 0, ph - height))
+        return batch.half() if self.fp16 else batch
+
+    def to_frames(self, tensor: torch.Tensor, height: int, width: int) -> List[np.ndarray]:
+        """Crop padding and convert an ``(N, 3, H, W)`` tensor back to BGR frames."""
+        out = (tensor[:, :, :height, :width].float() * 255.0).round_().clamp_(0, 255)
+        out = out.byte().permute(0, 2, 3, 1).contiguous().cpu().numpy()
+        return list(out)
+
+    def buffer_bytes(self, height: int, width: int, batch_size: int = 1, multi: int = 2) -> int:
+        """Bytes held by frame buffers for one batch of ``batch_size`` pairs."""
+        ph, pw = self.padded_size(height, width)
+        decoded = (batch_size + 1) * height * width * 3
+        element = 2 if self.fp16 else 4
+        slots = batch_size * (multi - 1)
+        # img0 / img1 stacks, their per-timestep copies and the synthesized output
+        planes = 2 * batch_size + (2 * slots if multi > 2 else 0) + slots
+        return decoded + planes * 3 * ph * pw * element
+
+    @torch.inference_mode()
+    def interpolate_batch(
+        self,
+        frames0: Sequence[np.ndarray],
+        frames1: Sequence[np.ndarray],
+        multi: int = 2
+    ) -> List[List[np.ndarray]]:
+        """
+        Synthesize the ``multi - 1`` intermediate frames for each pair.
+
+        All timesteps of all pairs go through the model in one forward
+        pass (see :meth:`interpolate_at`).
+
+        Args:
+            frames0: First frame of each pair
+            frames1: Second frame of each pair
+            multi: Frame multiplication factor
+
+        Returns:
+            One list of intermediate frames per pair, in temporal order
+        """
+        steps = [i / multi for i in range(1, multi)]
+        return self.interpolate_at(frames0, frames1, [steps] * len(frames0))
+
+    @torch.inference_mode()
+    def interpolate_at(
+        self,
+        frames0: Sequence[np.ndarray],
+        frames1: Sequence[np.ndarray],
+        timesteps: Sequence[Sequence[float]]
+    ) -> List[List[np.ndarray]]:
+        """
+        Synthesize frames at arbitrary timesteps, which may differ per pair.
+
+        The frames are converted and padded once. Every ``(pair, timestep)``
+        then goes through the model in a single forward pass, with the
+        timesteps as an ``(N, 1, 1, 1)`` tensor (Practical-RIFE 4.x
+        broadcasts it over the frame). Models that only take a scalar
+        timestep fall back to one pass per distinct timestep.
+
+        Args:
+            frames0: First frame of each pair
+            frames1: Second frame of each pair
+            timesteps: For each pair, the fractions (0-1) to synthesize at
+
+        Returns:
+            One list of frames per pair, in the order of its timesteps
+        """
+        height, width = frames0[0].shape[:2]
+        with span("preprocess"):
+            img0 = self.to_tensor(frames0)
+            img1 = self.to_tensor(frames1)
+
+        slots = [(pair, t) for pair, steps in enumerate(timesteps) for t in steps]
+        with span("model"):
+            merged = self._forward(img0, img1, slots)
+        with span("postprocess"):
+            frames = iter(self.to_frames(merged, height, width))
+        return [[next(frames) for _ in steps] for steps in timesteps]
+
+    def _forward(
+        self, img0: torch.Tensor, img1: torch.Tensor, slots: List[Tuple[int, float]]
+    ) -> torch.Tensor:
+        """Model output for each ``(pair, t)`` slot, in slot order."""
+        steps = sorted({t for _, t in slots})
+        if len(steps) == 1:
+            # A scalar timestep works with every Practical-RIFE version
+            return self._run(img0, img1, [pair for pair, _ in slots], steps[0])
+        if self.batch_timesteps:
+            timestep = torch.tensor([t for _, t in slots], dtype=img0.dtype, device=img0.device)
+            try:
+                pairs = [pair for pair, _ in slots]
+                return self._run(img0, img1, pairs, timestep.view(-1, 1, 1, 1))
+            except (TypeError, RuntimeError) as e:
+                log.warning(f"Model rejected batched timesteps, running one pass per timestep: {e}")
+                self.batch_timesteps = False
+
+        merged = None
+        for t in steps:
+            index = [n for n, (_, s) in enumerate(slots) if s == t]
+            out = self._run(img0, img1, [slots[n][0] for n in index], t)
+            if merged is None:
+                merged = out.new_empty((len(slots),) + out.shape[1:])
+            merged[index] = out
+        return merged
+
+    def _run(
+        self, img0: torch.Tensor, img1: torch.Tensor, pairs: List[int], timestep
+    ) -> torch.Tensor:
+        if pairs != list(range(len(img0))):
+            index = torch.tensor(pairs, device=img0.device)
+            img0, img1 = img0[index], img1[index]
+        return self.model.inference(img0, img1, timestep, self.scale)
+
+    def interpolate(
+        self, frame0: np.ndarray, frame1: np.ndarray, multi: int = 2
+    ) -> List[np.ndarray]:
+        """Synthesize the intermediate frames between two frames."""
+        return self.interpolate_batch([frame0], [frame1], multi)[0]
+
+
+_import_lock = threading.Lock()
+
+
+def _import_model_class(code_dir: Path):
+    """``Model`` from the ``RIFE_HDv3.py`` in ``code_dir``.
+
+    Each directory is imported as its own package, so several versions'
+    flownet code can be loaded side by side. Practical-RIFE's modules
+    import each other as ``train_log.*``; that name points at ``code_dir``
+    while it is imported.
+    """
+    digest = hashlib.sha1()
+    for source in sorted(code_dir.glob("*.py")):
+        digest.update(source.name.encode() + source.read_bytes())
+    # Named by content: code stored again for a version is imported afresh
+    name = f"_rife_flownet_{digest.hexdigest()[:12]}"
+    with _import_lock:
+        if f"{name}.RIFE_HDv3" not in sys.modules:
+            package = types.ModuleType(name)
+            package.__path__ = [str(code_dir)]
+            sys.modules[name] = package
+            # The model code also imports Practical-RIFE's own `model` package
+            if str(RIFEEngine.RIFE_PATH) not in sys.path:
+                sys.path.insert(0, str(RIFEEngine.RIFE_PATH))
+            installed = {key: sys.modules.pop(key) for key in list(sys.modules)
+                         if key == "train_log" or key.startswith("train_log.")}
+            sys.modules["train_log"] = package
+            try:
+                importlib.import_module(f"{name}.RIFE_HDv3")
+            finally:
+                for key in [key for key in sys.modules
+                            if key == "train_log" or key.startswith("train_log.")]:
+                    del sys.modules[key]
+                sys.modules.update(installed)
+        return sys.modules[f"{name}.RIFE_HDv3"].Model
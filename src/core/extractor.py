@@ -1,16 +1,28 @@
 """Frame Extraction Utilities"""
 
+import re
 import subprocess
 from pathlib import Path
+from typing import Dict, Optional, Sequence
 
 import cv2
 
+from src.core.encoder import VideoEncoder, encoded_frames
 from src.utils.logger import log
+from src.utils.profiling import span
+from src.utils.threads import ffmpeg_thread_args
+
+_DECODED = re.compile(
+    r"Input stream #0:\d+ \(video\): \d+ packets read \(\d+ bytes\); (\d+) frames decoded"
+)
 
 
 class FrameExtractor:
     """Extract and manipulate video frames."""
     
+    def __init__(self, encoder: Optional[VideoEncoder] = None):
+        self.encoder = encoder or VideoEncoder()
+    
     def downsample(self, input_path: str, output_path: str, skip: int = 2) -> dict:
         """
         Create downsampled video by keeping every Nth frame.
@@ -23,41 +35,120 @@ class FrameExtractor:
         Returns:
             dict with statistics
         """
-        # Get input info
+        return self._run_graph(input_path, {skip: output_path})[skip]
+    
+    def downsample_many(
+        self,
+        input_path: str,
+        output_template: str,
+        skips: Sequence[int] = (2, 3, 4)
+    ) -> Dict[int, dict]:
+        """
+        Create several downsampled videos from a single decode.
+        
+        The source is decoded once and fanned out with an FFmpeg ``split``
+        filter into one ``select`` branch per skip factor; all outputs are
+        encoded in the same process. Frame counts come from FFmpeg's own
+        per-stream totals rather than reopening the files; if FFmpeg doesn't
+        report them, they are derived from the container's frame count and
+        ``frames_estimated`` is set.
+        
+        Args:
+            input_path: Source video
+            output_template: Output path with ``{skip}`` and/or ``{fps}``
+                placeholders, e.g. ``"clip_{fps}fps.mp4"``
+            skips: Skip factors to produce
+        
+        Returns:
+            dict of statistics per skip factor
+        """
+        input_fps = self._fps(input_path)
+        outputs = {
+            skip: output_template.format(skip=skip, fps=round(input_fps / skip))
+            for skip in skips
+        }
+        if len(set(outputs.values())) != len(outputs):
+            raise ValueError(
+                f"Output template {output_template!r} must contain {{skip}} or {{fps}}"
+            )
+        
+        return self._run_graph(input_path, outputs)
+    
+    @staticmethod
+    def _fps(path: str) -> float:
+        cap = cv2.VideoCapture(path)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        cap.release()
+        return fps
+    
+    def _run_graph(self, input_path: str, outputs: Dict[int, str]) -> Dict[int, dict]:
+        """Decode once, ``split`` into one ``select`` branch per skip factor."""
         cap = cv2.VideoCapture(input_path)
         input_fps = cap.get(cv2.CAP_PROP_FPS)
-        input_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        probed_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         cap.release()
         
-        # Use FFmpeg select filter
+        skips = list(outputs)
+        branches = "".join(f"[s{i}]" for i in range(len(skips)))
+        graph = [f"[0:v]split={len(skips)}{branches}"]
+        for i, skip in enumerate(skips):
+            graph.append(
+                f"[s{i}]select='not(mod(n\\,{skip}))',setpts=N/({input_fps}/{skip})/TB[o{i}]"
+            )
+        
         cmd = [
             "ffmpeg", "-y",
+            "-v", "verbose",
+            "-nostats",
+            *ffmpeg_thread_args(),
             "-i", input_path,
-            "-vf", f"select='not(mod(n,{skip}))',setpts=N/FRAME_RATE/TB",
-            "-c:v", "libx264",
-            "-preset", "medium",
-            "-crf", "18",
-            "-an",
-            output_path
+            "-filter_complex", ";".join(graph),
         ]
+        for i, skip in enumerate(skips):
+            cmd += [
+                "-map", f"[o{i}]",
+                "-r", f"{input_fps / skip}",
+                *self.encoder.codec_args(output_path=outputs[skip]),
+                "-an",
+                *ffmpeg_thread_args(),
+                outputs[skip]
+            ]
         
         log.debug(f"Running: {' '.join(cmd)}")
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        with span("downsample"):
+            result = subprocess.run(cmd, capture_output=True, text=True)
         
         if result.returncode != 0:
             raise RuntimeError(f"FFmpeg failed: {result.stderr}")
         
-        # Get output info
-        cap = cv2.VideoCapture(output_path)
-        output_fps = cap.get(cv2.CAP_PROP_FPS)
-        output_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        cap.release()
+        input_frames = self._decoded_frames(result.stderr)
+        encoded = encoded_frames(result.stderr)
+        # Counts FFmpeg didn't report are derived instead, and marked as such
+        estimated = input_frames is None or any(i not in encoded for i in range(len(skips)))
+        if estimated:
+            log.warning(
+                "FFmpeg did not report per-stream frame counts; "
+                "frame counts are estimated from the container"
+            )
+        if input_frames is None:
+            input_frames = probed_frames
         
         return {
-            "input_fps": input_fps,
-            "output_fps": output_fps,
-            "input_frames": input_frames,
-            "output_frames": output_frames,
-            "skip": skip
+            skip: {
+                "input_fps": input_fps,
+                "output_fps": input_fps / skip,
+                "input_frames": input_frames,
+                "output_frames": encoded.get(i, -(-input_frames // skip)),
+                "frames_estimated": estimated,
+                "skip": skip,
+                "output_path": outputs[skip]
+            }
+            for i, skip in enumerate(skips)
         }
+    
+    @staticmethod
+    def _decoded_frames(stderr: str) -> Optional[int]:
+        """Frames decoded from the source video stream."""
+        match = _DECODED.search(stderr)
+        return int(match.group(1)) if match else None
@@ -0,0 +1,122 @@
+"""On-Disk Cache of Synthesized Frames"""
+
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+from src.utils import telemetry
+from src.utils.logger import log
+
+
+class FrameCache:
+    """Synthesized frames stored on disk by the content of their inputs.
+
+    A frame is addressed by a BLAKE2 hash of both source frames (pixels
+    and shape), the timestep and a settings string describing everything
+    else that affects the model output (model version, flow scale,
+    precision, HUD mask). Re-running the same input with a different
+    encoder, container or frame range therefore finds the frames it
+    already synthesized, whatever their position in the file.
+
+    Frames are stored losslessly as fast-compressed PNGs under
+    ``root/<xx>/<hash>.png``. When the cache grows past ``max_bytes`` the
+    least recently used files are deleted until it is 10% under the limit.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 10 << 30, compression: int = 1):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._sizes: Dict[Path, int] = {}
+        self._atimes: Dict[Path, float] = {}
+        if self.root.exists():
+            for path in self.root.glob("*/*.png"):
+                stat = path.stat()
+                self._sizes[path] = stat.st_size
+                self._atimes[path] = stat.st_mtime
+        self.bytes = sum(self._sizes.values())
+
+    @staticmethod
+    def pair_key(frame0: np.ndarray, frame1: np.ndarray, settings: str) -> str:
+        """Hash of a frame pair and the settings used to interpolate it."""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{frame0.shape}|{settings}".encode())
+        digest.update(np.ascontiguousarray(frame0).data)
+        digest.update(np.ascontiguousarray(frame1).data)
+        return digest.hexdigest()
+
+    def _path(self, key: str, t: float) -> Path:
+        name = hashlib.blake2b(f"{key}|{t:.6f}".encode(), digest_size=20).hexdigest()
+        return self.root / name[:2] / f"{name}.png"
+
+    def get(self, key: str, t: float) -> Optional[np.ndarray]:
+        path = self._path(key, t)
+        frame = cv2.imread(str(path), cv2.IMREAD_UNCHANGED) if path in self._sizes else None
+        if frame is None:
+            self.misses += 1
+            telemetry.count("frame_cache", result="miss")
+            return None
+        self.hits += 1
+        telemetry.count("frame_cache", result="hit")
+        with self._lock:
+            self._atimes[path] = _now(path)
+        return frame
+
+    def put(self, key: str, t: float, frame: np.ndarray):
+        path = self._path(key, t)
+        ok, data = cv2.imencode(".png", frame, [cv2.IMWRITE_PNG_COMPRESSION, self.compression])
+        if not ok:
+            log.warning(f"Could not encode frame for cache entry {path.name}")
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        data.tofile(str(tmp))
+        os.replace(tmp, path)
+
+        with self._lock:
+            self.bytes += data.nbytes - self._sizes.get(path, 0)
+            self._sizes[path] = data.nbytes
+            self._atimes[path] = _now(path)
+            if self.bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+
+    def _evict(self, target: int):
+        evicted = 0
+        for path in sorted(self._atimes, key=self._atimes.get):
+            if self.bytes <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            self.bytes -= self._sizes.pop(path)
+            del self._atimes[path]
+            evicted += 1
+        log.debug(f"Frame cache: evicted {evicted} frames, {self.bytes / 1e6:.0f} MB left")
+        telemetry.count("frame_cache_evictions", evicted)
+
+    def summary(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._sizes),
+            "bytes": self.bytes,
+        }
+
+
+def _now(path: Path) -> float:
+    """Mark ``path`` as just used (its mtime is the recency after a restart)."""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+    return time.time()
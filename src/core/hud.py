@@ -0,0 +1,188 @@
+"""Static HUD Detection and Compositing"""
+
+import hashlib
+import re
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from src.utils.logger import log
+
+
+class HudMask:
+    """Pixels that stay fixed on screen (HUD, overlays, letterboxing).
+
+    ``static`` is a boolean ``(H, W)`` array. The frame is split into
+    ``tile`` x ``tile`` tiles; :attr:`box` is the bounding box of the tiles
+    that contain any moving pixel, which is all the model needs to see.
+    Everything outside it, and every static pixel inside it, is copied from
+    the source frames.
+    """
+
+    def __init__(self, static: np.ndarray, tile: int = 64):
+        self.static = static.astype(bool)
+        self.tile = tile
+        self.height, self.width = self.static.shape
+        self.box = self._active_box()
+        self._static3 = self.static[..., None]
+
+    @property
+    def digest(self) -> str:
+        """Short hash identifying the mask, e.g. for cache keys."""
+        data = np.packbits(self.static).tobytes() + f"{self.static.shape}|{self.tile}".encode()
+        return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+    @property
+    def static_fraction(self) -> float:
+        return float(self.static.mean())
+
+    @property
+    def model_fraction(self) -> float:
+        """Share of the frame area that still goes through the model."""
+        y0, y1, x0, x1 = self.box
+        return (y1 - y0) * (x1 - x0) / (self.height * self.width)
+
+    def static_tiles(self) -> np.ndarray:
+        """``(rows, cols)`` grid, true where a tile is entirely static."""
+        rows = -(-self.height // self.tile)
+        cols = -(-self.width // self.tile)
+        grid = np.ones((rows, cols), dtype=bool)
+        for r in range(rows):
+            for c in range(cols):
+                y = slice(r * self.tile, (r + 1) * self.tile)
+                x = slice(c * self.tile, (c + 1) * self.tile)
+                grid[r, c] = self.static[y, x].all()
+        return grid
+
+    def _active_box(self) -> Tuple[int, int, int, int]:
+        rows, cols = np.nonzero(~self.static_tiles())
+        if len(rows) == 0:
+            # Nothing moves; keep the whole frame so callers need no special case
+            return 0, self.height, 0, self.width
+        return (
+            rows.min() * self.tile, min(self.height, (rows.max() + 1) * self.tile),
+            cols.min() * self.tile, min(self.width, (cols.max() + 1) * self.tile),
+        )
+
+    def crop(self, frames: Sequence[np.ndarray]) -> List[np.ndarray]:
+        """The part of each frame the model has to process."""
+        y0, y1, x0, x1 = self.box
+        return [frame[y0:y1, x0:x1] for frame in frames]
+
+    def composite(
+        self, frame0: np.ndarray, frame1: np.ndarray, synthesized: np.ndarray, t: float
+    ) -> np.ndarray:
+        """Full frame from a synthesized crop, with static pixels from the nearer source frame."""
+        source = frame0 if t < 0.5 else frame1
+        out = source.copy()
+        y0, y1, x0, x1 = self.box
+        out[y0:y1, x0:x1] = synthesized
+        np.copyto(out, source, where=self._static3)
+        return out
+
+    def save(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        cv2.imwrite(str(path), self.static.astype(np.uint8) * 255)
+
+    @classmethod
+    def load(cls, path: str, tile: int = 64) -> "HudMask":
+        image = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise FileNotFoundError(f"HUD mask not found: {path}")
+        return cls(image > 127, tile=tile)
+
+
+class HudAnalyzer:
+    """Find temporally static screen regions and cache them per game.
+
+    ``samples`` frames spread over the clip are compared per pixel; a pixel
+    whose value (in any channel) never varies by more than ``threshold``
+    is static. Specks smaller than the cleanup kernel are dropped, and the
+    static area is shrunk by ``margin`` pixels so the edges of HUD
+    elements stay with the model.
+
+    Masks are stored as PNGs under ``cache_dir`` by game id and resolution,
+    since a game's HUD layout depends on both.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "data/hud",
+        threshold: int = 12,
+        samples: int = 48,
+        margin: int = 2,
+        tile: int = 64
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.threshold = threshold
+        self.samples = samples
+        self.margin = margin
+        self.tile = tile
+
+    def cache_path(self, game: str, width: int, height: int) -> Path:
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", game)
+        return self.cache_dir / f"{safe}_{width}x{height}.png"
+
+    def analyze(self, video: str) -> HudMask:
+        """Detect the static regions of ``video``."""
+        cap = cv2.VideoCapture(video)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        step = max(1, total // self.samples)
+        low = high = None
+        seen = 0
+        try:
+            for i in range(total or 1 << 31):
+                if i % step:
+                    if not cap.grab():
+                        break
+                    continue
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                if low is None:
+                    low, high = frame.copy(), frame.copy()
+                else:
+                    np.minimum(low, frame, out=low)
+                    np.maximum(high, frame, out=high)
+                seen += 1
+                if seen >= self.samples:
+                    break
+        finally:
+            cap.release()
+        if seen < 2:
+            raise RuntimeError(f"Need at least two frames to find static regions in {video}")
+
+        static = ((high - low).max(axis=2) <= self.threshold).astype(np.uint8)
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+        static = cv2.morphologyEx(static, cv2.MORPH_OPEN, kernel)
+        if self.margin:
+            size = 2 * self.margin + 1
+            static = cv2.erode(static, cv2.getStructuringElement(cv2.MORPH_RECT, (size, size)))
+
+        mask = HudMask(static, tile=self.tile)
+        log.info(
+            f"Static regions: {mask.static_fraction:.1%} of the frame "
+            f"({seen} samples), model sees {mask.model_fraction:.1%}"
+        )
+        return mask
+
+    def for_game(self, game: str, video: str, refresh: bool = False) -> HudMask:
+        """The cached mask for ``game`` at ``video``'s resolution.
+
+        ``video`` is analysed if there is none.
+        """
+        cap = cv2.VideoCapture(video)
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
+
+        path = self.cache_path(game, width, height)
+        if path.exists() and not refresh:
+            log.debug(f"Using HUD mask {path}")
+            return HudMask.load(path, tile=self.tile)
+        mask = self.analyze(video)
+        mask.save(path)
+        log.info(f"Saved HUD mask for {game} to {path}")
+        return mask
@@ -1,26 +1,71 @@
 """RIFE Frame Interpolator"""
 
 import os
-import subprocess
-import sys
 import time
 from pathlib import Path
-from typing import Callable, Optional
+from typing import TYPE_CHECKING, Callable, List, Optional
 
 import cv2
-from loguru import logger
+import numpy as np
 
+from src.core.adaptive import ScaleSelector
+from src.core.encoder import VideoEncoder
+from src.core.framecache import FrameCache
+from src.core.hud import HudMask
+from src.core.metrics import ssim
+from src.utils import telemetry
 from src.utils.logger import log
+from src.utils.profiling import span
+
+if TYPE_CHECKING:
+    from src.core.engine import RIFEEngine
+
+# Pairs less similar than this (SSIM of 32x32 thumbnails, as in Practical-RIFE's
+# inference_video.py) are a scene cut: the first frame is repeated, not blended
+SCENE_CUT_SSIM = 0.2
+
+
+def is_scene_cut(frame0: np.ndarray, frame1: np.ndarray) -> bool:
+    """Whether two consecutive frames are on either side of a cut."""
+    size = (32, 32)
+    small0 = cv2.resize(frame0, size, interpolation=cv2.INTER_AREA)
+    small1 = cv2.resize(frame1, size, interpolation=cv2.INTER_AREA)
+    return ssim(small0, small1) < SCENE_CUT_SSIM
 
 
 class RIFEInterpolator:
-    """Wrapper for Practical-RIFE inference."""
+    """Decode, interpolate with Practical-RIFE and encode a video."""
     
     RIFE_PATH = Path("Practical-RIFE")
     
-    def __init__(self, model_version: str = "4.25"):
+    def __init__(
+        self,
+        model_version: str = "4.25",
+        engine: Optional["RIFEEngine"] = None,
+        batch_size: int = 1,
+        encoder: Optional[VideoEncoder] = None,
+        fp16: bool = False,
+        cpu_mode: str = "fp32",
+        backend: str = "torch",
+        scene_detection: bool = True
+    ):
         self.model_version = model_version
-        self._validate_setup()
+        self.batch_size = batch_size
+        self.scene_detection = scene_detection
+        self.scene_cuts = 0
+        self.encoder = encoder or VideoEncoder()
+        if engine is None and backend == "onnx":
+            from src.core.onnx_backend import OnnxEngine
+            from src.core.weights import model_pool
+            
+            # Graphs sit next to the weights; the torch model is only loaded to export missing ones
+            engine = OnnxEngine(version=model_version, cache_dir=model_pool().store.root)
+        elif engine is None:
+            from src.core.engine import RIFEEngine
+            
+            self._validate_setup()
+            engine = RIFEEngine(fp16=fp16, version=model_version, cpu_mode=cpu_mode)
+        self.engine = engine
     
     def _validate_setup(self):
         """Check that RIFE is properly installed."""
@@ -30,10 +75,11 @@ class RIFEInterpolator:
                 "Run: rife setup"
             )
         
-        model_path = Path("train_log/flownet.pkl")
-        if not model_path.exists():
+        from src.core.weights import LEGACY_WEIGHTS, model_pool
+        
+        if self.model_version not in model_pool().store and not LEGACY_WEIGHTS.exists():
             raise RuntimeError(
-                f"Model weights not found. Run: rife setup"
+                f"Model weights not found. Run: rife setup --model {self.model_version}"
             )
     
     def get_video_info(self, path: str) -> dict:
@@ -55,7 +101,11 @@ class RIFEInterpolator:
         output_path: str,
         multi: int = 2,
         scale: float = 1.0,
-        progress_callback: Optional[Callable[[float], None]] = None
+        progress_callback: Optional[Callable[[float], None]] = None,
+        max_frames: Optional[int] = None,
+        adaptive: Optional[ScaleSelector] = None,
+        hud: Optional[HudMask] = None,
+        cache: Optional[FrameCache] = None
     ) -> dict:
         """
         Run RIFE interpolation.
@@ -66,7 +116,10 @@ class RIFEInterpolator:
             multi: Frame multiplication factor
             scale: Input scale factor
             progress_callback: Optional callback for progress updates
-        
+            max_frames: Only process the first N input frames
+            adaptive: Pick the scale per batch from its motion instead of ``scale``
+            hud: Static regions to copy from the source instead of interpolating
+            cache: Reuse frames synthesized by earlier runs and store new ones
         Returns:
             dict with processing statistics
         """
@@ -77,58 +130,322 @@ class RIFEInterpolator:
         
         os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
         
-        # Build command
-        cmd = [
-            sys.executable,
-            str(self.RIFE_PATH / "inference_video.py"),
-            f"--multi={multi}",
-            f"--video={input_path}",
-            f"--output={output_path}",
-        ]
-        
-        if scale != 1.0:
-            cmd.append(f"--scale={scale}")
+        engine = self.engine
+        engine.scale = scale
+        engine.load()
+        self.scene_cuts = 0
         
-        log.debug(f"Running: {' '.join(cmd)}")
-        
-        # Execute with progress tracking
         start_time = time.time()
         
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1
+        writer = self.encoder.open_writer(
+            output_path,
+            input_info["width"],
+            input_info["height"],
+            input_info["fps"] * multi,
+            audio_source=input_path
         )
+        cap = cv2.VideoCapture(input_path)
+        limit = max_frames or float("inf")
+        total = max(min(input_info["frames"], limit), 1)
+        frames_read = 0
+        timesteps = [i / multi for i in range(1, multi)]
         
-        # Parse output for progress
-        for line in process.stdout:
-            log.debug(line.strip())
-            # Try to extract progress percentage
-            if "%" in line and progress_callback:
-                try:
-                    pct = float(line.split("%")[0].split()[-1])
-                    progress_callback(pct)
-                except:
-                    pass
-        
-        process.wait()
-        elapsed = time.time() - start_time
+        try:
+            ok, prev = cap.read()
+            if not ok:
+                raise RuntimeError(f"Could not read frames from {input_path}")
+            frames_read = 1
+            
+            while True:
+                # Batch consecutive frames: [prev, f1, ..., fn] -> n pairs
+                frames = [prev]
+                with span("decode"):
+                    while len(frames) <= self.batch_size and frames_read + len(frames) <= limit:
+                        ok, frame = cap.read()
+                        if not ok:
+                            break
+                        frames.append(frame)
+                
+                if len(frames) < 2:
+                    break
+                
+                if adaptive:
+                    with span("motion"):
+                        engine.scale, _ = adaptive.choose(frames[:-1], frames[1:])
+                
+                batch_start = time.time()
+                intermediates = self._synthesize(
+                    frames[:-1], frames[1:], [timesteps] * (len(frames) - 1), hud, cache
+                )
+                if adaptive:
+                    adaptive.update(len(frames) - 1, time.time() - batch_start)
+                
+                with span("encode"):
+                    for frame, between in zip(frames[:-1], intermediates):
+                        writer.write(frame)
+                        for synthesized in between:
+                            writer.write(synthesized)
+                
+                frames_read += len(frames) - 1
+                prev = frames[-1]
+                telemetry.count("frames", len(frames) - 1, kind="source")
+                telemetry.count("frames", (len(frames) - 1) * (multi - 1), kind="synthesized")
+                
+                if progress_callback:
+                    progress_callback(min(100.0, 100.0 * frames_read / total))
+            
+            # Last source frame has no successor to interpolate towards
+            writer.write(prev)
+        except BaseException:
+            # Don't finalize a partial file, and keep the original error
+            writer.abort()
+            raise
+        finally:
+            cap.release()
+        with span("encode"):
+            writer.close()
         
-        if process.returncode != 0:
-            raise RuntimeError(f"RIFE process failed with code {process.returncode}")
+        elapsed = time.time() - start_time
         
         # Get output info
         output_info = self.get_video_info(output_path)
         
-        return {
+        stats = {
             "input_fps": input_info["fps"],
             "output_fps": output_info["fps"],
-            "input_frames": input_info["frames"],
+            "input_frames": frames_read,
+            "output_frames": output_info["frames"],
+            "elapsed": elapsed,
+            "processing_fps": frames_read / elapsed if elapsed > 0 else 0,
+            "multi": multi,
+            "resolution": f"{input_info['width']}x{input_info['height']}",
+            "scale": "auto" if adaptive else scale,
+            "scene_cuts": self.scene_cuts
+        }
+        if adaptive:
+            stats["scales"] = adaptive.summary()
+        if hud:
+            stats["hud"] = self._hud_stats(hud)
+        if cache:
+            stats["cache"] = cache.summary()
+        return stats
+    
+    def _synthesize(
+        self,
+        frames0: List[np.ndarray],
+        frames1: List[np.ndarray],
+        timesteps: List[List[float]],
+        hud: Optional[HudMask] = None,
+        cache: Optional[FrameCache] = None
+    ) -> List[List[np.ndarray]]:
+        """Frames for each pair at its timesteps, from the cache or the model.
+
+        With scene detection, pairs across a cut repeat their first frame.
+        """
+        engine = self.engine
+        results = [[None] * len(steps) for steps in timesteps]
+        todo = list(range(len(frames0)))
+        if self.scene_detection:
+            with span("scene"):
+                cuts = [pair for pair in todo if is_scene_cut(frames0[pair], frames1[pair])]
+            for pair in cuts:
+                results[pair] = [frames0[pair]] * len(timesteps[pair])
+            todo = [pair for pair in todo if pair not in cuts]
+            self.scene_cuts += len(cuts)
+        keys = {}
+        if cache:
+            digest = hud.digest if hud else ""
+            settings = f"{engine.weights}|{engine.scale:g}|{engine.fp16}|{digest}"
+            if getattr(engine, "backend", "torch") != "torch":
+                settings += f"|{engine.backend}"
+            if getattr(engine, "cpu_mode", "fp32") != "fp32":
+                settings += f"|{engine.cpu_mode}"
+            with span("cache"):
+                keys = {pair: cache.pair_key(frames0[pair], frames1[pair], settings)
+                        for pair in todo}
+                for pair in todo:
+                    for k, t in enumerate(timesteps[pair]):
+                        results[pair][k] = cache.get(keys[pair], t)
+            todo = [pair for pair in todo if any(frame is None for frame in results[pair])]
+        if not todo:
+            return results
+        
+        inputs0 = [frames0[pair] for pair in todo]
+        inputs1 = [frames1[pair] for pair in todo]
+        steps = [timesteps[pair] for pair in todo]
+        with span("interpolate"):
+            if hud:
+                out = engine.interpolate_at(hud.crop(inputs0), hud.crop(inputs1), steps)
+            else:
+                out = engine.interpolate_at(inputs0, inputs1, steps)
+        if hud:
+            with span("composite"):
+                out = [
+                    [hud.composite(f0, f1, synth, t) for synth, t in zip(frames, pair_steps)]
+                    for f0, f1, frames, pair_steps in zip(inputs0, inputs1, out, steps)
+                ]
+        
+        for pair, frames in zip(todo, out):
+            results[pair] = frames
+            if cache:
+                with span("cache"):
+                    for t, frame in zip(timesteps[pair], frames):
+                        cache.put(keys[pair], t, frame)
+        return results
+    
+    @staticmethod
+    def _hud_stats(hud: HudMask) -> dict:
+        return {
+            "static_fraction": hud.static_fraction,
+            "model_fraction": hud.model_fraction,
+            "box": [int(v) for v in hud.box],
+        }
+    
+    def retime(
+        self,
+        input_path: str,
+        output_path: str,
+        fps: Optional[float] = None,
+        multi: int = 2,
+        scale: float = 1.0,
+        tolerance: float = 0.1,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        max_frames: Optional[int] = None,
+        adaptive: Optional[ScaleSelector] = None,
+        hud: Optional[HudMask] = None,
+        cache: Optional[FrameCache] = None
+    ) -> dict:
+        """
+        Convert a variable-frame-rate video to a constant rate using its timestamps.
+        
+        Each output frame is placed on the constant-rate timeline; where a
+        source frame lands on it (within ``tolerance`` output periods) the
+        source frame is written as is, and only the ticks that fall in gaps,
+        e.g. around dropped capture frames, are synthesized at their exact
+        fractional position between the neighbouring source frames.
+        
+        Args:
+            input_path: Input video path
+            output_path: Output video path
+            fps: Output frame rate (default: nominal input rate × ``multi``)
+            multi: Frame multiplication factor used when ``fps`` is not given
+            scale: Input scale factor
+            tolerance: Reuse source frames this close to a tick, in output periods
+            progress_callback: Optional callback for progress updates
+            max_frames: Only process the first N input frames
+            adaptive: Pick the scale per batch from its motion instead of ``scale``
+            hud: Static regions to copy from the source instead of interpolating
+            cache: Reuse frames synthesized by earlier runs and store new ones
+        Returns:
+            dict with processing statistics
+        """
+        from src.core.reader import VideoReader
+        from src.core.retime import retime_plan
+        
+        reader = VideoReader(input_path)
+        count = min(len(reader), max_frames or len(reader))
+        if count < 2:
+            raise RuntimeError(f"Need at least two frames to retime {input_path}")
+        timestamps = [reader.timestamp(i) for i in range(count)]
+        # The container's average rate is skewed by drops; the typical spacing is not
+        intervals = sorted(b - a for a, b in zip(timestamps, timestamps[1:]) if b > a)
+        source_fps = 1.0 / intervals[len(intervals) // 2] if intervals else reader.fps
+        fps = fps or source_fps * multi
+        
+        plan = retime_plan(timestamps, fps, tolerance)
+        steps = [[] for _ in range(count)]
+        for index, t in plan:
+            steps[index].append(t)
+        synthesized = sum(1 for _, t in plan if t > 0)
+        log.info(
+            f"Retiming {count} frames to {fps:.2f} FPS: {len(plan)} output frames, "
+            f"{synthesized} synthesized"
+        )
+        
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        
+        engine = self.engine
+        engine.scale = scale
+        engine.load()
+        self.scene_cuts = 0
+        
+        start_time = time.time()
+        writer = self.encoder.open_writer(
+            output_path, reader.width, reader.height, fps, audio_source=input_path
+        )
+        
+        def flush(batch):
+            # Only pairs with a tick inside their gap go through the model
+            work = [(i, f0, f1, [t for t in steps[i] if t > 0]) for i, f0, f1 in batch]
+            work = [item for item in work if item[3]]
+            made = {}
+            if work:
+                frames0 = [f0 for _, f0, _, _ in work]
+                frames1 = [f1 for _, _, f1, _ in work]
+                if adaptive:
+                    with span("motion"):
+                        engine.scale, _ = adaptive.choose(frames0, frames1)
+                batch_start = time.time()
+                out = self._synthesize(frames0, frames1, [t for _, _, _, t in work], hud, cache)
+                if adaptive:
+                    adaptive.update(len(work), time.time() - batch_start)
+                made = {item[0]: iter(frames) for item, frames in zip(work, out)}
+            with span("encode"):
+                for i, f0, _ in batch:
+                    for t in steps[i]:
+                        writer.write(f0 if t == 0 else next(made[i]))
+        
+        try:
+            frames = iter(reader)
+            with span("decode"):
+                prev = next(frames)
+            batch = []
+            for index in range(1, count):
+                with span("decode"):
+                    frame = next(frames)
+                batch.append((index - 1, prev, frame))
+                prev = frame
+                if len(batch) == self.batch_size:
+                    flush(batch)
+                    batch = []
+                    if progress_callback:
+                        progress_callback(100.0 * index / count)
+            flush(batch)
+            for _ in steps[count - 1]:
+                writer.write(prev)
+        except BaseException:
+            writer.abort()
+            raise
+        finally:
+            reader.close()
+        with span("encode"):
+            writer.close()
+        
+        elapsed = time.time() - start_time
+        telemetry.count("frames", count, kind="source")
+        telemetry.count("frames", synthesized, kind="synthesized")
+        
+        output_info = self.get_video_info(output_path)
+        stats = {
+            "input_fps": source_fps,
+            "output_fps": output_info["fps"],
+            "input_frames": count,
             "output_frames": output_info["frames"],
+            "synthesized": synthesized,
+            "reused": len(plan) - synthesized,
+            "skipped": count - len({i for i, t in plan if t == 0}),
+            "gaps": sum(1 for s in steps if any(t > 0 for t in s)),
             "elapsed": elapsed,
-            "processing_fps": input_info["frames"] / elapsed if elapsed > 0 else 0,
+            "processing_fps": count / elapsed if elapsed > 0 else 0,
             "multi": multi,
-            "resolution": f"{input_info['width']}x{input_info['height']}"
+            "resolution": f"{reader.width}x{reader.height}",
+            "scale": "auto" if adaptive else scale,
+            "scene_cuts": self.scene_cuts
         }
+        if adaptive:
+            stats["scales"] = adaptive.summary()
+        if hud:
+            stats["hud"] = self._hud_stats(hud)
+        if cache:
+            stats["cache"] = cache.summary()
+        return stats
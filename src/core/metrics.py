@@ -1,5 +1,6 @@
 """Quality Metrics Calculator"""
 
+import itertools
 import json
 import os
 import subprocess
@@ -7,15 +8,61 @@ from datetime import datetime
 from pathlib import Path
 from typing import List, Optional
 
+import cv2
+import numpy as np
+
 from src.utils.logger import log
+from src.utils.profiling import span
+from src.utils.threads import active_profile
+
+# PSNR reported for identical frames when averaging (their PSNR is infinite)
+PSNR_CAP = 100.0
+
+
+def _to_gray(frame: np.ndarray) -> np.ndarray:
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return frame.astype(np.float64)
+
+
+def psnr(reference: np.ndarray, distorted: np.ndarray) -> float:
+    """PSNR in dB between two 8-bit frames (inf for identical frames)."""
+    mse = np.mean((_to_gray(reference) - _to_gray(distorted)) ** 2)
+    if mse == 0:
+        return float("inf")
+    return float(10 * np.log10(255.0 ** 2 / mse))
+
+
+def ssim(reference: np.ndarray, distorted: np.ndarray) -> float:
+    """Mean SSIM between two 8-bit frames (Gaussian window, sigma 1.5)."""
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+    
+    def blur(img):
+        return cv2.GaussianBlur(img, (11, 11), 1.5)
+    
+    x = _to_gray(reference)
+    y = _to_gray(distorted)
+    
+    mu_x, mu_y = blur(x), blur(y)
+    mu_xx, mu_yy, mu_xy = mu_x * mu_x, mu_y * mu_y, mu_x * mu_y
+    sigma_xx = blur(x * x) - mu_xx
+    sigma_yy = blur(y * y) - mu_yy
+    sigma_xy = blur(x * y) - mu_xy
+    
+    ssim_map = ((2 * mu_xy + c1) * (2 * sigma_xy + c2)) / (
+        (mu_xx + mu_yy + c1) * (sigma_xx + sigma_yy + c2)
+    )
+    return float(ssim_map.mean())
 
 
 class MetricsCalculator:
     """Calculate video quality metrics using ffmpeg-quality-metrics."""
     
-    def __init__(self, output_dir: str = "results/metrics"):
+    def __init__(self, output_dir: str = "results/metrics", sample_every: int = 1):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.sample_every = max(1, sample_every)
     
     def calculate(
         self,
@@ -44,20 +91,11 @@ class MetricsCalculator:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_path = self.output_dir / f"metrics_{timestamp}.json"
         
-        # Build command
-        cmd = [
-            "ffmpeg-quality-metrics",
-            interpolated,
-            reference,
-            "--metrics"
-        ] + metrics + [
-            "-o", str(output_path),
-            "-of", "json"
-        ]
-        
+        cmd = self.command(interpolated, reference, metrics, str(output_path))
         log.debug(f"Running: {' '.join(cmd)}")
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        with span("metrics"):
+            result = subprocess.run(cmd, capture_output=True, text=True)
         
         if result.returncode != 0:
             log.error(f"Metrics calculation failed: {result.stderr}")
@@ -86,3 +124,114 @@ class MetricsCalculator:
                  f"SSIM={summary.get('ssim', 'N/A'):.4f}, VMAF={summary.get('vmaf', 'N/A'):.2f}")
         
         return summary
+    
+    def command(
+        self, interpolated: str, reference: str, metrics: List[str], output_path: str
+    ) -> List[str]:
+        """
+        ffmpeg-quality-metrics command line.
+        
+        The tool can only subsample VMAF (``--vmaf-subsample``), so with
+        ``sample_every`` > 1 PSNR / SSIM are still computed on every frame;
+        VMAF is by far the most expensive of the three.
+        """
+        cmd = [
+            "ffmpeg-quality-metrics",
+            interpolated,
+            reference,
+            "--metrics"
+        ] + metrics + [
+            "-o", output_path,
+            "-of", "json"
+        ]
+        
+        threads = active_profile().ffmpeg_threads
+        if threads:
+            cmd += ["--threads", str(threads)]
+        if self.sample_every > 1 and "vmaf" in metrics:
+            cmd += ["--vmaf-subsample", str(self.sample_every)]
+        return cmd
+    
+    def frame_metrics(self, interpolated: str, reference: str, multi: int = 2) -> dict:
+        """
+        PSNR / SSIM per frame computed in-process, without ffmpeg-quality-metrics.
+        
+        Frames at positions that are not a multiple of ``multi`` were
+        synthesized; they are also summarized on their own since the kept
+        source frames only differ by encoding loss. With ``sample_every``
+        > 1 only every Nth group of ``multi`` frames is scored.
+        
+        Args:
+            interpolated: Path to interpolated video
+            reference: Path to ground-truth reference (same size and frame rate)
+            multi: Frame multiplication factor used for interpolation
+        
+        Returns:
+            dict with mean scores over all and over synthesized frames.
+            Identical frames count as :data:`PSNR_CAP` dB in the PSNR
+            means and are counted in ``identical_frames``.
+        """
+        cap_interp = cv2.VideoCapture(interpolated)
+        cap_ref = cv2.VideoCapture(reference)
+        scores = []
+        positions = []
+        
+        with span("metrics"):
+            try:
+                for i in itertools.count():
+                    if (i // multi) % self.sample_every:
+                        # Skip the colour conversion and scoring of unsampled frames
+                        if not (cap_interp.grab() and cap_ref.grab()):
+                            break
+                        continue
+                    ok_interp, frame_interp = cap_interp.read()
+                    ok_ref, frame_ref = cap_ref.read()
+                    if not (ok_interp and ok_ref):
+                        break
+                    if frame_interp.shape != frame_ref.shape:
+                        raise ValueError(
+                            f"Frame size mismatch: {frame_interp.shape} vs {frame_ref.shape}"
+                        )
+                    scores.append((psnr(frame_ref, frame_interp), ssim(frame_ref, frame_interp)))
+                    positions.append(i)
+            finally:
+                cap_interp.release()
+                cap_ref.release()
+        
+        if not scores:
+            raise RuntimeError(f"No frames to compare in {interpolated} / {reference}")
+        
+        def summarize(rows):
+            psnrs = np.array([p for p, _ in rows])
+            return {
+                "psnr": float(np.minimum(psnrs, PSNR_CAP).mean()),
+                "ssim": float(np.mean([s for _, s in rows])),
+                "identical": int(np.isinf(psnrs).sum()),
+            }
+        
+        def synthesized_ssim(n):
+            # Kept source frames rank after every synthesized one (SSIM <= 1)
+            return scores[n][1] if positions[n] % multi else 2.0
+        
+        synthesized = [row for i, row in zip(positions, scores) if i % multi]
+        overall = summarize(scores)
+        result = {
+            "frames": len(scores),
+            "psnr": overall["psnr"],
+            "ssim": overall["ssim"],
+            "identical_frames": overall["identical"],
+        }
+        if self.sample_every > 1:
+            result["sample_every"] = self.sample_every
+        if synthesized:
+            synth = summarize(synthesized)
+            worst = min(range(len(scores)), key=synthesized_ssim)
+            result.update({
+                "synthesized_frames": len(synthesized),
+                "psnr_synthesized": synth["psnr"],
+                "ssim_synthesized": synth["ssim"],
+                "identical_synthesized": synth["identical"],
+                "worst_frame": positions[worst],
+                "worst_ssim": scores[worst][1],
+            })
+        return result
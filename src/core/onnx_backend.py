@@ -0,0 +1,224 @@
+"""ONNX Runtime Inference Backend"""
+
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.core.weights import DEFAULT_VERSION, WeightStore
+from src.utils.logger import log
+from src.utils.profiling import span
+
+OPSET = 17          # grid_sample needs 16+
+
+
+def export_onnx(
+    model, path: str, height: int, width: int, scale: float = 1.0, opset: int = OPSET
+) -> Path:
+    """
+    Export a Practical-RIFE style model's ``inference`` to an ONNX graph.
+
+    The graph takes ``img0`` / ``img1`` as ``(N, 3, height, width)`` float32
+    in 0-1 and a ``(N, 1, 1, 1)`` ``timestep``, and returns the synthesized
+    ``frame``. The batch dimension is dynamic; the frame size and flow
+    ``scale`` are baked in, so each padded size gets its own graph.
+    """
+    import torch
+
+    class InferenceGraph(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            network = getattr(model, "flownet", None)
+            if isinstance(network, torch.nn.Module):
+                self.flownet = network          # registers the weights with the exporter
+
+        def forward(self, img0, img1, timestep):
+            return model.inference(img0, img1, timestep, scale)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    args = (
+        torch.rand(1, 3, height, width),
+        torch.rand(1, 3, height, width),
+        torch.full((1, 1, 1, 1), 0.5),
+    )
+    batch = {0: "batch"}
+    log.info(f"Exporting flownet to ONNX ({width}x{height}, scale {scale:g})")
+    with torch.inference_mode(False), torch.no_grad():
+        torch.onnx.export(
+            InferenceGraph().eval(),
+            args,
+            str(tmp),
+            input_names=["img0", "img1", "timestep"],
+            output_names=["frame"],
+            dynamic_axes={"img0": batch, "img1": batch, "timestep": batch, "frame": batch},
+            opset_version=opset,
+            # Tracing bakes RIFE's cached warp grids and scale loop in as constants
+            dynamo=False,
+            external_data=False,
+        )
+    os.replace(tmp, path)
+    return path
+
+
+class OnnxEngine:
+    """Run the flownet with ONNX Runtime's CPU execution provider.
+
+    A drop-in for :class:`~src.core.engine.RIFEEngine` behind
+    :class:`~src.core.interpolator.RIFEInterpolator`: same frame-in /
+    frame-out methods, padding and ``scale`` attribute, but inference only
+    needs ``onnxruntime`` and NumPy. Graphs are exported from the torch
+    model the first time a version / scale / frame size is used and cached
+    as ``<cache_dir>/onnx/<version>_<sha>_s<scale>_<W>x<H>.onnx``, where
+    ``<sha>`` starts the checksum of the version's weights in the
+    :class:`~src.core.weights.WeightStore` at ``cache_dir``; exporting is
+    the only step that imports torch.
+    """
+
+    def __init__(
+        self,
+        version: Optional[str] = None,
+        scale: float = 1.0,
+        cache_dir: str = "models",
+        threads: Optional[int] = None,
+        model=None
+    ):
+        self.version = version or DEFAULT_VERSION
+        self.scale = scale
+        self.cache_dir = Path(cache_dir) / "onnx"
+        self.store = WeightStore(cache_dir)
+        self.threads = threads
+        self.backend = "onnx"
+        self.fp16 = False
+        self.device = "cpu"
+        self._model = model                 # torch model to export from (default: the pool's)
+        self._sessions: Dict[Tuple[float, int, int], object] = {}
+        self._weights = None
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._sessions)
+
+    def load(self):
+        """Check that ONNX Runtime is available; graphs load per frame size on first use."""
+        _onnxruntime()
+        return self
+
+    def padded_size(self, height: int, width: int) -> Tuple[int, int]:
+        """Size the flownet needs: both sides rounded up to its alignment."""
+        align = max(128, int(128 / self.scale))
+        return ((height - 1) // align + 1) * align, ((width - 1) // align + 1) * align
+
+    @property
+    def weights(self) -> str:
+        """sha256 of the weights for ``version`` (its name if they are not known)."""
+        if self._weights is None:
+            self._weights = self.store.loaded_sha256(self.version) or self.version
+        return self._weights
+
+    def graph_path(self, height: int, width: int) -> Path:
+        name = self.version
+        if self.weights != self.version:
+            name += f"_{self.weights[:12]}"
+        return self.cache_dir / f"{name}_s{self.scale:g}_{width}x{height}.onnx"
+
+    def session(self, height: int, width: int):
+        """Inference session for padded frames of this size at the current scale."""
+        key = (self.scale, height, width)
+        if key not in self._sessions:
+            ort = _onnxruntime()
+            path = self.graph_path(height, width)
+            if not path.exists():
+                export_onnx(self._torch_model(), path, height, width, self.scale)
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if self.threads:
+                options.intra_op_num_threads = self.threads
+            log.debug(f"Loading ONNX graph {path}")
+            self._sessions[key] = ort.InferenceSession(
+                str(path), options, providers=["CPUExecutionProvider"]
+            )
+        return self._sessions[key]
+
+    def _torch_model(self):
+        if self._model is None:
+            try:
+                from src.core.engine import RIFEEngine
+            except ImportError as e:
+                raise RuntimeError(
+                    "No ONNX graph cached for this size and torch is unavailable "
+                    f"to export one: {e}"
+                )
+            self._model = RIFEEngine(device="cpu", version=self.version).model
+        return self._model
+
+    def to_array(self, frames: Sequence[np.ndarray]) -> np.ndarray:
+        """Stack BGR frames into a padded ``(N, 3, H, W)`` float32 array."""
+        height, width = frames[0].shape[:2]
+        ph, pw = self.padded_size(height, width)
+        batch = np.zeros((len(frames), 3, ph, pw), dtype=np.float32)
+        for i, frame in enumerate(frames):
+            batch[i, :, :height, :width] = frame.transpose(2, 0, 1)
+        batch *= 1 / 255.0
+        return batch
+
+    def to_frames(self, array: np.ndarray, height: int, width: int) -> List[np.ndarray]:
+        """Crop padding and convert an ``(N, 3, H, W)`` array back to BGR frames."""
+        out = np.clip(np.rint(array[:, :, :height, :width] * 255.0), 0, 255).astype(np.uint8)
+        return list(np.ascontiguousarray(out.transpose(0, 2, 3, 1)))
+
+    def interpolate_at(
+        self,
+        frames0: Sequence[np.ndarray],
+        frames1: Sequence[np.ndarray],
+        timesteps: Sequence[Sequence[float]]
+    ) -> List[List[np.ndarray]]:
+        """Synthesize frames at arbitrary timesteps, all in one run.
+
+        See ``RIFEEngine.interpolate_at``.
+        """
+        height, width = frames0[0].shape[:2]
+        with span("preprocess"):
+            img0 = self.to_array(frames0)
+            img1 = self.to_array(frames1)
+        session = self.session(*img0.shape[2:])
+
+        index = [pair for pair, steps in enumerate(timesteps) for _ in steps]
+        if index != list(range(len(frames0))):
+            img0, img1 = img0[index], img1[index]
+        timestep = np.array([t for steps in timesteps for t in steps], dtype=np.float32)
+        with span("model"):
+            (merged,) = session.run(None, {
+                "img0": img0,
+                "img1": img1,
+                "timestep": timestep.reshape(-1, 1, 1, 1),
+            })
+        with span("postprocess"):
+            frames = iter(self.to_frames(merged, height, width))
+        return [[next(frames) for _ in steps] for steps in timesteps]
+
+    def interpolate_batch(
+        self,
+        frames0: Sequence[np.ndarray],
+        frames1: Sequence[np.ndarray],
+        multi: int = 2
+    ) -> List[List[np.ndarray]]:
+        """Synthesize the ``multi - 1`` intermediate frames for each pair."""
+        steps = [i / multi for i in range(1, multi)]
+        return self.interpolate_at(frames0, frames1, [steps] * len(frames0))
+
+    def interpolate(
+        self, frame0: np.ndarray, frame1: np.ndarray, multi: int = 2
+    ) -> List[np.ndarray]:
+        """Synthesize the intermediate frames between two frames."""
+        return self.interpolate_batch([frame0], [frame1], multi)[0]
+
+
+def _onnxruntime():
+    try:
+        import onnxruntime
+    except ImportError:
+        raise RuntimeError("The ONNX backend needs onnxruntime: pip install onnxruntime")
+    return onnxruntime
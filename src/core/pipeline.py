@@ -0,0 +1,246 @@
+"""Cached Step Pipeline"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from src.utils.logger import log
+
+
+@dataclass
+class Step:
+    """One node of a :class:`Pipeline`.
+
+    ``run`` is called with a dict of the results of the steps it depends
+    on and must write every path in ``outputs``. A step depends on the
+    steps that produce any of its ``inputs`` and on those named in
+    ``after``. ``params`` holds every setting that changes the outputs.
+    ``stage`` groups steps under a shared concurrency limit.
+    """
+
+    name: str
+    run: Callable[[Dict[str, Any]], Any]
+    inputs: Sequence[str] = ()
+    outputs: Sequence[str] = ()
+    params: Dict[str, Any] = field(default_factory=dict)
+    after: Sequence[str] = ()
+    stage: Optional[str] = None
+
+
+def check_limits(limits: Optional[Dict[str, int]]) -> Dict[str, int]:
+    """Copy of per-stage limits; a stage capped below 1 could never run."""
+    limits = dict(limits or {})
+    bad = [f"{stage}={limit}" for stage, limit in limits.items() if limit < 1]
+    if bad:
+        raise ValueError(f"Stage limits must be at least 1: {', '.join(bad)}")
+    return limits
+
+
+class Pipeline:
+    """Run steps as a dependency graph, skipping those whose key is unchanged.
+
+    A step's key hashes its name, parameters, the content of its input
+    files and the results of the steps named in ``after``. Keys, output
+    stamps and step results are kept in a JSON manifest; a step is reused
+    when its key matches and its outputs are still the files it wrote.
+    Because keys use content hashes, a rerun upstream step that produces
+    identical files does not invalidate anything downstream.
+
+    Independent steps run concurrently on a thread pool (steps are
+    expected to spend their time in subprocesses or native code), with at
+    most ``limits[stage]`` steps of a stage running at once. Ready steps
+    are started in the order they were added. When a step fails, its
+    dependents are skipped and the rest still run.
+    """
+
+    def __init__(
+        self,
+        manifest_path: str,
+        workers: int = 4,
+        limits: Optional[Dict[str, int]] = None
+    ):
+        self.manifest_path = Path(manifest_path)
+        self.workers = workers
+        self.limits = check_limits(limits)
+        self.steps: Dict[str, Step] = {}
+        self.results: Dict[str, Any] = {}
+        self.status: Dict[str, str] = {}
+        self.errors: Dict[str, Exception] = {}
+        self._lock = threading.Lock()
+        self._manifest = self._load_manifest()
+
+    def _load_manifest(self) -> dict:
+        if self.manifest_path.exists():
+            try:
+                with open(self.manifest_path) as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                log.warning(f"Ignoring unreadable pipeline manifest {self.manifest_path}: {e}")
+        return {"steps": {}, "files": {}}
+
+    def _save_manifest(self):
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self._manifest, f, indent=2, default=str)
+        os.replace(tmp, self.manifest_path)
+
+    def add(self, step: Step) -> Step:
+        if step.name in self.steps:
+            raise ValueError(f"Duplicate step: {step.name}")
+        self.steps[step.name] = step
+        return step
+
+    def dependencies(self, name: str) -> List[str]:
+        """Steps that must finish before ``name``."""
+        step = self.steps[name]
+        producers = {
+            str(output): other.name
+            for other in self.steps.values()
+            for output in other.outputs
+        }
+        deps = [producers[str(path)] for path in step.inputs if str(path) in producers]
+        return list(dict.fromkeys(deps + list(step.after)))
+
+    @staticmethod
+    def _stamp(path: str) -> Optional[List[int]]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def file_hash(self, path: str) -> str:
+        """SHA-256 of a file, memoized in the manifest by size and mtime."""
+        path = str(path)
+        stamp = self._stamp(path)
+        if stamp is None:
+            raise FileNotFoundError(f"Pipeline input not found: {path}")
+
+        with self._lock:
+            cached = self._manifest["files"].get(path)
+        if cached and cached["stamp"] == stamp:
+            return cached["sha256"]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                digest.update(chunk)
+
+        with self._lock:
+            self._manifest["files"][path] = {"stamp": stamp, "sha256": digest.hexdigest()}
+        return digest.hexdigest()
+
+    def key(self, name: str) -> str:
+        """Cache key of a step; its dependencies must already have run."""
+        step = self.steps[name]
+        payload = {
+            "name": step.name,
+            "params": step.params,
+            "inputs": {str(path): self.file_hash(path) for path in step.inputs},
+            # File dependencies are covered by the input hashes
+            "upstream": {dep: self.results.get(dep) for dep in step.after},
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _cached(self, name: str, key: str) -> bool:
+        with self._lock:
+            entry = self._manifest["steps"].get(name)
+        if not entry or entry["key"] != key:
+            return False
+        return all(self._stamp(path) == stamp for path, stamp in entry["outputs"].items())
+
+    def _execute(self, name: str, force: bool) -> str:
+        step = self.steps[name]
+        key = self.key(name)
+        if not force and self._cached(name, key):
+            with self._lock:
+                self.results[name] = self._manifest["steps"][name]["result"]
+            return "cached"
+
+        log.info(f"Running step: {name}")
+        result = step.run({dep: self.results.get(dep) for dep in self.dependencies(name)})
+        missing = [str(path) for path in step.outputs if not os.path.exists(path)]
+        if missing:
+            raise RuntimeError(f"Step {name} did not write: {', '.join(missing)}")
+
+        with self._lock:
+            self.results[name] = result
+            self._manifest["steps"][name] = {
+                "key": key,
+                "outputs": {str(path): self._stamp(path) for path in step.outputs},
+                "result": result,
+            }
+            self._save_manifest()
+        return "ran"
+
+    def _has_capacity(self, name: str, running: Dict) -> bool:
+        stage = self.steps[name].stage
+        limit = self.limits.get(stage)
+        if limit is None:
+            return True
+        return sum(self.steps[other].stage == stage for other in running.values()) < limit
+
+    def run(self, force: Iterable[str] = ()) -> Dict[str, Any]:
+        """
+        Run every step whose key changed, independent steps concurrently.
+
+        Args:
+            force: Step names to rerun regardless of the cache
+
+        Returns:
+            dict of step results; see ``status`` / ``errors`` for outcomes
+        """
+        force = set(force)
+        unknown = force - set(self.steps)
+        if unknown:
+            raise ValueError(f"Unknown step(s): {', '.join(sorted(unknown))}")
+
+        deps = {name: self.dependencies(name) for name in self.steps}
+        for name, names in deps.items():
+            for dep in names:
+                if dep not in self.steps:
+                    raise ValueError(f"Step {name} depends on unknown step: {dep}")
+
+        self.status = {}
+        self.errors = {}
+        pending = dict(deps)
+        running = {}
+        workers = max(1, self.workers)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while pending or running:
+                for name in list(pending):
+                    states = [self.status.get(dep) for dep in pending[name]]
+                    if any(s in ("failed", "skipped") for s in states):
+                        self.status[name] = "skipped"
+                        del pending[name]
+                    elif all(s in ("ran", "cached") for s in states):
+                        if len(running) >= workers or not self._has_capacity(name, running):
+                            continue
+                        running[pool.submit(self._execute, name, name in force)] = name
+                        del pending[name]
+
+                if not running:
+                    if pending:
+                        raise ValueError(f"Dependency cycle among: {', '.join(pending)}")
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        self.status[name] = future.result()
+                    except Exception as e:
+                        log.error(f"Step {name} failed: {e}")
+                        self.status[name] = "failed"
+                        self.errors[name] = e
+
+        with self._lock:
+            self._save_manifest()
+        return self.results
@@ -0,0 +1,243 @@
+"""Random-Access Video Reader"""
+
+import json
+import os
+import subprocess
+from bisect import bisect_right
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+import cv2
+import numpy as np
+
+from src.utils.logger import log
+from src.utils.threads import ffmpeg_thread_args
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".keyframes.json"
+
+
+@lru_cache(maxsize=None)
+def passthrough_args() -> List[str]:
+    """Output option that passes every frame through with its own timestamp.
+
+    ``-fps_mode`` only exists in FFmpeg 5.1+; older builds use ``-vsync``.
+    """
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-h", "long"], capture_output=True, text=True
+    )
+    if any(line.startswith("-fps_mode") for line in result.stdout.splitlines()):
+        return ["-fps_mode", "passthrough"]
+    return ["-vsync", "passthrough"]
+
+
+def build_index(path: str) -> dict:
+    """
+    Scan a video's packets (no decoding) for presentation timestamps and keyframes.
+
+    Uses FFmpeg's ``framecrc`` muxer with stream copy, which prints one line
+    per packet and tags every packet that is not a plain keyframe with its
+    flags.
+
+    Returns:
+        dict with the stream time base, sorted frame PTS and keyframe indices
+    """
+    cmd = [
+        "ffmpeg",
+        "-v", "error",
+        "-i", path,
+        "-map", "0:v:0",
+        "-c", "copy",
+        "-f", "framecrc",
+        "-"
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg index scan failed: {result.stderr}")
+
+    time_base = (1, 1)
+    packets = []
+    for line in result.stdout.splitlines():
+        if line.startswith("#tb 0:"):
+            num, den = line.split(":", 1)[1].strip().split("/")
+            time_base = (int(num), int(den))
+            continue
+        if not line or line.startswith("#"):
+            continue
+
+        fields = [f.strip() for f in line.split(",")]
+        pts = int(fields[2])
+        flags = next((int(f[2:], 16) for f in fields[6:] if f.startswith("F=")), 1)
+        packets.append((pts, bool(flags & 1)))
+
+    # Packets arrive in decode order; frames are served in presentation order
+    packets.sort()
+    return {
+        "version": INDEX_VERSION,
+        "time_base": list(time_base),
+        "pts": [pts for pts, _ in packets],
+        "keyframes": [i for i, (_, key) in enumerate(packets) if key],
+    }
+
+
+class VideoReader:
+    """Random access to the frames of a video by index.
+
+    On first open the packet timestamps and keyframe positions are scanned
+    and cached in a sidecar file (``<video>.keyframes.json``), keyed by the
+    video's size and mtime. ``reader[i]`` and ``reader[a:b]`` then start
+    decoding at the nearest keyframe at or before the requested frame, so a
+    lookup costs at most one GOP of decoding. Forward access reuses the open
+    decoder when that is cheaper than seeking.
+
+    Frames are BGR ``uint8`` arrays, like OpenCV's.
+
+    Example:
+        with VideoReader("clip.mp4") as reader:
+            frame = reader[120]
+            frames = reader[300:330]
+    """
+
+    def __init__(self, path: str, index_path: Optional[str] = None, rebuild: bool = False):
+        # Set first: __del__ calls close() even when __init__ raises
+        self._process = None
+        self.path = str(path)
+        if not Path(self.path).exists():
+            raise FileNotFoundError(f"Video not found: {self.path}")
+        self.index_path = Path(index_path or self.path + INDEX_SUFFIX)
+
+        cap = cv2.VideoCapture(self.path)
+        self.fps = cap.get(cv2.CAP_PROP_FPS)
+        self.width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
+
+        self.index = self._load_index(rebuild)
+        num, den = self.index["time_base"]
+        self._time_base = num / den
+        self._pts = self.index["pts"]
+        self._keyframes = self.index["keyframes"] or [0]
+        self._position = 0
+
+    def _stamp(self) -> dict:
+        stat = os.stat(self.path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def _load_index(self, rebuild: bool) -> dict:
+        stamp = self._stamp()
+        if not rebuild and self.index_path.exists():
+            try:
+                with open(self.index_path) as f:
+                    index = json.load(f)
+                if index.get("version") == INDEX_VERSION and index.get("source") == stamp:
+                    return index
+            except (OSError, ValueError) as e:
+                log.debug(f"Ignoring unreadable index {self.index_path}: {e}")
+
+        log.debug(f"Building keyframe index for {self.path}")
+        index = build_index(self.path)
+        index["source"] = stamp
+        try:
+            with open(self.index_path, "w") as f:
+                json.dump(index, f)
+        except OSError as e:
+            log.warning(f"Could not save keyframe index to {self.index_path}: {e}")
+        return index
+
+    def __len__(self) -> int:
+        return len(self._pts)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        """Stop the open decoder, if any."""
+        if self._process is not None:
+            self._process.kill()
+            self._process.stdout.close()
+            self._process.wait()
+            self._process = None
+
+    def timestamp(self, index: int) -> float:
+        """Presentation time of a frame in seconds."""
+        return self._pts[index] * self._time_base
+
+    def keyframe_before(self, index: int) -> int:
+        """Index of the last keyframe at or before ``index``."""
+        return self._keyframes[max(0, bisect_right(self._keyframes, index) - 1)]
+
+    def _open(self, index: int):
+        """Start a decoder whose first output frame is ``index``."""
+        self.close()
+        cmd = ["ffmpeg", "-v", "error", *ffmpeg_thread_args()]
+        if index > 0:
+            # FFmpeg seeks to a keyframe before this time, decodes forward
+            # and drops frames earlier than it; aiming between two frames'
+            # timestamps keeps rounding from including or skipping a frame
+            start = (self.timestamp(index - 1) + self.timestamp(index)) / 2
+            cmd += ["-ss", f"{start:.6f}"]
+        cmd += [
+            "-i", self.path,
+            "-map", "0:v:0",
+            *passthrough_args(),
+            "-f", "rawvideo",
+            "-pix_fmt", "bgr24",
+            "-"
+        ]
+        log.debug(f"Running: {' '.join(cmd)}")
+        self._process = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        self._position = index
+
+    def _next(self) -> Optional[np.ndarray]:
+        frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        if self._process.stdout.readinto(memoryview(frame).cast("B")) < frame.nbytes:
+            self.close()
+            return None
+        self._position += 1
+        return frame
+
+    def _seek(self, index: int):
+        """Position the decoder so the next frame read is ``index``."""
+        keyframe = self.keyframe_before(index)
+        # Decoding forward is no dearer than a seek once past the frame's keyframe
+        if self._process is None or not keyframe <= self._position <= index:
+            self._open(index)
+        while self._position < index:
+            if self._next() is None:
+                raise IndexError(f"Frame {index} could not be decoded from {self.path}")
+
+    def _read(self, start: int, stop: int) -> Iterator[np.ndarray]:
+        for index in range(start, stop):
+            # Re-seek if another access moved the decoder in between
+            if self._process is None or self._position != index:
+                self._seek(index)
+            frame = self._next()
+            if frame is None:
+                raise IndexError(f"Frame {index} could not be decoded from {self.path}")
+            yield frame
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[np.ndarray, List[np.ndarray]]:
+        if isinstance(key, slice):
+            indices = range(*key.indices(len(self)))
+            if not indices:
+                return []
+            if indices.step == 1:
+                return list(self._read(indices.start, indices.stop))
+            return [self[i] for i in indices]
+
+        index = key + len(self) if key < 0 else key
+        if not 0 <= index < len(self):
+            raise IndexError(f"Frame index {key} out of range for {len(self)} frames")
+        return next(self._read(index, index + 1))
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        return self._read(0, len(self))
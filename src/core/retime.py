@@ -0,0 +1,52 @@
+"""Timestamp-Aware Retiming"""
+
+from typing import List, Sequence, Tuple
+
+
+def retime_plan(
+    timestamps: Sequence[float], fps: float, tolerance: float = 0.1
+) -> List[Tuple[int, float]]:
+    """
+    Map a constant-rate output timeline onto source frames by their timestamps.
+
+    Output frame ``k`` is due at ``timestamps[0] + k / fps``. A tick within
+    ``tolerance`` output periods of a source frame reuses that frame; any
+    other tick falls in the gap between two source frames and is
+    synthesized at its exact position in that gap. Source frames that
+    share a timestamp count once, and frames arriving faster than the
+    output rate are skipped.
+
+    Args:
+        timestamps: Presentation time of each source frame in seconds, ascending
+        fps: Output frame rate
+        tolerance: How close (in output periods) a source frame must be to be reused
+
+    Returns:
+        ``(index, t)`` per output frame: ``t == 0`` repeats source frame
+        ``index``, otherwise a frame is synthesized at fraction ``t`` of the
+        way from ``index`` to ``index + 1``
+    """
+    if not timestamps:
+        return []
+    slack = tolerance / fps
+    start, end = timestamps[0], timestamps[-1]
+    last = len(timestamps) - 1
+
+    plan = []
+    i = 0
+    k = 0
+    while True:
+        # Computed from k rather than accumulated, so long files don't drift
+        tick = start + k / fps
+        if tick > end + slack:
+            break
+        while i < last and timestamps[i + 1] - slack <= tick:
+            i += 1
+        if i == last or tick - timestamps[i] <= slack:
+            plan.append((i, 0.0))
+        else:
+            t = (tick - timestamps[i]) / (timestamps[i + 1] - timestamps[i])
+            # Rounded so equal positions in different gaps batch together
+            plan.append((i, round(t, 6)))
+        k += 1
+    return plan
@@ -0,0 +1,603 @@
+"""Warm-Model Job Server and Client"""
+
+import hmac
+import http.client
+import itertools
+import json
+import os
+import queue
+import secrets
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Optional, Tuple
+
+from src.core.weights import DEFAULT_VERSION, model_pool
+from src.utils import telemetry
+from src.utils.logger import log
+
+if TYPE_CHECKING:
+    from src.core.encoder import VideoEncoder
+    from src.core.engine import RIFEEngine
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+# Clients that can't read the server's token file (another machine) pass it in here
+TOKEN_ENV = "RIFE_SERVE_TOKEN"
+
+JOB_TYPES = ("interpolate", "metrics")
+
+# PSNR / SSIM run in-process on the warm server; anything else needs ffmpeg-quality-metrics
+_IN_PROCESS_METRICS = {"psnr", "ssim"}
+
+
+def parse_address(address: str) -> Tuple[str, object]:
+    """``("unix", path)`` for ``unix:/path``, else ``("tcp", (host, port))``."""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    address = address.removeprefix("http://").rstrip("/")
+    host, _, port = address.rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+def token_path(address: str) -> Path:
+    """Where the server listening on ``address`` keeps its access token.
+
+    Next to the socket for ``unix:/path``, else ``~/.rife/serve-<port>.token``
+    (by port only, so ``localhost:8765`` and ``127.0.0.1:8765`` agree).
+    """
+    kind, target = parse_address(address)
+    if kind == "unix":
+        return Path(f"{target}.token")
+    return Path.home() / ".rife" / f"serve-{target[1]}.token"
+
+
+class Job:
+    """A queued unit of work and the events it has emitted so far.
+
+    Only the last ``max_events`` events are kept (progress events are the
+    bulk); a follower that falls further behind skips the dropped ones.
+    """
+
+    max_events = 500
+
+    def __init__(self, kind: str, params: dict, priority: int = 0):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params
+        self.priority = priority
+        self.status = "queued"
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished_at = None
+        self.events = []
+        self._dropped = 0
+        self._changed = threading.Condition()
+        self.emit("queued")
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def emit(self, event: str, **data):
+        with self._changed:
+            now = time.time()
+            if self.finished and self.finished_at is None:
+                self.finished_at = now
+            self.events.append({"event": event, "job": self.id, "time": now, **data})
+            excess = len(self.events) - self.max_events
+            if excess > 0:
+                del self.events[:excess]
+                self._dropped += excess
+            self._changed.notify_all()
+
+    def follow(self, timeout: float = 30.0) -> Iterator[dict]:
+        """Yield every event, blocking for new ones until the job finishes."""
+        seen = 0            # events emitted so far, including dropped ones
+        while True:
+            with self._changed:
+                if seen == self._dropped + len(self.events) and not self.finished:
+                    self._changed.wait(timeout)
+                events = self.events[max(0, seen - self._dropped):]
+                seen = self._dropped + len(self.events)
+                finished = self.finished
+            yield from events
+            if finished:
+                return
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "type": self.kind,
+            "priority": self.priority,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "params": self.params,
+        }
+
+
+class JobServer:
+    """Run interpolate / metrics jobs against a model loaded once.
+
+    Jobs wait in a priority queue (higher ``priority`` first, then FIFO)
+    and are run by ``workers`` threads that share the loaded flownet and
+    the process's warm torch / FFmpeg thread settings. Progress is
+    recorded as events that clients can stream while the job runs.
+
+    The HTTP API (JSON bodies) is served on localhost TCP or a Unix socket.
+    Jobs read and write arbitrary paths, so every request must carry
+    ``Authorization: Bearer <token>``, where the token is generated per
+    server and written to a 0600 file at :func:`token_path` (which
+    :class:`JobClient` reads). POST bodies must be ``application/json``,
+    which browsers can't send cross-origin without a CORS preflight.
+
+    - ``POST /jobs`` ``{"type", "params", "priority"}`` → job
+    - ``GET /jobs`` / ``GET /jobs/<id>`` → job status
+    - ``GET /jobs/<id>/events`` → newline-delimited JSON events until the job ends
+    - ``DELETE /jobs/<id>`` → cancel a queued job
+    - ``GET /health``
+
+    Finished jobs are forgotten ``job_ttl`` seconds after they end, and
+    beyond the ``keep_finished`` most recent ones, so a long-running
+    server doesn't grow without bound.
+    """
+
+    def __init__(
+        self,
+        engine: Optional["RIFEEngine"] = None,
+        encoder: Optional["VideoEncoder"] = None,
+        workers: int = 1,
+        batch_size: int = 1,
+        job_ttl: float = 3600.0,
+        keep_finished: int = 1000
+    ):
+        # Clients share this module; only the server side pulls in torch / cv2
+        from src.core.encoder import VideoEncoder
+        from src.core.engine import RIFEEngine
+
+        self.engine = engine or RIFEEngine()
+        self.encoder = encoder or VideoEncoder()
+        self.workers = workers
+        self.batch_size = batch_size
+        self.jobs: Dict[str, Job] = {}
+        self.job_ttl = job_ttl
+        self.keep_finished = keep_finished
+        self._jobs_lock = threading.Lock()
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._threads = []
+        self._httpd = None
+        self.token = secrets.token_urlsafe(32)
+        self.token_file = None
+        self.started = time.time()
+
+    # Jobs
+
+    def submit(self, kind: str, params: dict, priority: int = 0) -> Job:
+        if kind not in JOB_TYPES:
+            raise ValueError(f"Unknown job type: {kind}")
+        job = Job(kind, params, priority)
+        with self._jobs_lock:
+            self._prune()
+            self.jobs[job.id] = job
+        self._queue.put((-priority, next(self._order), job))
+        log.info(f"Queued {kind} job {job.id} (priority {priority})")
+        return job
+
+    def _prune(self):
+        finished = sorted(
+            (job for job in self.jobs.values() if job.finished_at is not None),
+            key=lambda job: job.finished_at
+        )
+        expired = time.time() - self.job_ttl
+        excess = len(finished) - self.keep_finished
+        for n, job in enumerate(finished):
+            if n < excess or job.finished_at < expired:
+                del self.jobs[job.id]
+
+    def cancel(self, job_id: str) -> Job:
+        job = self.jobs[job_id]
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.emit("cancelled")
+        return job
+
+    def _worker(self):
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                return
+            if job.status != "queued":
+                continue
+            self._run(job)
+
+    def _run(self, job: Job):
+        job.status = "running"
+        job.emit("started")
+        start = time.time()
+        try:
+            if job.kind == "interpolate":
+                job.result = self._interpolate(job)
+            else:
+                job.result = self._metrics(job)
+            job.status = "done"
+            job.progress = 100.0
+            job.emit("done", result=job.result, elapsed=time.time() - start)
+            log.info(f"Job {job.id} done in {time.time() - start:.1f}s")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            job.emit("failed", error=str(e))
+            log.error(f"Job {job.id} failed: {e}")
+        telemetry.count("jobs", kind=job.kind, status=job.status)
+        telemetry.observe("job", time.time() - start, kind=job.kind)
+        telemetry.gauge("queue_depth", self._queue.qsize())
+
+    def _progress(self, job: Job) -> Callable[[float], None]:
+        def update(pct: float):
+            job.progress = pct
+            job.emit("progress", progress=pct)
+        return update
+
+    def _interpolate(self, job: Job) -> dict:
+        from src.core.adaptive import ScaleSelector
+        from src.core.engine import RIFEEngine
+        from src.core.framecache import FrameCache
+        from src.core.hud import HudAnalyzer
+        from src.core.interpolator import RIFEInterpolator
+
+        params = job.params
+        default = self.engine.version or DEFAULT_VERSION
+        version = params.get("model") or default
+        # Other versions come from the shared LRU pool, so alternating jobs don't reload.
+        # The per-job engine wraps a raw pool model for the CPU mode; the server's
+        # model is already wrapped and is shared as is.
+        model = self.engine.model if version == default else model_pool().get(version)
+        # Per-job engine sharing the loaded model: concurrent jobs may differ in scale
+        interpolator = RIFEInterpolator(
+            engine=RIFEEngine(
+                model=model, device=str(self.engine.device), fp16=self.engine.fp16,
+                version=version, cpu_mode=self.engine.cpu_mode
+            ),
+            batch_size=params.get("batch_size", self.batch_size),
+            encoder=self.encoder,
+            scene_detection=bool(params.get("scene_detection", True))
+        )
+        adaptive = params.get("scale") == "auto"
+        selector = ScaleSelector(
+            reach=float(params.get("motion_reach", 48.0)),
+            still=float(params.get("motion_still", 8.0)),
+            target_fps=params.get("target_fps")
+        ) if adaptive else None
+        cache = None
+        if params.get("frame_cache"):
+            max_bytes = int(params.get("frame_cache_mb", 10240)) << 20
+            cache = FrameCache(params["frame_cache"], max_bytes=max_bytes)
+        hud = None
+        if params.get("game"):
+            hud = HudAnalyzer(**params.get("hud", {})).for_game(params["game"], params["input"])
+        options = dict(
+            multi=int(params.get("multi", 2)),
+            scale=self.engine.scale if adaptive else float(params.get("scale", self.engine.scale)),
+            progress_callback=self._progress(job),
+            adaptive=selector,
+            hud=hud,
+            cache=cache
+        )
+        if params.get("retime"):
+            return interpolator.retime(
+                params["input"], params["output"], fps=params.get("fps"), **options
+            )
+        return interpolator.process(params["input"], params["output"], **options)
+
+    def _metrics(self, job: Job) -> dict:
+        from src.core.metrics import MetricsCalculator
+
+        params = job.params
+        metrics = params.get("metrics") or sorted(_IN_PROCESS_METRICS)
+        calc = MetricsCalculator()
+        if set(metrics) <= _IN_PROCESS_METRICS:
+            return calc.frame_metrics(
+                params["interpolated"], params["reference"], multi=int(params.get("multi", 2))
+            )
+        return calc.calculate(
+            params["interpolated"], params["reference"], list(metrics), params.get("output")
+        )
+
+    # Serving
+
+    def start(self, address: str = DEFAULT_ADDRESS, warm: bool = True):
+        """Load the model, start workers and listen (in a background thread)."""
+        if warm:
+            self.engine.load()
+
+        for _ in range(max(1, self.workers)):
+            thread = threading.Thread(target=self._worker, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        kind, target = parse_address(address)
+        if kind == "unix":
+            if os.path.exists(target):
+                os.remove(target)
+            self._httpd = _UnixHTTPServer(target, _Handler)
+        else:
+            self._httpd = ThreadingHTTPServer(target, _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.jobs = self
+        self.token_file = self._write_token()
+
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        log.info(f"Serving on {self.address}")
+        return self
+
+    def _write_token(self) -> Path:
+        path = token_path(self.address)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            path.unlink()
+        # O_EXCL: never write the token into a file someone else created
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(self.token)
+        return path
+
+    @property
+    def address(self) -> str:
+        if isinstance(self._httpd, _UnixHTTPServer):
+            return f"unix:{self._httpd.server_address}"
+        host, port = self._httpd.server_address[:2]
+        return f"{host}:{port}"
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            if isinstance(self._httpd, _UnixHTTPServer):
+                try:
+                    os.remove(self._httpd.server_address)
+                except OSError:
+                    pass
+        if self.token_file is not None:
+            self.token_file.unlink(missing_ok=True)
+            self.token_file = None
+        for _ in self._threads:
+            self._queue.put((float("inf"), next(self._order), None))
+
+    def health(self) -> dict:
+        counts = {}
+        for job in list(self.jobs.values()):
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "status": "ok",
+            "model_loaded": self.engine.loaded,
+            "models_resident": model_pool().resident,
+            "device": str(self.engine.device),
+            "workers": self.workers,
+            "jobs": counts,
+            "uptime": time.time() - self.started,
+        }
+
+
+class _UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    """HTTP over a Unix domain socket."""
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        return request, ("local", 0)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "rife-serve/0.1"
+
+    def log_message(self, format, *args):
+        log.debug(f"{self.command} {self.path}: {format % args}")
+
+    def _send(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self) -> bool:
+        scheme, _, token = self.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(
+            token.strip().encode(), self.server.jobs.token.encode()
+        ):
+            return True
+        self._send(401, {"error": "missing or invalid token"})
+        return False
+
+    def _job(self, parts) -> Optional[Job]:
+        job = self.server.jobs.jobs.get(parts[1]) if len(parts) > 1 else None
+        if job is None:
+            self._send(404, {"error": "job not found"})
+        return job
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        server = self.server.jobs
+        parts = self.path.strip("/").split("/")
+        if parts == ["health"]:
+            return self._send(200, server.health())
+        if parts == ["jobs"]:
+            return self._send(200, {"jobs": [job.to_dict() for job in list(server.jobs.values())]})
+        if parts[0] != "jobs" or len(parts) > 3:
+            return self._send(404, {"error": "not found"})
+
+        job = self._job(parts)
+        if job is None:
+            return
+        if len(parts) == 2:
+            return self._send(200, job.to_dict())
+        if parts[2] != "events":
+            return self._send(404, {"error": "not found"})
+
+        # Close-delimited stream of JSON lines
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            for event in job.follow():
+                self.wfile.write(json.dumps(event).encode() + b"\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if self.path.strip("/") != "jobs":
+            return self._send(404, {"error": "not found"})
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type != "application/json":
+            return self._send(415, {"error": "expected Content-Type: application/json"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            job = self.server.jobs.submit(
+                body.get("type", ""), body.get("params", {}), int(body.get("priority", 0))
+            )
+        except (ValueError, TypeError) as e:
+            return self._send(400, {"error": str(e)})
+        self._send(202, job.to_dict())
+
+    def do_DELETE(self):
+        if not self._authorized():
+            return
+        parts = self.path.strip("/").split("/")
+        if parts[0] != "jobs" or len(parts) != 2:
+            return self._send(404, {"error": "not found"})
+        if self._job(parts) is not None:
+            self._send(200, self.server.jobs.cancel(parts[1]).to_dict())
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+class JobClient:
+    """Submit jobs to a running ``rife serve`` and follow their progress.
+
+    The access token is ``token`` if given, else ``$RIFE_SERVE_TOKEN``,
+    else read from the server's token file.
+    """
+
+    def __init__(
+        self,
+        address: str = DEFAULT_ADDRESS,
+        timeout: Optional[float] = None,
+        token: Optional[str] = None
+    ):
+        self.kind, self.target = parse_address(address)
+        self.timeout = timeout
+        self.address = address
+        self._token = token or os.environ.get(TOKEN_ENV)
+
+    @property
+    def token(self) -> str:
+        if self._token is None:
+            path = token_path(self.address)
+            try:
+                self._token = path.read_text().strip()
+            except OSError:
+                raise ConnectionError(
+                    f"No token for rife server at {self.address} ({path} not readable); "
+                    f"is it running as this user? Otherwise set {TOKEN_ENV}"
+                )
+        return self._token
+
+    def _headers(self, body: Optional[dict] = None) -> dict:
+        headers = {"Authorization": f"Bearer {self.token}"}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        return headers
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self.kind == "unix":
+            return _UnixHTTPConnection(self.target, timeout=self.timeout)
+        host, port = self.target
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _request(self, method: str, path: str, body: Optional[dict] = None) -> dict:
+        headers = self._headers(body)
+        conn = self._connection()
+        try:
+            conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+            response = conn.getresponse()
+            data = json.loads(response.read() or b"{}")
+        except OSError as e:
+            raise ConnectionError(f"Could not reach rife server at {self.kind}:{self.target}: {e}")
+        finally:
+            conn.close()
+        if response.status >= 400:
+            raise RuntimeError(f"Server error ({response.status}): {data.get('error')}")
+        return data
+
+    def health(self) -> dict:
+        return self._request("GET", "/health")
+
+    def submit(self, kind: str, params: dict, priority: int = 0) -> dict:
+        body = {"type": kind, "params": params, "priority": priority}
+        return self._request("POST", "/jobs", body)
+
+    def status(self, job_id: str) -> dict:
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def cancel(self, job_id: str) -> dict:
+        return self._request("DELETE", f"/jobs/{job_id}")
+
+    def events(self, job_id: str) -> Iterator[dict]:
+        """Stream a job's events until it finishes."""
+        headers = self._headers()
+        conn = self._connection()
+        try:
+            conn.request("GET", f"/jobs/{job_id}/events", headers=headers)
+            response = conn.getresponse()
+            if response.status >= 400:
+                raise RuntimeError(f"Server error ({response.status})")
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            conn.close()
+
+    def run(
+        self,
+        kind: str,
+        params: dict,
+        priority: int = 0,
+        progress_callback: Optional[Callable[[float], None]] = None
+    ) -> dict:
+        """Submit a job, wait for it and return its result."""
+        job = self.submit(kind, params, priority)
+        for event in self.events(job["id"]):
+            if event["event"] == "progress" and progress_callback:
+                progress_callback(event["progress"])
+            elif event["event"] == "done":
+                return event["result"]
+            elif event["event"] in ("failed", "cancelled"):
+                raise RuntimeError(f"Job {job['id']} {event['event']}: {event.get('error', '')}")
+        raise RuntimeError(f"Lost connection while following job {job['id']}")
@@ -0,0 +1,146 @@
+"""CPU Thread Autotuner"""
+
+import multiprocessing as mp
+import os
+import tempfile
+import threading
+import time
+from typing import List, Optional
+
+from src.utils.config import ThreadsConfig
+from src.utils.logger import log
+from src.utils.threads import available_cores
+
+
+def _trial_worker(input_path, profile, worker, max_frames, model, encoder, barrier, results):
+    """Run one worker of a trial in a fresh process (thread pools start clean)."""
+    from src.core.engine import RIFEEngine
+    from src.core.interpolator import RIFEInterpolator
+    from src.utils.threads import apply_thread_profile
+
+    try:
+        apply_thread_profile(profile, worker)
+        interpolator = RIFEInterpolator(engine=RIFEEngine(model=model), encoder=encoder)
+        interpolator.engine.load()
+        barrier.wait()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            stats = interpolator.process(
+                input_path,
+                os.path.join(tmpdir, "trial.mp4"),
+                max_frames=max_frames
+            )
+        results.put({"worker": worker, "frames": stats["input_frames"], "end": time.time()})
+    except Exception as e:
+        barrier.abort()
+        results.put({"worker": worker, "error": str(e)})
+
+
+class ThreadTuner:
+    """Measure interpolation throughput for candidate CPU thread splits.
+
+    Each trial runs ``workers`` concurrent interpolations in fresh processes,
+    each using the trial's torch / ffmpeg thread counts, and scores the
+    aggregate input frames per second.
+    """
+
+    def __init__(self, max_frames: int = 30, model=None, encoder=None, timeout: float = 600):
+        self.max_frames = max_frames
+        self.model = model
+        self.encoder = encoder
+        self.timeout = timeout
+
+    def candidates(self, cores: Optional[int] = None) -> List[ThreadsConfig]:
+        """Worker/thread splits that use all cores without oversubscribing."""
+        cores = cores or len(available_cores())
+        candidates = []
+
+        workers = 1
+        while workers <= cores:
+            threads = cores // workers
+            for ffmpeg_threads in sorted({1, max(1, threads // 2), threads}):
+                candidates.append(ThreadsConfig(
+                    torch_threads=threads,
+                    interop_threads=1,
+                    ffmpeg_threads=ffmpeg_threads,
+                    workers=workers,
+                    pin_cores=workers > 1
+                ))
+            workers *= 2
+
+        return candidates
+
+    def measure(self, input_path: str, profile: ThreadsConfig) -> dict:
+        """Run one trial and return its aggregate throughput."""
+        ctx = mp.get_context("spawn")
+        barrier = ctx.Barrier(profile.workers + 1)
+        results = ctx.Queue()
+
+        procs = [
+            ctx.Process(
+                target=_trial_worker,
+                args=(
+                    input_path, profile, worker, self.max_frames,
+                    self.model, self.encoder, barrier, results
+                )
+            )
+            for worker in range(profile.workers)
+        ]
+        for proc in procs:
+            proc.start()
+
+        # Start the clock once every worker has loaded its model
+        try:
+            barrier.wait(timeout=self.timeout)
+        except threading.BrokenBarrierError:
+            pass  # a worker failed; its error is collected below
+        start = time.time()
+
+        outcomes = [results.get(timeout=self.timeout) for _ in procs]
+        for proc in procs:
+            proc.join()
+
+        errors = [o["error"] for o in outcomes if "error" in o]
+        if errors:
+            raise RuntimeError(f"Trial failed: {errors[0]}")
+
+        frames = sum(o["frames"] for o in outcomes)
+        elapsed = max(o["end"] for o in outcomes) - start
+        return {
+            "profile": profile.model_dump(),
+            "frames": frames,
+            "elapsed": elapsed,
+            "fps": frames / elapsed if elapsed > 0 else 0,
+        }
+
+    def run(self, input_path: str, candidates: Optional[List[ThreadsConfig]] = None) -> dict:
+        """
+        Measure every candidate and pick the fastest.
+
+        Args:
+            input_path: Representative clip to interpolate
+            candidates: Thread splits to try (default: derived from core count)
+
+        Returns:
+            dict with all trials and the best profile
+        """
+        candidates = candidates or self.candidates()
+        trials = []
+
+        for profile in candidates:
+            log.debug(f"Trial: {profile.model_dump()}")
+            try:
+                trial = self.measure(input_path, profile)
+                trials.append(trial)
+                log.info(
+                    f"{profile.workers} worker(s) x {profile.torch_threads} torch / "
+                    f"{profile.ffmpeg_threads} ffmpeg threads: {trial['fps']:.1f} FPS"
+                )
+            except Exception as e:
+                log.warning(f"Trial failed for {profile.model_dump()}: {e}")
+
+        if not trials:
+            raise RuntimeError("No tuning trial completed")
+
+        best = max(trials, key=lambda t: t["fps"])
+        return {"cores": len(available_cores()), "trials": trials, "best": best["profile"]}
@@ -0,0 +1,271 @@
+"""Watch-Folder Ingestion"""
+
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.core.encoder import VideoEncoder
+from src.utils import telemetry
+from src.utils.logger import log
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".mov", ".avi", ".webm", ".flv", ".ts", ".m4v")
+
+LEDGER_NAME = ".rife_ledger.jsonl"
+
+
+class Ledger:
+    """Append-only JSON-lines record of processed input files.
+
+    A file is identified by its path, size and mtime, so a capture that is
+    replaced under the same name is processed again.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, int, int], dict] = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn write from a crash
+                    self._entries[(entry["path"], entry["size"], entry["mtime_ns"])] = entry
+
+    @staticmethod
+    def identity(path: Path) -> Tuple[str, int, int]:
+        stat = path.stat()
+        return str(path.resolve()), stat.st_size, stat.st_mtime_ns
+
+    def get(self, path: Path) -> Optional[dict]:
+        with self._lock:
+            return self._entries.get(self.identity(path))
+
+    def record(self, path: Path, status: str, **data) -> dict:
+        key = self.identity(path)
+        entry = {
+            "path": key[0], "size": key[1], "mtime_ns": key[2],
+            "status": status, "time": time.time(), **data,
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class FolderWatcher:
+    """Process new videos dropped into a folder, a few at a time.
+
+    The folder is polled; a file counts as finished once its size and
+    mtime have not changed for ``stable_polls`` consecutive polls, so
+    captures still being written are left alone. Finished files go to
+    ``process(input_path, output_path)`` on a pool of ``concurrency``
+    threads, and every outcome is appended to a :class:`Ledger` in the
+    output folder. Files already in the ledger are skipped, also after a
+    restart; failed files are retried only if they change.
+
+    By default each file is interpolated in-process with one model
+    (``version``, in ``cpu_mode``) shared by all workers; pass ``process``
+    to hand files elsewhere (e.g. to a ``rife serve`` job server).
+    """
+
+    def __init__(
+        self,
+        input_dir: str,
+        output_dir: str,
+        encoder: Optional[VideoEncoder] = None,
+        multi: int = 2,
+        scale: float = 1.0,
+        batch_size: int = 1,
+        concurrency: int = 1,
+        interval: float = 2.0,
+        stable_polls: int = 2,
+        suffix: str = "_interp",
+        extensions: Sequence[str] = VIDEO_EXTENSIONS,
+        ledger_path: Optional[str] = None,
+        model=None,
+        process: Optional[Callable[[str, str], dict]] = None,
+        version: Optional[str] = None,
+        fp16: bool = False,
+        cpu_mode: str = "fp32",
+        backend: str = "torch",
+        scene_detection: bool = True
+    ):
+        self.input_dir = Path(input_dir)
+        self.output_dir = Path(output_dir)
+        self.encoder = encoder or VideoEncoder()
+        self.multi = multi
+        self.scale = scale
+        self.batch_size = batch_size
+        self.version = version
+        self.fp16 = fp16
+        self.cpu_mode = cpu_mode
+        self.backend = backend
+        self.scene_detection = scene_detection
+        self.process = process or self._interpolate
+        self.concurrency = concurrency
+        self.interval = interval
+        self.stable_polls = stable_polls
+        self.suffix = suffix
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.ledger = Ledger(ledger_path or self.output_dir / LEDGER_NAME)
+
+        self._observed: Dict[Path, Tuple[Tuple[int, int], int]] = {}
+        self._inflight: Dict[Path, Future] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max(1, concurrency))
+        self._stop = threading.Event()
+        self.processed: List[dict] = []      # ledger entries written this session
+        self._source = model                # None: load ``version`` on first use
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self):
+        """The shared model, wrapped for ``cpu_mode`` once."""
+        with self._model_lock:
+            if self._model is None:
+                from src.core.engine import RIFEEngine
+
+                self._model = RIFEEngine(
+                    model=self._source, fp16=self.fp16, version=self.version,
+                    cpu_mode=self.cpu_mode
+                ).load()
+            return self._model
+
+    def _engine(self):
+        """Engine for one file (sharing :attr:`model` on the torch backend)."""
+        if self.backend == "onnx":
+            from src.core.onnx_backend import OnnxEngine
+            from src.core.weights import model_pool
+
+            return OnnxEngine(version=self.version, cache_dir=model_pool().store.root)
+        from src.core.engine import RIFEEngine
+
+        return RIFEEngine(
+            model=self.model, fp16=self.fp16, version=self.version, cpu_mode=self.cpu_mode
+        )
+
+    def _interpolate(self, input_path: str, output_path: str) -> dict:
+        from src.core.interpolator import RIFEInterpolator
+
+        interpolator = RIFEInterpolator(
+            engine=self._engine(), batch_size=self.batch_size, encoder=self.encoder,
+            scene_detection=self.scene_detection
+        )
+        return interpolator.process(input_path, output_path, multi=self.multi, scale=self.scale)
+
+    def output_path(self, input_path: Path) -> Path:
+        """``<stem>_<ext><suffix>.mp4``: ``a.mp4`` and ``a.mkv`` must not share an output."""
+        ext = input_path.suffix.lstrip(".").lower()
+        return self.output_dir / f"{input_path.stem}_{ext}{self.suffix}.mp4"
+
+    def _is_output(self, path: Path) -> bool:
+        # Our own outputs, when they land in the watched folder
+        return bool(self.suffix) and path.stem.endswith(self.suffix)
+
+    def _candidates(self) -> List[Path]:
+        try:
+            entries = sorted(self.input_dir.iterdir())
+        except FileNotFoundError:
+            return []
+        return [
+            path for path in entries
+            if path.is_file() and path.suffix.lower() in self.extensions
+            and not path.name.startswith(".") and not self._is_output(path)
+        ]
+
+    def poll(self) -> List[Path]:
+        """Scan once and queue every file that has become stable; returns them."""
+        for path in [p for p, future in self._inflight.items() if future.done()]:
+            del self._inflight[path]
+
+        queued = []
+        present = set()
+        for path in self._candidates():
+            present.add(path)
+            if path in self._inflight:
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            stamp = (stat.st_size, stat.st_mtime_ns)
+
+            previous, count = self._observed.get(path, (None, 0))
+            count = count + 1 if stamp == previous else 0
+            self._observed[path] = (stamp, count)
+            if count < self.stable_polls or stat.st_size == 0:
+                continue
+
+            if self.ledger.get(path) is not None:
+                continue
+            self._inflight[path] = self._pool.submit(self._handle, path)
+            queued.append(path)
+
+        # Forget files that were removed so a new one with the same name starts fresh
+        for path in list(self._observed):
+            if path not in present:
+                del self._observed[path]
+        return queued
+
+    def _handle(self, path: Path) -> dict:
+        output = self.output_path(path)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        log.info(f"Processing {path.name} -> {output}")
+        start = time.time()
+        try:
+            stats = self.process(str(path), str(output))
+        except Exception as e:
+            log.error(f"Failed to process {path.name}: {e}")
+            entry = self.ledger.record(path, "failed", error=str(e))
+        else:
+            elapsed = time.time() - start
+            log.success(f"Finished {path.name} in {elapsed:.1f}s")
+            entry = self.ledger.record(
+                path, "done", output=str(output), elapsed=elapsed, stats=stats
+            )
+        self.processed.append(entry)
+        telemetry.count("watch_files", status=entry["status"])
+        telemetry.observe("watch_file", time.time() - start)
+        return entry
+
+    def drain(self):
+        """Wait for every queued file to finish."""
+        for future in list(self._inflight.values()):
+            future.result()
+
+    def run(self, once: bool = False):
+        """
+        Poll until stopped (Ctrl+C or :meth:`stop`).
+
+        Args:
+            once: Process the files that are there now, then return
+        """
+        log.info(f"Watching {self.input_dir} ({len(self.ledger)} files in ledger)")
+        try:
+            if once:
+                # Enough polls for every file present now to prove it is stable
+                for n in range(self.stable_polls + 1):
+                    if n and self._stop.wait(self.interval):
+                        break
+                    self.poll()
+                self.drain()
+                return
+
+            while not self._stop.is_set():
+                self.poll()
+                self._stop.wait(self.interval)
+        finally:
+            self._pool.shutdown(wait=True)
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,331 @@
+"""Model Weight Cache and Residency"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from src.utils import telemetry
+from src.utils.logger import log
+
+DEFAULT_VERSION = "4.25"
+
+MODEL_URLS = {
+    "4.25": "https://github.com/hzwer/Practical-RIFE/releases/download/v4.25/flownet.pkl",
+    "4.25.lite": "https://github.com/hzwer/Practical-RIFE/releases/download/v4.25/flownet_lite.pkl",
+}
+
+# Where `rife setup` used to put the weights, whichever version was asked for
+LEGACY_WEIGHTS = Path("train_log/flownet.pkl")
+
+# Name the legacy file is cached under unless it matches a requested checksum
+LEGACY_VERSION = "legacy"
+
+# Weights RIFEEngine falls back to for a version that is not cached
+INSTALLED_WEIGHTS = Path("Practical-RIFE/train_log/flownet.pkl")
+
+
+def state_dict_bytes(state_dict: dict) -> int:
+    """Memory taken by the tensors of a state dict."""
+    return sum(
+        value.numel() * value.element_size()
+        for value in state_dict.values()
+        if hasattr(value, "element_size")
+    )
+
+
+class WeightStore:
+    """Content-addressed cache of model weights.
+
+    Each weight file is stored once as ``blobs/<sha256>.pkl`` under
+    ``root``; ``index.json`` maps version names to a blob, its size and
+    where it came from. Versions with identical weights share a blob, and
+    switching versions never overwrites anything.
+
+    Weights only load into the flownet code they were trained with, so a
+    version can also keep its own copy of the Practical-RIFE model code
+    (``code/<version>/*.py``, see :meth:`add_code`); versions without one
+    use the code installed in ``Practical-RIFE/train_log``.
+    """
+
+    def __init__(self, root: str = "models"):
+        self.root = Path(root)
+        self.index_path = self.root / "index.json"
+        self._lock = threading.Lock()
+
+    def versions(self) -> Dict[str, dict]:
+        if not self.index_path.exists():
+            return {}
+        with open(self.index_path) as f:
+            return json.load(f)
+
+    def __contains__(self, version: str) -> bool:
+        entry = self.versions().get(version)
+        return entry is not None and self.blob_path(entry["sha256"]).exists()
+
+    def sha256(self, version: str) -> Optional[str]:
+        """Checksum of the weights cached for ``version``, if any."""
+        entry = self.versions().get(version)
+        return entry["sha256"] if entry else None
+
+    def loaded_sha256(self, version: str) -> Optional[str]:
+        """Checksum of the weights an engine loads for ``version``.
+
+        That is the cached blob, or for a version that is not cached the
+        flownet installed in ``Practical-RIFE/train_log``; ``None`` if neither
+        exists.
+        """
+        if version in self:
+            return self.sha256(version)
+        if INSTALLED_WEIGHTS.exists():
+            return self.file_sha256(str(INSTALLED_WEIGHTS))
+        return None
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.root / "blobs" / f"{sha256}.pkl"
+
+    def path(self, version: str) -> Path:
+        entry = self.versions().get(version)
+        if entry is None or not self.blob_path(entry["sha256"]).exists():
+            raise RuntimeError(f"Model {version} is not cached. Run: rife setup --model {version}")
+        return self.blob_path(entry["sha256"])
+
+    def code_dir(self, version: str) -> Optional[Path]:
+        """The model code stored for ``version``, if any."""
+        path = self.root / "code" / re.sub(r"[^\w.-]", "_", version)
+        return path if (path / "RIFE_HDv3.py").exists() else None
+
+    def add_code(self, version: str, directory: str) -> Path:
+        """Store the model code in ``directory`` (a ``train_log``) for ``version``."""
+        sources = sorted(Path(directory).glob("*.py"))
+        if not any(source.name == "RIFE_HDv3.py" for source in sources):
+            raise ValueError(f"No RIFE_HDv3.py in {directory}")
+
+        path = self.root / "code" / re.sub(r"[^\w.-]", "_", version)
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for source in sources:
+            shutil.copyfile(source, tmp / source.name)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        log.info(f"Stored model code for {version} from {directory}")
+        return path
+
+    @staticmethod
+    def file_sha256(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def add(
+        self,
+        version: str,
+        path: str,
+        sha256: Optional[str] = None,
+        source: Optional[str] = None,
+        move: bool = False
+    ) -> Path:
+        """
+        Register a weight file under ``version``.
+
+        Args:
+            version: Version name, e.g. ``4.25``
+            path: Weight file to add
+            sha256: Expected checksum; a mismatch raises and nothing is stored
+            source: Where the file came from (URL or path), for the index
+            move: Move the file into the cache instead of copying it
+
+        Returns:
+            Path of the stored blob
+        """
+        actual = self.file_sha256(path)
+        if sha256 and actual != sha256.lower():
+            raise ValueError(f"Checksum mismatch for {version}: expected {sha256}, got {actual}")
+
+        blob = self.blob_path(actual)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        if not blob.exists():
+            tmp = blob.with_suffix(".tmp")
+            if move:
+                shutil.move(path, tmp)
+            else:
+                shutil.copyfile(path, tmp)
+            os.replace(tmp, blob)
+        elif move:
+            os.remove(path)
+
+        with self._lock:
+            index = self.versions()
+            index[version] = {
+                "sha256": actual,
+                "size": blob.stat().st_size,
+                "source": source or str(path),
+                "added": time.time(),
+            }
+            tmp = self.index_path.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump(index, f, indent=2)
+            os.replace(tmp, self.index_path)
+
+        log.info(f"Cached model {version} ({actual[:12]})")
+        return blob
+
+    def fetch(self, version: str, url: Optional[str] = None, sha256: Optional[str] = None) -> Path:
+        """Download ``version`` into the cache unless it is already there.
+
+        Weights from the old ``train_log/flownet.pkl`` location may be either
+        version, so they are only taken as ``version`` when they match
+        ``sha256``; otherwise they are kept under ``legacy``.
+        """
+        if version in self:
+            return self.path(version)
+        if LEGACY_WEIGHTS.exists():
+            if sha256 and self.file_sha256(str(LEGACY_WEIGHTS)) == sha256.lower():
+                return self.add(version, str(LEGACY_WEIGHTS), sha256=sha256)
+            if LEGACY_VERSION not in self:
+                self.add(LEGACY_VERSION, str(LEGACY_WEIGHTS))
+
+        url = url or MODEL_URLS.get(version)
+        if url is None:
+            raise ValueError(f"Unknown model version: {version}")
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".download")
+        os.close(fd)
+        try:
+            log.info(f"Downloading RIFE v{version} from {url}")
+            urllib.request.urlretrieve(url, tmp)
+            return self.add(version, tmp, sha256=sha256, source=url, move=True)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def verify(self, version: str) -> bool:
+        """Re-hash a cached blob and compare it with its address."""
+        entry = self.versions()[version]
+        return self.file_sha256(self.path(version)) == entry["sha256"]
+
+    def load_state_dict(self, version: str) -> dict:
+        """Load a version's weights to CPU, memory-mapped when the file format allows."""
+        import torch
+
+        path = self.path(version)
+        try:
+            # Pages are read on first touch and shared with other processes via the page cache
+            return torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+        except RuntimeError:
+            # Legacy (pre-zipfile) checkpoints cannot be mapped
+            return torch.load(path, map_location="cpu", weights_only=True)
+
+
+class ModelPool:
+    """Keep several loaded models resident under a memory budget.
+
+    :meth:`get` returns the model for a version, loading it on first use
+    into the model code stored for that version (or through
+    ``factory(state_dict)`` if one is given). When the resident models exceed
+    ``budget_bytes`` the least recently used are dropped (never the one
+    just requested). Engines already holding a dropped model keep using
+    it; it is freed once they let go.
+    """
+
+    def __init__(
+        self,
+        store: Optional[WeightStore] = None,
+        budget_bytes: int = 2 << 30,
+        factory: Optional[Callable[[dict], object]] = None
+    ):
+        self.store = store or WeightStore()
+        self.budget_bytes = budget_bytes
+        self.factory = factory
+        self._resident: "OrderedDict[str, tuple]" = OrderedDict()
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def resident(self) -> Dict[str, int]:
+        """Resident versions, least recently used first, with their size in bytes."""
+        with self._lock:
+            return {version: size for version, (_, size) in self._resident.items()}
+
+    def get(self, version: str):
+        with self._lock:
+            if version in self._resident:
+                self._resident.move_to_end(version)
+                return self._resident[version][0]
+            loading = self._loading.setdefault(version, threading.Lock())
+
+        # Concurrent requests for the same version wait for a single load
+        with loading:
+            with self._lock:
+                if version in self._resident:
+                    self._resident.move_to_end(version)
+                    return self._resident[version][0]
+
+            start = time.time()
+            state_dict = self.store.load_state_dict(version)
+            size = state_dict_bytes(state_dict)
+            if self.factory is not None:
+                model = self.factory(state_dict)
+            else:
+                model = _build_flownet(state_dict, self.store.code_dir(version))
+            log.info(f"Loaded model {version} ({size / 1e6:.0f} MB) in {time.time() - start:.1f}s")
+            telemetry.count("model_loads", version=version)
+
+            with self._lock:
+                self._resident[version] = (model, size)
+                self._evict(keep=version)
+                telemetry.gauge("model_resident_bytes", sum(s for _, s in self._resident.values()))
+            return model
+
+    def _evict(self, keep: str):
+        total = sum(size for _, size in self._resident.values())
+        for version in list(self._resident):
+            if total <= self.budget_bytes:
+                break
+            if version == keep:
+                continue
+            _, size = self._resident.pop(version)
+            total -= size
+            log.info(f"Evicted model {version} from memory ({size / 1e6:.0f} MB)")
+            telemetry.count("model_evictions", version=version)
+
+    def evict(self, version: str):
+        with self._lock:
+            self._resident.pop(version, None)
+
+
+def _build_flownet(state_dict: dict, code_dir: Optional[Path] = None):
+    """Practical-RIFE flownet with ``state_dict`` loaded into it."""
+    from src.core.engine import RIFEEngine
+
+    return RIFEEngine.build_model(state_dict, code_dir)
+
+
+_pool: Optional[ModelPool] = None
+
+
+def configure_pool(cache_dir: str = "models", budget_mb: int = 2048) -> ModelPool:
+    """Replace the process-wide pool (e.g. with settings from the config)."""
+    global _pool
+    _pool = ModelPool(WeightStore(cache_dir), budget_bytes=budget_mb << 20)
+    return _pool
+
+
+def model_pool() -> ModelPool:
+    """Process-wide model pool shared by every engine."""
+    global _pool
+    if _pool is None:
+        _pool = ModelPool()
+    return _pool
@@ -1,5 +1,5 @@
 """Frame Interpolation Pipeline using RIFE"""
-import argparse, os, sys, subprocess
+import argparse, os
 import cv2
 
 def get_video_info(path):
@@ -12,9 +12,9 @@ def get_video_info(path):
 def interpolate(input_path, output_path, multi=2):
     info = get_video_info(input_path)
     print(f"Input: {info['width']}x{info['height']} @ {info['fps']:.1f} FPS → {info['fps']*multi:.1f} FPS")
-    cmd = [sys.executable, "Practical-RIFE/inference_video.py", 
-           f"--multi={multi}", f"--video={input_path}", f"--output={output_path}"]
-    subprocess.run(cmd, check=True)
+    # In-process engine: all multi-1 timesteps of a pair share one forward pass
+    from src.core.interpolator import RIFEInterpolator
+    RIFEInterpolator().process(input_path, output_path, multi=multi)
     print(f"✓ Output: {output_path}")
 
 if __name__ == "__main__":
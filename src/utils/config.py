@@ -1,20 +1,155 @@
 """Configuration management."""
 
+import re
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 import yaml
 from pydantic import BaseModel
 
+DEFAULT_CONFIG_PATH = "configs/default.yaml"
+
 
 class ModelConfig(BaseModel):
     version: str = "4.25"
     weights_path: str = "train_log/flownet.pkl"
+    lite: bool = False
+    cache_dir: str = "models"               # content-addressed weight cache
+    memory_budget_mb: int = 2048            # resident models before LRU eviction
 
 
 class InterpolationConfig(BaseModel):
     default_multi: int = 2
     scale: float = 1.0
+    scene_detection: bool = True
+    fp16: bool = True                       # half precision (GPU only)
+    adaptive: bool = False                  # pick the scale per batch from its motion
+    motion_reach: float = 48.0              # flow pixels the finest scale is trusted with
+    motion_still: float = 8.0               # adaptive: below this, use the coarsest scale
+    target_fps: Optional[float] = None      # adaptive: coarsen to keep this many pairs/s
+
+
+# Engine execution modes on CPU (see src.core.cpu_modes)
+CPU_MODES = ("fp32", "channels_last", "bf16", "compile", "int8-dynamic", "int8-static")
+
+# Inference runtimes behind RIFEInterpolator (onnx: see src.core.onnx_backend)
+BACKENDS = ("torch", "onnx")
+
+
+class HardwareConfig(BaseModel):
+    gpu_id: int = 0
+    batch_size: int = 1                     # frame pairs per forward pass
+    cpu_mode: str = "fp32"                  # CPU inference mode, one of CPU_MODES
+    backend: str = "torch"                  # torch, or onnx (ONNX Runtime on CPU)
+
+
+class OutputConfig(BaseModel):
+    """Encoder settings for every video this tool writes."""
+    
+    codec: str = "libx264"
+    crf: int = 18
+    preset: str = "medium"
+    audio: bool = True
+    lossless: bool = False                  # qp 0 / lossless=1; ffv1 always is
+    pix_fmt: Optional[str] = "yuv420p"
+    gop: Optional[int] = 120                # keyframe interval (None: encoder default)
+    segment_frames: int = 0                 # >0: encode in parallel segments of this length
+    segment_workers: int = 4                # segments encoded concurrently
+
+
+class ThreadsConfig(BaseModel):
+    """CPU thread split; ``None`` leaves the library default."""
+    
+    torch_threads: Optional[int] = None     # torch intra-op threads
+    interop_threads: Optional[int] = None   # torch inter-op threads
+    ffmpeg_threads: Optional[int] = None    # ffmpeg decode/encode threads
+    workers: int = 1                        # parallel jobs sharing the machine
+    pin_cores: bool = False                 # pin each worker to its own cores
+
+
+class MetricsConfig(BaseModel):
+    default: List[str] = ["psnr", "ssim", "vmaf"]
+    vmaf_model: str = "vmaf_v0.6.1"
+    sample_every: int = 1                   # score every Nth frame (or frame group)
+
+
+class BenchmarkConfig(BaseModel):
+    resolutions: List[str] = ["720p", "1080p", "1440p"]
+    warmup_frames: int = 10                 # untimed pairs before measuring
+    test_duration: float = 5.0              # seconds of the clip to benchmark
+
+
+class LoggingConfig(BaseModel):
+    level: str = "INFO"
+    file_logging: bool = True
+    retention_days: int = 7
+
+
+class TelemetryConfig(BaseModel):
+    """Counters and timings streamed to JSONL / a Prometheus text file."""
+    
+    dir: Optional[str] = None               # enables telemetry when set
+    capacity: int = 65536                   # ring buffer events
+    flush_interval: float = 1.0             # seconds
+
+
+class HudConfig(BaseModel):
+    cache_dir: str = "data/hud"             # one mask PNG per game and resolution
+    threshold: int = 12                     # max pixel change that still counts as static
+    samples: int = 48                       # frames compared across the clip
+    margin: int = 2                         # pixels at HUD edges left to the model
+    tile: int = 64                          # model skips tiles that are entirely static
+
+
+class FrameCacheConfig(BaseModel):
+    dir: Optional[str] = None               # enables the synthesized-frame cache when set
+    max_mb: int = 10240                     # least recently used frames are evicted past this
+
+
+class GameConfig(BaseModel):
+    name: str
+    id: str
+
+
+class ProfileConfig(BaseModel):
+    """Named bundle of per-section overrides, e.g. ``{"output": {"preset": "veryfast"}}``."""
+    
+    description: str = ""
+    interpolation: Dict[str, Any] = {}
+    hardware: Dict[str, Any] = {}
+    threads: Dict[str, Any] = {}
+    output: Dict[str, Any] = {}
+    metrics: Dict[str, Any] = {}
+    benchmark: Dict[str, Any] = {}
+
+
+# Built-in profiles; a ``profiles`` section in the YAML can override or add to them
+PROFILES = {
+    "fast": ProfileConfig(
+        description="Half-resolution flow, batched inference, quick encode",
+        interpolation={"scale": 0.5},
+        hardware={"batch_size": 4},
+        threads={"workers": 2},
+        output={"preset": "veryfast", "crf": 22},
+        metrics={"sample_every": 4},
+    ),
+    "quality": ProfileConfig(
+        description="Full-resolution flow in fp32, slow near-transparent encode",
+        interpolation={"scale": 1.0, "fp16": False},
+        hardware={"batch_size": 1},
+        threads={"workers": 1},
+        output={"preset": "slow", "crf": 14},
+        metrics={"sample_every": 1},
+    ),
+    "realtime": ProfileConfig(
+        description="Lowest latency: one pair at a time, pinned cores, fastest encode",
+        interpolation={"scale": 0.5},
+        hardware={"batch_size": 1},
+        threads={"workers": 1, "pin_cores": True},
+        output={"preset": "ultrafast", "crf": 23},
+        metrics={"sample_every": 8},
+    ),
+}
 
 
 class Config(BaseModel):
@@ -22,6 +157,18 @@ class Config(BaseModel):
     
     model: ModelConfig = ModelConfig()
     interpolation: InterpolationConfig = InterpolationConfig()
+    output: OutputConfig = OutputConfig()
+    threads: ThreadsConfig = ThreadsConfig()
+    hardware: HardwareConfig = HardwareConfig()
+    metrics: MetricsConfig = MetricsConfig()
+    benchmark: BenchmarkConfig = BenchmarkConfig()
+    logging: LoggingConfig = LoggingConfig()
+    telemetry: TelemetryConfig = TelemetryConfig()
+    hud: HudConfig = HudConfig()
+    frame_cache: FrameCacheConfig = FrameCacheConfig()
+    games: List[GameConfig] = []
+    profile: Optional[str] = None           # profile applied by default
+    profiles: Dict[str, ProfileConfig] = {}
     
     def __init__(self, config_path: Optional[str] = None, **kwargs):
         if config_path and Path(config_path).exists():
@@ -30,3 +177,41 @@ class Config(BaseModel):
             super().__init__(**data, **kwargs)
         else:
             super().__init__(**kwargs)
+    
+    def available_profiles(self) -> Dict[str, ProfileConfig]:
+        return {**PROFILES, **self.profiles}
+    
+    def with_profile(self, name: str) -> "Config":
+        """Copy of this config with a named profile's overrides applied."""
+        profiles = self.available_profiles()
+        if name not in profiles:
+            raise ValueError(f"Unknown profile '{name}' (available: {', '.join(sorted(profiles))})")
+        
+        data = self.model_dump()
+        for section, overrides in profiles[name].model_dump(exclude={"description"}).items():
+            fields = type(getattr(self, section)).model_fields
+            unknown = set(overrides) - set(fields)
+            if unknown:
+                raise ValueError(
+                    f"Profile '{name}' sets unknown {section} key(s): {', '.join(sorted(unknown))}"
+                )
+            data[section].update(overrides)
+        data["profile"] = name
+        return Config(**data)
+    
+    @staticmethod
+    def save_section(config_path: str, name: str, data: dict):
+        """Replace (or append) one top-level section, keeping the rest of the file intact."""
+        path = Path(config_path)
+        text = path.read_text() if path.exists() else ""
+        block = yaml.safe_dump({name: data}, sort_keys=False)
+        
+        # Top-level key plus every indented/blank line that follows it
+        pattern = re.compile(rf"^{re.escape(name)}:.*\n(?:(?:[ \t]+.*|[ \t]*)(?:\n|$))*", re.M)
+        if pattern.search(text):
+            text = pattern.sub(lambda _: block + "\n", text, count=1)
+        else:
+            text = text.rstrip("\n") + ("\n\n" if text else "") + block
+        
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
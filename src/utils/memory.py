@@ -0,0 +1,100 @@
+"""Memory usage tracking."""
+
+import os
+import resource
+import sys
+import threading
+
+import torch
+from torch.multiprocessing.reductions import StorageWeakRef
+from torch.utils._python_dispatch import TorchDispatchMode
+from torch.utils._pytree import tree_flatten
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        # No procfs (macOS): fall back to the lifetime high-water mark
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+class PeakRSSSampler:
+    """Sample RSS on a background thread and keep the peak.
+
+    Unlike ``ru_maxrss`` this gives the peak of one region of code, so runs
+    measured one after another in the same process don't inherit each
+    other's high-water mark.
+
+    Example:
+        with PeakRSSSampler() as rss:
+            run()
+        print(rss.peak)
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.baseline = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        self.baseline = self.peak = current_rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+        return False
+
+
+class TorchAllocationTracker(TorchDispatchMode):
+    """Track the peak bytes of live CPU tensor storage created inside the block.
+
+    Every tensor returned by an ATen op is recorded by its storage; storages
+    are dropped from the live set once they are garbage collected. This adds
+    Python overhead to each op, so use it on a separate pass rather than
+    the one being timed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.current = 0
+        self.peak = 0
+        self._live = {}
+
+    def _release_expired(self):
+        for key, (ref, nbytes) in list(self._live.items()):
+            if ref.expired():
+                del self._live[key]
+                self.current -= nbytes
+
+    def __torch_dispatch__(self, func, types, args=(), kwargs=None):
+        out = func(*args, **(kwargs or {}))
+        self._release_expired()
+
+        for tensor in tree_flatten(out)[0]:
+            if not isinstance(tensor, torch.Tensor) or tensor.device.type != "cpu":
+                continue
+            storage = tensor.untyped_storage()
+            key = storage._cdata
+            if key not in self._live:
+                self._live[key] = (StorageWeakRef(storage), storage.nbytes())
+                self.current += storage.nbytes()
+                self.peak = max(self.peak, self.current)
+
+        return out
@@ -0,0 +1,134 @@
+"""Profiling hooks exporting Chrome traces."""
+
+import cProfile
+import json
+import os
+import pstats
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from src.utils.logger import log
+from src.utils.telemetry import timer
+
+_session = None
+
+
+@contextmanager
+def span(name: str):
+    """Mark a pipeline stage in the trace and time it as ``stage`` telemetry.
+
+    A no-op unless a profile session or telemetry sink is running.
+    """
+    if _session is None:
+        with timer("stage", stage=name):
+            yield
+        return
+
+    from torch.profiler import record_function
+
+    with record_function(f"stage:{name}"), timer("stage", stage=name):
+        yield
+
+
+class ProfileSession:
+    """Run code under cProfile and torch.profiler (CPU) and write one merged trace.
+
+    The torch trace supplies the timeline: torch ops plus the ``stage:*``
+    spans recorded by :func:`span`. cProfile has no timeline, so its
+    per-function self time is laid out as a bar chart on a separate
+    "cProfile" track over the same time range. The raw cProfile stats are
+    also written next to the trace as ``<name>.prof`` for pstats / snakeviz.
+
+    Example:
+        session = ProfileSession("trace.json")
+        session.start()
+        run()
+        session.stop()
+    """
+
+    def __init__(self, output_path: str, top: int = 200):
+        self.output_path = Path(output_path)
+        self.top = top
+        self._cprofile = None
+        self._torch = None
+
+    def start(self):
+        global _session
+        from torch.profiler import ProfilerActivity, profile
+
+        self._torch = profile(activities=[ProfilerActivity.CPU])
+        self._torch.__enter__()
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+        _session = self
+
+    def stop(self) -> Path:
+        global _session
+        _session = None
+        self._cprofile.disable()
+        self._torch.__exit__(None, None, None)
+
+        fd, tmp = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            self._torch.export_chrome_trace(tmp)
+            with open(tmp) as f:
+                trace = json.load(f)
+        finally:
+            os.remove(tmp)
+
+        trace["traceEvents"].extend(self._cprofile_events(trace["traceEvents"]))
+
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.output_path, "w") as f:
+            json.dump(trace, f)
+
+        stats_path = self.output_path.with_suffix(".prof")
+        self._cprofile.dump_stats(str(stats_path))
+
+        log.info(f"Profile trace saved to: {self.output_path} (cProfile stats: {stats_path})")
+        return self.output_path
+
+    def _cprofile_events(self, torch_events: list) -> list:
+        """Self time per function as back-to-back slices starting at the trace start."""
+        timed = [e["ts"] for e in torch_events if e.get("ph") == "X"]
+        ts = min(timed) if timed else 0.0
+        pid = "cProfile"
+
+        events = [
+            {"ph": "M", "name": "process_name", "pid": pid, "tid": 0,
+             "args": {"name": "cProfile (self time per function, not a timeline)"}},
+            {"ph": "M", "name": "process_sort_index", "pid": pid, "tid": 0,
+             "args": {"sort_index": -1}},
+        ]
+
+        rows = sorted(
+            pstats.Stats(self._cprofile).stats.items(),
+            key=lambda item: item[1][2],
+            reverse=True
+        )
+        other = sum(row[2] for _, row in rows[self.top:])
+
+        for (filename, line, func), (_, ncalls, tottime, cumtime, _) in rows[:self.top]:
+            if tottime <= 0:
+                continue
+            events.append({
+                "ph": "X", "cat": "cprofile", "name": func, "pid": pid, "tid": 0,
+                "ts": ts, "dur": tottime * 1e6,
+                "args": {
+                    "location": f"{filename}:{line}",
+                    "ncalls": ncalls,
+                    "tottime_ms": tottime * 1e3,
+                    "cumtime_ms": cumtime * 1e3,
+                },
+            })
+            ts += tottime * 1e6
+
+        if other > 0:
+            events.append({
+                "ph": "X", "cat": "cprofile", "name": "(other)", "pid": pid, "tid": 0,
+                "ts": ts, "dur": other * 1e6, "args": {},
+            })
+
+        return events
@@ -1,24 +1,25 @@
 """Environment setup utilities."""
 
 import subprocess
-import urllib.request
 from pathlib import Path
 from typing import Callable, Optional
 
 from src.utils.logger import log
 
 
-MODEL_URLS = {
-    "4.25": "https://github.com/hzwer/Practical-RIFE/releases/download/v4.25/flownet.pkl",
-    "4.25.lite": "https://github.com/hzwer/Practical-RIFE/releases/download/v4.25/flownet_lite.pkl",
-}
-
-
 def setup_environment(
     model_version: str = "4.25",
-    progress_callback: Optional[Callable[[str], None]] = None
+    progress_callback: Optional[Callable[[str], None]] = None,
+    cache_dir: str = "models",
+    code_dir: Optional[str] = None
 ):
-    """Setup RIFE environment."""
+    """Setup RIFE environment.
+
+    ``code_dir`` is the ``train_log`` directory with this version's
+    flownet code; it is stored next to the weights so versions with
+    different architectures can be loaded side by side.
+    """
+    from src.core.weights import WeightStore
     
     def update(msg: str):
         if progress_callback:
@@ -38,30 +39,22 @@ def setup_environment(
     else:
         update("Practical-RIFE already exists")
     
-    # Download model
-    train_log = Path("train_log")
-    train_log.mkdir(exist_ok=True)
-    
-    model_path = train_log / "flownet.pkl"
-    
-    if not model_path.exists():
-        if model_version not in MODEL_URLS:
-            raise ValueError(f"Unknown model version: {model_version}")
-        
-        url = MODEL_URLS[model_version]
-        update(f"Downloading RIFE v{model_version}...")
-        
-        urllib.request.urlretrieve(url, model_path)
-        log.success(f"Downloaded model to {model_path}")
+    # Weights live in the content-addressed cache; versions sit side by side
+    store = WeightStore(cache_dir)
+    if model_version in store:
+        update(f"RIFE v{model_version} already cached")
     else:
-        update("Model weights already exist")
-    
-    # Copy to Practical-RIFE
-    rife_train_log = rife_path / "train_log"
-    rife_train_log.mkdir(exist_ok=True)
-    
-    import shutil
-    if not (rife_train_log / "flownet.pkl").exists():
-        shutil.copy(model_path, rife_train_log / "flownet.pkl")
+        update(f"Downloading RIFE v{model_version}...")
+        path = store.fetch(model_version)
+        log.success(f"Cached model at {path}")
+    
+    if code_dir:
+        update(f"Storing model code for v{model_version}...")
+        store.add_code(model_version, code_dir)
+    elif store.code_dir(model_version) is None:
+        log.info(
+            f"v{model_version} will use the model code in {rife_path / 'train_log'}; "
+            "pass --code to store its own"
+        )
     
     update("Setup complete!")
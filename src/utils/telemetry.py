@@ -0,0 +1,230 @@
+"""Structured telemetry: counters, gauges and timings off the hot path."""
+
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from src.utils.logger import log
+
+_sink = None
+
+# Upper bounds (seconds) of the Prometheus histogram buckets for timings
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def active() -> bool:
+    """Whether a :class:`TelemetrySink` is collecting."""
+    return _sink is not None
+
+
+def count(name: str, value: float = 1, **labels):
+    """Add to a counter; a no-op unless a sink is running."""
+    if _sink is not None:
+        _sink.record("counter", name, value, labels)
+
+
+def gauge(name: str, value: float, **labels):
+    """Set a gauge to its latest value; a no-op unless a sink is running."""
+    if _sink is not None:
+        _sink.record("gauge", name, value, labels)
+
+
+def observe(name: str, seconds: float, **labels):
+    """Record one timing; a no-op unless a sink is running."""
+    if _sink is not None:
+        _sink.record("timing", name, seconds, labels)
+
+
+@contextmanager
+def timer(name: str, **labels):
+    """Time the enclosed block as one ``observe(name, ...)``."""
+    if _sink is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _sink.record("timing", name, time.perf_counter() - start, labels)
+
+
+def _metric_name(name: str) -> str:
+    return "rife_" + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...], le: Optional[str] = None) -> str:
+    pairs = list(labels) + ([("le", le)] if le is not None else [])
+    if not pairs:
+        return ""
+    escaped = (
+        (key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in pairs
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+class TelemetrySink:
+    """Collect telemetry events in a ring buffer and flush them from a background thread.
+
+    Recording an event only appends a tuple to a bounded ``deque``; all
+    formatting and I/O happens on the flush thread every ``interval``
+    seconds. Each flush appends the new events to ``jsonl_path`` and
+    rewrites ``prometheus_path`` (atomically, for node_exporter's textfile
+    collector) with running totals: counters as ``rife_<name>_total``,
+    gauges as ``rife_<name>`` and timings as ``rife_<name>_seconds``
+    histograms. If producers outrun the flusher the oldest events are
+    overwritten; the loss is reported as ``rife_telemetry_dropped_events_total``.
+
+    Example:
+        sink = TelemetrySink("logs/telemetry/events.jsonl", "logs/telemetry/rife.prom")
+        sink.start()
+        run()
+        sink.stop()
+    """
+
+    def __init__(
+        self,
+        jsonl_path: Optional[str] = None,
+        prometheus_path: Optional[str] = None,
+        capacity: int = 65536,
+        interval: float = 1.0
+    ):
+        self.jsonl_path = Path(jsonl_path) if jsonl_path else None
+        self.prometheus_path = Path(prometheus_path) if prometheus_path else None
+        self.capacity = capacity
+        self.interval = interval
+        self.dropped = 0
+
+        self._buffer = deque(maxlen=capacity)
+        self._seq = itertools.count()           # next() is atomic, unlike ``dropped += 1``
+        self._next_seq = 0                      # sequence number the flush thread expects next
+        self._counters: Dict[tuple, float] = {}
+        self._gauges: Dict[tuple, float] = {}
+        self._timings: Dict[tuple, list] = {}     # key -> [count, sum, bucket counts...]
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, kind: str, name: str, value: float, labels: dict):
+        # deque.append is thread-safe; everything else waits for the flush thread,
+        # which counts the events the ring buffer overwrote from gaps in the sequence
+        self._buffer.append((next(self._seq), time.time(), kind, name, value, labels))
+
+    def start(self) -> "TelemetrySink":
+        global _sink
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+        _sink = self
+        return self
+
+    def stop(self):
+        global _sink
+        if _sink is self:
+            _sink = None
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except OSError as e:
+                log.warning(f"Telemetry flush failed: {e}")
+
+    def flush(self) -> int:
+        """Write out buffered events now; returns how many were written."""
+        with self._flush_lock:
+            events = []
+            try:
+                while True:
+                    events.append(self._buffer.popleft())
+            except IndexError:
+                pass
+
+            for seq, _, kind, name, value, labels in events:
+                if seq >= self._next_seq:
+                    self.dropped += seq - self._next_seq
+                    self._next_seq = seq + 1
+                else:
+                    self.dropped -= 1           # appended out of order: not lost after all
+                self._aggregate(kind, name, value, labels)
+
+            if self.jsonl_path and events:
+                self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.jsonl_path, "a") as f:
+                    f.write("".join(
+                        json.dumps({"ts": ts, "type": kind, "name": name, "value": value,
+                                    "labels": labels}, default=str) + "\n"
+                        for _, ts, kind, name, value, labels in events
+                    ))
+            if self.prometheus_path:
+                self._write_prometheus()
+            return len(events)
+
+    def _aggregate(self, kind: str, name: str, value: float, labels: dict):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        if kind == "counter":
+            self._counters[key] = self._counters.get(key, 0) + value
+        elif kind == "gauge":
+            self._gauges[key] = value
+        elif kind == "timing":
+            stats = self._timings.setdefault(key, [0, 0.0] + [0] * len(BUCKETS))
+            stats[0] += 1
+            stats[1] += value
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    stats[2 + i] += 1
+
+    def snapshot(self) -> dict:
+        """Running totals as plain dicts keyed by ``(name, labels)``."""
+        with self._flush_lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timings": {key: {"count": s[0], "sum": s[1]} for key, s in self._timings.items()},
+                "dropped": self.dropped,
+            }
+
+    def prometheus_text(self) -> str:
+        lines = []
+
+        def family(metrics: dict, suffix: str, kind: str):
+            seen = set()
+            for (name, labels), value in sorted(metrics.items()):
+                metric = _metric_name(name) + suffix
+                if metric not in seen:
+                    lines.append(f"# TYPE {metric} {kind}")
+                    seen.add(metric)
+                yield metric, labels, value
+
+        for metric, labels, value in family(self._counters, "_total", "counter"):
+            lines.append(f"{metric}{_labels(labels)} {value:g}")
+        for metric, labels, value in family(self._gauges, "", "gauge"):
+            lines.append(f"{metric}{_labels(labels)} {value:g}")
+        for metric, labels, stats in family(self._timings, "_seconds", "histogram"):
+            for bound, hits in zip(BUCKETS, stats[2:]):
+                lines.append(f"{metric}_bucket{_labels(labels, f'{bound:g}')} {hits}")
+            lines.append(f"{metric}_bucket{_labels(labels, '+Inf')} {stats[0]}")
+            lines.append(f"{metric}_sum{_labels(labels)} {stats[1]:.9g}")
+            lines.append(f"{metric}_count{_labels(labels)} {stats[0]}")
+
+        lines.append("# TYPE rife_telemetry_dropped_events_total counter")
+        lines.append(f"rife_telemetry_dropped_events_total {self.dropped}")
+        return "\n".join(lines) + "\n"
+
+    def _write_prometheus(self):
+        self.prometheus_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.prometheus_path.with_suffix(".tmp")
+        tmp.write_text(self.prometheus_text())
+        os.replace(tmp, self.prometheus_path)
@@ -0,0 +1,109 @@
+"""CPU thread and affinity settings."""
+
+import os
+from typing import List, Optional
+
+from src.utils.config import ThreadsConfig
+from src.utils.logger import log
+
+_active = ThreadsConfig()
+
+
+def available_cores() -> List[int]:
+    """CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def worker_cores(profile: ThreadsConfig, worker: int = 0) -> List[int]:
+    """Disjoint slice of the available CPUs for one of ``profile.workers`` workers."""
+    cores = available_cores()
+    per_worker = max(1, len(cores) // max(profile.workers, 1))
+    start = (worker * per_worker) % len(cores)
+    return cores[start:start + per_worker]
+
+
+def rescale_profile(profile: ThreadsConfig, jobs: int = 1) -> ThreadsConfig:
+    """``profile`` with its thread counts spread over ``jobs`` concurrent jobs.
+
+    A profile's thread counts are per worker, for ``profile.workers``
+    workers sharing the machine (as ``rife tune`` measured them). A process
+    running a different number of jobs at once gets the same total,
+    divided between its jobs and capped at the available cores.
+    """
+    jobs = max(jobs, 1)
+    if profile.workers == jobs:
+        return profile
+    cores = len(available_cores())
+
+    def rescale(threads: Optional[int]) -> Optional[int]:
+        if not threads:
+            return threads
+        return max(1, min(cores, threads * profile.workers // jobs))
+
+    return profile.model_copy(update={
+        "torch_threads": rescale(profile.torch_threads),
+        "ffmpeg_threads": rescale(profile.ffmpeg_threads),
+        "workers": jobs,
+    })
+
+
+def apply_thread_profile(
+    profile: ThreadsConfig,
+    worker: Optional[int] = None,
+    ffmpeg_only: bool = False,
+    jobs: int = 1
+):
+    """Apply a thread split to torch, OpenCV and subsequent ffmpeg calls.
+
+    ``worker`` is given by one of ``profile.workers`` parallel worker
+    processes, which use the profile as is; cores are only pinned
+    (``pin_cores``) for them. Otherwise the thread counts are rescaled
+    for the ``jobs`` this process runs at once (see
+    :func:`rescale_profile`), so a single run keeps every core.
+    ``ffmpeg_only`` skips torch / OpenCV (and their import) for commands
+    that only run ffmpeg.
+    """
+    global _active
+    if worker is None:
+        profile = rescale_profile(profile, jobs)
+    _active = profile
+
+    if profile.pin_cores and worker is not None and hasattr(os, "sched_setaffinity"):
+        cores = worker_cores(profile, worker)
+        os.sched_setaffinity(0, cores)
+        log.debug(f"Pinned worker {worker} to cores {cores}")
+
+    if ffmpeg_only:
+        return
+
+    import cv2
+    import torch
+
+    if profile.torch_threads:
+        torch.set_num_threads(profile.torch_threads)
+        cv2.setNumThreads(profile.torch_threads)
+
+    if profile.interop_threads and torch.get_num_interop_threads() != profile.interop_threads:
+        try:
+            torch.set_num_interop_threads(profile.interop_threads)
+        except RuntimeError:
+            # Only settable before the first inter-op parallel work in this process
+            log.debug("Inter-op threads already initialized; keeping current setting")
+
+    log.debug(
+        f"Threads: torch={torch.get_num_threads()}, interop={torch.get_num_interop_threads()}, "
+        f"ffmpeg={profile.ffmpeg_threads or 'auto'}"
+    )
+
+
+def active_profile() -> ThreadsConfig:
+    """Thread split most recently applied in this process."""
+    return _active
+
+
+def ffmpeg_thread_args(threads: Optional[int] = None) -> List[str]:
+    """``-threads`` arguments for the active profile (empty when unset)."""
+    threads = threads or _active.ffmpeg_threads
+    return ["-threads", str(threads)] if threads else []
@@ -0,0 +1,60 @@
+"""Shared test fixtures."""
+
+import cv2
+import numpy as np
+import pytest
+
+
+class StubModel:
+    """Stand-in for the RIFE flownet: linear blend of the two frames."""
+    
+    def inference(self, img0, img1, timestep=0.5, scale=1.0):
+        return img0 * (1 - timestep) + img1 * timestep
+
+
+class ConvModel:
+    """Small conv network behind the flownet interface, for code that needs real torch layers."""
+    
+    def __init__(self):
+        import torch
+        import torch.nn as nn
+        
+        torch.manual_seed(0)
+        self.flownet = nn.Sequential(
+            nn.Conv2d(7, 16, 3, padding=1), nn.PReLU(16),
+            nn.Conv2d(16, 3, 3, padding=1), nn.Sigmoid(),
+        ).eval()
+    
+    def inference(self, img0, img1, timestep=0.5, scale=1.0):
+        import torch
+        
+        t = img0[:, :1] * 0 + timestep
+        return self.flownet(torch.cat([img0, img1, t], 1))
+
+
+def write_clip(path, frames=8, size=(64, 48), fps=30):
+    """Write a tiny synthetic clip with a moving square."""
+    width, height = size
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    for n in range(frames):
+        frame = np.full((height, width, 3), 40, dtype=np.uint8)
+        x = (n * 4) % (width - 16)
+        frame[8:24, x:x + 16] = (0, 100, 255)
+        out.write(frame)
+    out.release()
+    return str(path)
+
+
+@pytest.fixture
+def stub_model():
+    return StubModel()
+
+
+@pytest.fixture
+def conv_model():
+    return ConvModel()
+
+
+@pytest.fixture
+def tiny_clip(tmp_path):
+    return write_clip(tmp_path / "tiny.mp4")
@@ -7,7 +7,9 @@ from src.cli import cli
 
 
 @pytest.fixture
-def runner():
+def runner(tmp_path, monkeypatch):
+    # setup_logger writes to ./logs; keep it out of the repo
+    monkeypatch.chdir(tmp_path)
     return CliRunner()
 
 
@@ -23,3 +25,93 @@ def test_cli_info(runner):
     result = runner.invoke(cli, ["info"])
     assert result.exit_code == 0
     assert "Python" in result.output
+
+
+def test_cli_profile_trace(runner, tmp_path):
+    """Test --profile writes a merged Chrome trace."""
+    import json
+    
+    trace_path = tmp_path / "trace.json"
+    result = runner.invoke(cli, ["--profile", str(trace_path), "info"])
+    assert result.exit_code == 0
+    
+    trace = json.loads(trace_path.read_text())
+    assert any(e.get("cat") == "cprofile" for e in trace["traceEvents"])
+    assert (tmp_path / "trace.prof").exists()
+
+
+def test_cli_serve_refuses_public_host(runner):
+    """Test serve won't bind a non-loopback host without --allow-remote."""
+    result = runner.invoke(cli, ["serve", "--host", "0.0.0.0"])
+    
+    assert result.exit_code != 0
+    assert "--allow-remote" in result.output
+
+
+def test_cli_interpolate_remote(runner, tmp_path, tiny_clip, stub_model):
+    """Test interpolate --remote submits to a running server."""
+    from src.core.engine import RIFEEngine
+    from src.core.server import JobServer
+    
+    server = JobServer(engine=RIFEEngine(model=stub_model)).start("127.0.0.1:0")
+    try:
+        output = tmp_path / "out.mp4"
+        result = runner.invoke(
+            cli, ["interpolate", tiny_clip, str(output), "--remote", server.address]
+        )
+    finally:
+        server.stop()
+    
+    assert result.exit_code == 0, result.output
+    assert "15" in result.output
+    assert output.exists()
+
+
+def test_cli_batch_rejects_zero_limit(runner, tmp_path):
+    """Test a stage limit of 0 is rejected instead of never scheduling the stage."""
+    manifest = tmp_path / "batch.yaml"
+    manifest.write_text("clips:\n  - {game: arc, source: a.mp4}\n")
+    
+    result = runner.invoke(cli, ["batch", str(manifest), "-l", "evaluate=0"])
+    assert result.exit_code == 2
+    assert "N >= 1" in result.output
+    
+    manifest.write_text("limits: {evaluate: 0}\nclips:\n  - {game: arc, source: a.mp4}\n")
+    result = runner.invoke(cli, ["batch", str(manifest)])
+    assert result.exit_code == 2
+    assert "evaluate=0" in result.output
+
+
+# Cumulative import time of src.cli; torch alone is well over this
+STARTUP_BUDGET_S = 1.0
+
+
+def test_cli_startup_budget():
+    """Test the CLI imports fast and without torch / OpenCV."""
+    import subprocess
+    import sys
+    from pathlib import Path
+    
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.cli"],
+        capture_output=True, text=True, cwd=Path(__file__).resolve().parent.parent
+    )
+    assert result.returncode == 0, result.stderr
+    
+    # "import time: self [us] | cumulative | <indent>module"
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, total, name = line.split("|")
+            if total.strip().isdigit():
+                cumulative[name.strip()] = int(total)
+    
+    assert "torch" not in cumulative and "cv2" not in cumulative
+    assert cumulative["src"] / 1e6 < STARTUP_BUDGET_S
+
+
+def test_cli_unknown_perf_profile(runner):
+    """Test -p rejects profiles that are not defined."""
+    result = runner.invoke(cli, ["-p", "turbo", "info"])
+    assert result.exit_code != 0
+    assert "Unknown profile" in result.output
@@ -1,5 +1,6 @@
 import pytest
 import os
+import shutil
 import tempfile
 from pathlib import Path
 
@@ -24,12 +25,154 @@ class TestInterpolator:
         assert "fps" in info
         assert "frames" in info
         assert info["fps"] > 0
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_process_with_stub_model(self, tiny_clip, stub_model, tmp_path):
+        from src.core.engine import RIFEEngine
+        from src.core.interpolator import RIFEInterpolator
+        
+        interpolator = RIFEInterpolator(engine=RIFEEngine(model=stub_model), batch_size=3)
+        stats = interpolator.process(tiny_clip, str(tmp_path / "out.mp4"), multi=4)
+        
+        assert stats["input_frames"] == 8
+        assert stats["output_frames"] == 29
+        assert stats["output_fps"] == pytest.approx(120)
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    @pytest.mark.parametrize("workers", [1, 3])
+    def test_failed_run_leaves_no_output(self, tiny_clip, stub_model, tmp_path, workers):
+        from src.core.encoder import VideoEncoder
+        from src.core.engine import RIFEEngine
+        from src.core.interpolator import RIFEInterpolator
+        from src.utils.config import OutputConfig
+        
+        class FailingModel:
+            calls = 0
+            
+            def inference(self, img0, img1, timestep=0.5, scale=1.0):
+                FailingModel.calls += 1
+                if FailingModel.calls == 3:
+                    raise ValueError("model failed")
+                return stub_model.inference(img0, img1, timestep, scale)
+        
+        encoder = VideoEncoder(OutputConfig(segment_frames=2, segment_workers=workers))
+        interpolator = RIFEInterpolator(engine=RIFEEngine(model=FailingModel()), encoder=encoder)
+        output = tmp_path / "out.mp4"
+        with pytest.raises(ValueError, match="model failed"):
+            interpolator.process(tiny_clip, str(output), multi=2)
+        
+        assert not output.exists()
+    
+    def test_retime_plan_fills_gaps(self):
+        from src.core.retime import retime_plan
+        
+        # 30 FPS capture that dropped the frame at 3/30
+        plan = retime_plan([0, 1 / 30, 2 / 30, 4 / 30, 5 / 30], fps=30)
+        assert plan == [(0, 0.0), (1, 0.0), (2, 0.0), (2, 0.5), (3, 0.0), (4, 0.0)]
+        
+        # Doubling places each tick mid-gap; a repeated timestamp counts once
+        plan = retime_plan([0, 1 / 30, 1 / 30, 2 / 30], fps=60)
+        assert [t for _, t in plan] == [0.0, 0.5, 0.0, 0.5, 0.0]
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_retime_vfr_capture(self, tiny_clip, stub_model, tmp_path):
+        import subprocess
+        from src.core.engine import RIFEEngine
+        from src.core.interpolator import RIFEInterpolator
+        from src.core.reader import passthrough_args
+        
+        # Drop frames 3 and 4 but keep the original timestamps
+        vfr = str(tmp_path / "vfr.mp4")
+        subprocess.run([
+            "ffmpeg", "-v", "error", "-i", tiny_clip, "-vf", "select='not(between(n,3,4))'",
+            *passthrough_args(), "-c:v", "mpeg4", "-q:v", "2", vfr
+        ], check=True)
+        
+        interpolator = RIFEInterpolator(engine=RIFEEngine(model=stub_model), batch_size=2)
+        stats = interpolator.retime(vfr, str(tmp_path / "out.mp4"), fps=30)
+        
+        assert stats["input_frames"] == 6
+        assert stats["input_fps"] == pytest.approx(30)
+        assert stats["output_frames"] == 8
+        assert stats["synthesized"] == 2
+        assert stats["gaps"] == 1
+    
+    @pytest.mark.parametrize("scene_detection", [True, False])
+    def test_scene_cut_repeats_frame(self, stub_model, scene_detection):
+        import cv2
+        import numpy as np
+        from src.core.engine import RIFEEngine
+        from src.core.interpolator import RIFEInterpolator
+        
+        rng = np.random.default_rng(0)
+        
+        def scene():
+            # Smooth texture, so a 2 px pan stays similar
+            noise = rng.integers(0, 256, (12, 16, 3), dtype=np.uint8)
+            return cv2.resize(noise, (64, 48), interpolation=cv2.INTER_CUBIC)
+        
+        menu, gameplay = scene(), scene()
+        moved = np.roll(gameplay, 2, axis=1)
+        
+        interpolator = RIFEInterpolator(
+            engine=RIFEEngine(model=stub_model), scene_detection=scene_detection
+        )
+        cut, motion = interpolator._synthesize(
+            [menu, gameplay], [gameplay, moved], [[0.25, 0.5]] * 2
+        )
+        
+        assert all(np.array_equal(frame, menu) for frame in cut) == scene_detection
+        assert not np.array_equal(motion[1], gameplay)
+        assert interpolator.scene_cuts == int(scene_detection)
 
 
 class TestMetrics:
     def test_import(self):
         from src.core.metrics import MetricsCalculator
         assert MetricsCalculator is not None
+    
+    def test_command_subsamples_vmaf_only(self, tmp_path):
+        from src.core.metrics import MetricsCalculator
+        
+        calc = MetricsCalculator(output_dir=str(tmp_path), sample_every=4)
+        cmd = calc.command("a.mp4", "b.mp4", ["psnr", "ssim", "vmaf"], "out.json")
+        assert cmd[:6] == ["ffmpeg-quality-metrics", "a.mp4", "b.mp4", "--metrics", "psnr", "ssim"]
+        assert cmd[cmd.index("--vmaf-subsample") + 1] == "4"
+        assert "--subsample" not in cmd
+        
+        cmd = calc.command("a.mp4", "b.mp4", ["psnr", "ssim"], "out.json")
+        assert "--vmaf-subsample" not in cmd
+        assert "--vmaf-subsample" not in MetricsCalculator(output_dir=str(tmp_path)).command(
+            "a.mp4", "b.mp4", ["vmaf"], "out.json"
+        )
+    
+    def test_frame_kernels(self):
+        import numpy as np
+        from src.core.metrics import psnr, ssim
+        
+        frame = np.random.default_rng(0).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+        noisy = np.clip(frame.astype(int) + 5, 0, 255).astype(np.uint8)
+        
+        assert psnr(frame, frame) == float("inf")
+        assert ssim(frame, frame) == pytest.approx(1.0)
+        assert 30 < psnr(frame, noisy) < 40
+        assert ssim(frame, noisy) < 1.0
+    
+    def test_frame_metrics_sampling(self, tmp_path):
+        from src.core.metrics import MetricsCalculator
+        from tests.conftest import write_clip
+        
+        clip = write_clip(tmp_path / "clip.mp4", frames=12)
+        full = MetricsCalculator(str(tmp_path)).frame_metrics(clip, clip, multi=2)
+        sampled = MetricsCalculator(str(tmp_path), sample_every=3).frame_metrics(clip, clip, multi=2)
+        
+        assert full["frames"] == 12 and full["synthesized_frames"] == 6
+        # Identical frames are capped rather than dropped from the mean
+        assert full["identical_frames"] == 12 and full["identical_synthesized"] == 6
+        assert full["psnr"] == full["psnr_synthesized"] == 100.0
+        # Groups 0 and 3 of 6: frames 0, 1, 6, 7
+        assert sampled["frames"] == 4 and sampled["synthesized_frames"] == 2
+        assert sampled["worst_frame"] in (1, 7)
 
 
 class TestBenchmark:
@@ -45,13 +188,1377 @@ class TestBenchmark:
         
         assert "gpu" in info
         assert "vram" in info
+    
+    def test_benchmark_memory(self, tiny_clip, stub_model, tmp_path):
+        from src.core.benchmark import Benchmarker
+        from src.core.engine import RIFEEngine
+        
+        bench = Benchmarker(output_dir=str(tmp_path), engine=RIFEEngine(model=stub_model))
+        result = bench.benchmark_resolution(tiny_clip, "tiny", batch_size=3)
+        
+        assert result["batch_size"] == 3
+        assert result["frames"] == 7
+        assert result["peak_rss_mb"] > 0
+        assert result["torch_peak_mb"] > 0
+        assert result["frame_buffer_mb"] > 0
+
+
+class TestRealtime:
+    def test_keeps_up(self, tiny_clip, stub_model):
+        from src.core.engine import RIFEEngine
+        from src.core.realtime import RealtimeSimulator
+        
+        sim = RealtimeSimulator(RIFEEngine(model=stub_model), fps=60, deadline_ms=500)
+        result = sim.run(tiny_clip)
+        
+        assert result["frames"] == 8
+        assert result["processed"] + result["dropped"] == 7
+        assert result["missed_deadlines"] == 0
+        assert result["latency_ms"]["p99"] < 500
+    
+    def test_slow_model_misses_deadlines(self, tiny_clip, stub_model):
+        import time
+        from src.core.engine import RIFEEngine
+        from src.core.realtime import RealtimeSimulator
+        
+        class SlowModel:
+            def inference(self, img0, img1, timestep=0.5, scale=1.0):
+                time.sleep(0.05)
+                return stub_model.inference(img0, img1, timestep, scale)
+        
+        sim = RealtimeSimulator(RIFEEngine(model=SlowModel()), fps=100, queue_size=1)
+        result = sim.run(tiny_clip)
+        
+        assert not result["realtime"]
+        assert result["missed_deadlines"] > 0 or result["dropped"] > 0
+
+
+class TestEngine:
+    def test_interpolate_batch(self, stub_model):
+        import numpy as np
+        from src.core.engine import RIFEEngine
+        
+        engine = RIFEEngine(model=stub_model, device="cpu")
+        black = np.zeros((48, 64, 3), dtype=np.uint8)
+        white = np.full((48, 64, 3), 200, dtype=np.uint8)
+        
+        result = engine.interpolate_batch([black, white], [white, black], multi=4)
+        
+        assert len(result) == 2
+        assert len(result[0]) == 3
+        assert result[0][0].shape == (48, 64, 3)
+        assert result[0][1][0, 0, 0] == 100
+        assert result[1][0][0, 0, 0] == 150
+    
+    def test_padded_size(self, stub_model):
+        from src.core.engine import RIFEEngine
+        
+        engine = RIFEEngine(model=stub_model, scale=0.5)
+        assert engine.padded_size(1080, 1920) == (1280, 2048)
+    
+    def test_interpolate_at_per_pair_timesteps(self, stub_model):
+        import numpy as np
+        from src.core.engine import RIFEEngine
+        
+        engine = RIFEEngine(model=stub_model, device="cpu")
+        black = np.zeros((48, 64, 3), dtype=np.uint8)
+        white = np.full((48, 64, 3), 200, dtype=np.uint8)
+        
+        out = engine.interpolate_at([black, black], [white, white], [[0.25, 0.5], [0.5]])
+        
+        assert [len(frames) for frames in out] == [2, 1]
+        assert out[0][0].mean() == pytest.approx(50, abs=1)
+        assert out[0][1].mean() == pytest.approx(100, abs=1)
+        assert out[1][0].mean() == pytest.approx(100, abs=1)
+    
+    def test_all_timesteps_in_one_pass(self, stub_model):
+        import numpy as np
+        import torch
+        from src.core.engine import RIFEEngine
+        
+        batches = []
+        
+        class RecordingModel:
+            def inference(self, img0, img1, timestep=0.5, scale=1.0):
+                batches.append(len(img0))
+                return stub_model.inference(img0, img1, timestep, scale)
+        
+        class ScalarModel:
+            def inference(self, img0, img1, timestep=0.5, scale=1.0):
+                if torch.is_tensor(timestep):
+                    raise TypeError("timestep must be a float")
+                return RecordingModel().inference(img0, img1, timestep, scale)
+        
+        black = np.zeros((48, 64, 3), dtype=np.uint8)
+        white = np.full((48, 64, 3), 200, dtype=np.uint8)
+        batched = RIFEEngine(model=RecordingModel(), device="cpu").interpolate_batch(
+            [black, white], [white, black], multi=8
+        )
+        assert batches == [14]
+        
+        batches.clear()
+        engine = RIFEEngine(model=ScalarModel(), device="cpu")
+        fallback = engine.interpolate_batch([black, white], [white, black], multi=8)
+        assert batches == [2] * 7
+        assert not engine.batch_timesteps
+        for pair, expected in zip(batched, fallback):
+            assert [frame[0, 0, 0] for frame in pair] == [frame[0, 0, 0] for frame in expected]
+        assert [frame[0, 0, 0] for frame in batched[0]] == [25, 50, 75, 100, 125, 150, 175]
+
+
+class TestCpuModes:
+    @pytest.mark.parametrize("mode", ["channels_last", "bf16", "int8-dynamic", "int8-static"])
+    def test_mode_close_to_fp32(self, conv_model, mode):
+        import torch
+        from src.core.cpu_modes import CpuModel
+        
+        img0, img1 = torch.rand(2, 3, 64, 64), torch.rand(2, 3, 64, 64)
+        with torch.inference_mode():
+            reference = conv_model.inference(img0, img1)
+            model = CpuModel(conv_model, mode, calibration_batches=2)
+            for _ in range(3):
+                out = model.inference(img0, img1)
+        
+        assert out.dtype == torch.float32
+        assert (out - reference).abs().mean() < 0.02
+        # The shared fp32 network is left untouched
+        assert conv_model.flownet[0].weight.is_contiguous()
+        if mode == "int8-static":
+            assert not model.calibrating
+            assert "quantized" in type(model.network[0].conv).__module__
+    
+    def test_compare_cpu_modes(self, tiny_clip, conv_model, tmp_path):
+        from src.core.benchmark import Benchmarker
+        from src.core.engine import RIFEEngine
+        
+        bench = Benchmarker(output_dir=str(tmp_path), engine=RIFEEngine(model=conv_model, device="cpu"))
+        results = bench.compare_cpu_modes(tiny_clip, ["int8-static"], batch_size=2)
+        
+        fp32, int8 = results["modes"]
+        assert results["pairs"] == 7
+        assert fp32["mode"] == "fp32" and fp32["max_diff"] == 0
+        assert int8["mode"] == "int8-static"
+        assert int8["psnr_vs_fp32"] > 25
+
+
+class TestOnnxBackend:
+    def test_matches_torch_engine(self, conv_model, tmp_path):
+        pytest.importorskip("onnxruntime")
+        import numpy as np
+        from src.core.engine import RIFEEngine
+        from src.core.onnx_backend import OnnxEngine
+        
+        rng = np.random.default_rng(0)
+        frames0 = [rng.integers(0, 255, (48, 64, 3), dtype=np.uint8) for _ in range(3)]
+        frames1 = [rng.integers(0, 255, (48, 64, 3), dtype=np.uint8) for _ in range(3)]
+        timesteps = [[0.25, 0.5], [0.5], [0.75]]
+        
+        onnx = OnnxEngine(cache_dir=str(tmp_path), model=conv_model)
+        out = onnx.interpolate_at(frames0, frames1, timesteps)
+        ref = RIFEEngine(model=conv_model, device="cpu").interpolate_at(frames0, frames1, timesteps)
+        
+        assert [len(steps) for steps in out] == [2, 1, 1]
+        for steps, ref_steps in zip(out, ref):
+            for frame, expected in zip(steps, ref_steps):
+                assert frame.shape == (48, 64, 3)
+                assert np.abs(frame.astype(np.int16) - expected).max() <= 1
+        # The exported graph is reused without a torch model
+        assert onnx.graph_path(128, 128).exists()
+        assert OnnxEngine(cache_dir=str(tmp_path)).interpolate(frames0[0], frames1[0])[0].shape == (48, 64, 3)
+    
+    def test_graphs_named_by_weights(self, tmp_path):
+        import torch
+        
+        from src.core.onnx_backend import OnnxEngine
+        from src.core.weights import WeightStore
+        
+        store = WeightStore(str(tmp_path))
+        names = []
+        for size in (4, 8):
+            torch.save({"block.weight": torch.zeros(size)}, tmp_path / "flownet.pkl")
+            store.add("4.25", str(tmp_path / "flownet.pkl"))
+            names.append(OnnxEngine(version="4.25", cache_dir=str(tmp_path)).graph_path(128, 128))
+        
+        assert names[0] != names[1]
+        assert names[1].name.startswith(f"4.25_{store.sha256('4.25')[:12]}_s1_")
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_interpolator_runs_onnx(self, tiny_clip, conv_model, tmp_path):
+        pytest.importorskip("onnxruntime")
+        from src.core.interpolator import RIFEInterpolator
+        from src.core.onnx_backend import OnnxEngine
+        
+        engine = OnnxEngine(cache_dir=str(tmp_path / "models"), model=conv_model)
+        stats = RIFEInterpolator(engine=engine, batch_size=2).process(
+            tiny_clip, str(tmp_path / "out.mp4"), multi=2
+        )
+        
+        assert stats["output_frames"] == 15
+    
+    def test_compare_reports_onnx_parity(self, tiny_clip, conv_model, tmp_path, monkeypatch):
+        pytest.importorskip("onnxruntime")
+        from src.core import weights
+        from src.core.benchmark import Benchmarker
+        from src.core.engine import RIFEEngine
+        
+        monkeypatch.setattr(weights, "_pool", weights.ModelPool(weights.WeightStore(str(tmp_path / "models"))))
+        bench = Benchmarker(output_dir=str(tmp_path), engine=RIFEEngine(model=conv_model, device="cpu"))
+        results = bench.compare_cpu_modes(tiny_clip, [], batch_size=2, onnx=True)
+        
+        fp32, onnx = results["modes"]
+        assert onnx["mode"] == "onnx"
+        assert onnx["max_diff"] <= 1
+        assert list((tmp_path / "models" / "onnx").glob("*.onnx"))
+
+
+class TestAdaptive:
+    def test_motion_matches_shift(self):
+        import numpy as np
+        from src.core.adaptive import estimate_motion
+        
+        rng = np.random.default_rng(0)
+        base = rng.integers(0, 255, (90, 160), dtype=np.uint8)
+        base = np.kron(base, np.ones((8, 8), dtype=np.uint8))   # 720x1280, blocky texture
+        shifted = np.roll(base, 24, axis=1)
+        
+        assert estimate_motion(base, base) < 1.0
+        assert estimate_motion(base, shifted) == pytest.approx(24, abs=6)
+    
+    def test_scale_follows_motion_and_target(self):
+        from src.core.adaptive import ScaleSelector
+        
+        selector = ScaleSelector(reach=48.0, still=4.0)
+        assert selector.scale_for(1) == 0.25    # static: nothing for the fine flow to resolve
+        assert selector.scale_for(10) == 1.0
+        assert selector.scale_for(80) == 0.5
+        assert selector.scale_for(500) == 0.25
+        
+        assert ScaleSelector(still=0).scale_for(1) == 1.0
+        
+        throttled = ScaleSelector(reach=48.0, target_fps=30)
+        throttled.update(pairs=4, elapsed=1.0)      # 4 pairs/s, far too slow
+        assert throttled.scale_for(10) == 0.5
+        throttled.update(pairs=4, elapsed=0.05)     # 80 pairs/s, headroom again
+        assert throttled.scale_for(10) == 1.0
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_process_reports_scales(self, tiny_clip, stub_model, tmp_path):
+        from src.core.adaptive import ScaleSelector
+        from src.core.engine import RIFEEngine
+        from src.core.interpolator import RIFEInterpolator
+        
+        interpolator = RIFEInterpolator(engine=RIFEEngine(model=stub_model), batch_size=3)
+        stats = interpolator.process(
+            tiny_clip, str(tmp_path / "out.mp4"), multi=2, adaptive=ScaleSelector()
+        )
+        
+        assert stats["scale"] == "auto"
+        assert sum(stats["scales"]["pairs_per_scale"].values()) == stats["input_frames"] - 1
+        assert stats["scales"]["segments"][0]["start"] == 0
+
+
+class TestHud:
+    def write_hud_clip(self, path, frames=12, size=(128, 96)):
+        import cv2
+        import numpy as np
+        
+        width, height = size
+        out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 30, (width, height))
+        for n in range(frames):
+            frame = np.full((height, width, 3), 40 + 10 * n, dtype=np.uint8)
+            frame[16:40, 8 + 6 * n:32 + 6 * n] = (0, 100, 255)
+            frame[56:, :] = (30, 30, 30)                    # status bar along the bottom
+            frame[72:88, 16:80] = (0, 200, 0)
+            out.write(frame)
+        out.release()
+        return str(path)
+    
+    def test_detects_static_bar_and_caches_per_game(self, tmp_path):
+        from src.core.hud import HudAnalyzer
+        
+        clip = self.write_hud_clip(tmp_path / "hud.mp4")
+        analyzer = HudAnalyzer(cache_dir=str(tmp_path / "hud"), tile=32)
+        mask = analyzer.for_game("tarkov", clip)
+        
+        assert mask.static[70:90, 20:70].all()
+        assert not mask.static[:48].any()
+        assert mask.box == (0, 64, 0, 128)
+        assert analyzer.cache_path("tarkov", 128, 96).exists()
+        
+        cached = analyzer.for_game("tarkov", clip)
+        assert (cached.static == mask.static).all()
+    
+    def test_composite_keeps_static_pixels(self):
+        import numpy as np
+        from src.core.hud import HudMask
+        
+        static = np.zeros((96, 128), dtype=bool)
+        static[64:] = True
+        mask = HudMask(static, tile=32)
+        frame0 = np.full((96, 128, 3), 10, dtype=np.uint8)
+        frame1 = np.full((96, 128, 3), 50, dtype=np.uint8)
+        
+        crop = mask.crop([frame0])[0]
+        assert crop.shape == (64, 128, 3)
+        out = mask.composite(frame0, frame1, np.full_like(crop, 30), t=0.25)
+        assert (out[:64] == 30).all()
+        assert (out[64:] == 10).all()
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_process_with_hud(self, stub_model, tmp_path):
+        from src.core.engine import RIFEEngine
+        from src.core.hud import HudAnalyzer
+        from src.core.interpolator import RIFEInterpolator
+        
+        clip = self.write_hud_clip(tmp_path / "hud.mp4")
+        mask = HudAnalyzer(cache_dir=str(tmp_path / "hud"), tile=32).analyze(clip)
+        
+        interpolator = RIFEInterpolator(engine=RIFEEngine(model=stub_model), batch_size=2)
+        stats = interpolator.process(clip, str(tmp_path / "out.mp4"), multi=2, hud=mask)
+        
+        assert stats["output_frames"] == 23
+        assert stats["hud"]["model_fraction"] == pytest.approx(64 / 96)
+
+
+class TestFrameCache:
+    def test_evicts_least_recently_used(self, tmp_path):
+        import numpy as np
+        from src.core.framecache import FrameCache
+        
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (32, 32, 3), dtype=np.uint8) for _ in range(4)]
+        cache = FrameCache(str(tmp_path / "frames"), max_bytes=3 * 3500)
+        
+        for n, frame in enumerate(frames[:3]):
+            cache.put(f"pair{n}", 0.5, frame)
+        assert (cache.get("pair0", 0.5) == frames[0]).all()        # lossless, and now most recent
+        cache.put("pair3", 0.5, frames[3])
+        
+        assert cache.bytes <= cache.max_bytes
+        assert cache.get("pair0", 0.5) is not None
+        assert cache.get("pair1", 0.5) is None
+        assert FrameCache(str(tmp_path / "frames")).summary()["entries"] == cache.summary()["entries"]
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_rerun_skips_inference(self, tiny_clip, stub_model, tmp_path):
+        from src.core.engine import RIFEEngine
+        from src.core.framecache import FrameCache
+        from src.core.interpolator import RIFEInterpolator
+        
+        class CountingModel:
+            calls = 0
+            
+            def inference(self, img0, img1, timestep=0.5, scale=1.0):
+                CountingModel.calls += 1
+                return stub_model.inference(img0, img1, timestep, scale)
+        
+        interpolator = RIFEInterpolator(engine=RIFEEngine(model=CountingModel()), batch_size=3)
+        interpolator.process(tiny_clip, str(tmp_path / "a.mp4"), multi=4, cache=FrameCache(str(tmp_path / "frames")))
+        first = CountingModel.calls
+        
+        stats = interpolator.process(
+            tiny_clip, str(tmp_path / "b.mkv"), multi=4, cache=FrameCache(str(tmp_path / "frames"))
+        )
+        
+        assert first > 0
+        assert CountingModel.calls == first
+        assert stats["cache"]["hits"] == 7 * 3
+        assert stats["cache"]["misses"] == 0
+
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_cpu_modes_keep_separate_entries(self, tiny_clip, conv_model, tmp_path):
+        from src.core.engine import RIFEEngine
+        from src.core.framecache import FrameCache
+        from src.core.interpolator import RIFEInterpolator
+        
+        runs = []
+        for mode in ("fp32", "int8-dynamic", "fp32"):
+            interpolator = RIFEInterpolator(
+                engine=RIFEEngine(model=conv_model, device="cpu", cpu_mode=mode), batch_size=3
+            )
+            cache = FrameCache(str(tmp_path / "frames"))
+            runs.append(interpolator.process(tiny_clip, str(tmp_path / f"{mode}.mp4"), cache=cache))
+        
+        assert runs[0]["cache"]["hits"] == 0
+        assert runs[1]["cache"]["hits"] == 0
+        assert runs[2]["cache"]["hits"] == 7
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_new_weights_miss_the_cache(self, tiny_clip, stub_model, tmp_path, monkeypatch):
+        import torch
+        
+        from src.core import weights
+        from src.core.engine import RIFEEngine
+        from src.core.framecache import FrameCache
+        from src.core.interpolator import RIFEInterpolator
+        
+        monkeypatch.setattr(weights, "_pool", None)
+        store = weights.configure_pool(str(tmp_path / "models")).store
+        
+        def hits():
+            interpolator = RIFEInterpolator(engine=RIFEEngine(model=stub_model), batch_size=3)
+            cache = FrameCache(str(tmp_path / "frames"))
+            stats = interpolator.process(tiny_clip, str(tmp_path / "out.mp4"), cache=cache)
+            return stats["cache"]["hits"]
+        
+        assert [hits(), hits()] == [0, 7]
+        for size in (4, 8):
+            torch.save({"block.weight": torch.zeros(size)}, tmp_path / "flownet.pkl")
+            store.add(weights.DEFAULT_VERSION, str(tmp_path / "flownet.pkl"))
+            assert [hits(), hits()] == [0, 7]
+
+
+class TestProfiling:
+    def test_span_recorded_in_trace(self, tmp_path):
+        import json
+        from src.utils.profiling import ProfileSession, span
+        
+        session = ProfileSession(str(tmp_path / "trace.json"))
+        session.start()
+        with span("decode"):
+            sum(range(1000))
+        session.stop()
+        
+        trace = json.loads((tmp_path / "trace.json").read_text())
+        names = {e.get("name") for e in trace["traceEvents"]}
+        assert "stage:decode" in names
+    
+    def test_span_noop_without_session(self):
+        from src.utils.profiling import span
+        
+        with span("decode"):
+            pass
+
+
+class TestTelemetry:
+    def test_sink_writes_jsonl_and_prometheus(self, tmp_path):
+        import json
+        from src.utils import telemetry
+        from src.utils.profiling import span
+        from src.utils.telemetry import TelemetrySink
+        
+        sink = TelemetrySink(str(tmp_path / "events.jsonl"), str(tmp_path / "rife.prom"), interval=60)
+        sink.start()
+        telemetry.count("frames", 3, kind="source")
+        telemetry.count("frames", 2, kind="source")
+        telemetry.gauge("queue_depth", 4)
+        with span("decode"):
+            pass
+        sink.stop()
+        telemetry.count("frames", 100, kind="source")  # no sink: dropped on the floor
+        
+        events = [json.loads(line) for line in (tmp_path / "events.jsonl").read_text().splitlines()]
+        assert [e["type"] for e in events] == ["counter", "counter", "gauge", "timing"]
+        assert events[-1]["labels"] == {"stage": "decode"}
+        
+        prom = (tmp_path / "rife.prom").read_text()
+        assert 'rife_frames_total{kind="source"} 5' in prom
+        assert "rife_queue_depth 4" in prom
+        assert 'rife_stage_seconds_count{stage="decode"} 1' in prom
+        assert 'rife_stage_seconds_bucket{stage="decode",le="+Inf"} 1' in prom
+    
+    def test_ring_buffer_overwrites_oldest(self):
+        from src.utils import telemetry
+        from src.utils.telemetry import TelemetrySink
+        
+        sink = TelemetrySink(capacity=3, interval=60).start()
+        for n in range(5):
+            telemetry.count("frames", n)
+        sink.stop()
+        
+        snapshot = sink.snapshot()
+        assert snapshot["dropped"] == 2
+        assert snapshot["counters"][("frames", ())] == 2 + 3 + 4
+
+
+class TestMemory:
+    def test_torch_allocation_tracker(self):
+        import torch
+        from src.utils.memory import TorchAllocationTracker
+        
+        with TorchAllocationTracker() as tracker:
+            a = torch.zeros(1000, 1000)
+            b = a * 2
+            del a
+        
+        assert tracker.peak >= 8_000_000
+    
+    def test_peak_rss_sampler(self):
+        from src.utils.memory import PeakRSSSampler
+        
+        with PeakRSSSampler() as rss:
+            buf = bytearray(50_000_000)
+        
+        assert rss.peak >= rss.baseline > 0
+
+
+class TestEncoder:
+    def test_codec_args(self):
+        from src.core.encoder import VideoEncoder
+        from src.utils.config import OutputConfig
+        
+        args = VideoEncoder(OutputConfig(preset="fast", crf=20, gop=60)).codec_args()
+        assert args[:6] == ["-c:v", "libx264", "-preset", "fast", "-crf", "20"]
+        assert "-g" in args
+        
+        lossless = VideoEncoder(OutputConfig(lossless=True)).codec_args()
+        assert "-qp" in lossless and "-crf" not in lossless
+        raw = VideoEncoder(OutputConfig(lossless=True)).codec_args(rgb_input=True)
+        assert raw[:2] == ["-c:v", "libx264rgb"]
+        
+        assert VideoEncoder(OutputConfig(codec="ffv1")).lossless
+    
+    def test_ffv1_needs_matching_container(self):
+        from src.core.encoder import VideoEncoder
+        from src.utils.config import OutputConfig
+        
+        ffv1 = VideoEncoder(OutputConfig(codec="ffv1"))
+        with pytest.raises(ValueError, match="ffv1"):
+            ffv1.raw_input_command("out.mp4", 64, 48, 30.0)
+        assert ffv1.codec_args(output_path="out.mkv")[:2] == ["-c:v", "ffv1"]
+        assert ffv1.container_path("diff.mp4") == "diff.mkv"
+        assert VideoEncoder().container_path("diff.mp4") == "diff.mp4"
+    
+    def test_segment_frames_gop_aligned(self):
+        from src.core.encoder import VideoEncoder
+        from src.utils.config import OutputConfig
+        
+        encoder = VideoEncoder(OutputConfig(segment_frames=100, gop=30))
+        assert encoder.segment_frames() == 120
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_segmented_lossless_roundtrip(self, tmp_path):
+        import cv2
+        import numpy as np
+        from src.core.encoder import SegmentedWriter, VideoEncoder
+        from src.utils.config import OutputConfig
+        
+        encoder = VideoEncoder(OutputConfig(codec="ffv1", segment_frames=8, segment_workers=3))
+        frames = [
+            np.random.default_rng(i).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+            for i in range(30)
+        ]
+        
+        output = str(tmp_path / "out.mkv")
+        writer = encoder.open_writer(output, 64, 48, 30)
+        assert isinstance(writer, SegmentedWriter)
+        for frame in frames:
+            writer.write(frame)
+        writer.close()
+        
+        cap = cv2.VideoCapture(output)
+        decoded = []
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            decoded.append(frame)
+        cap.release()
+        
+        assert len(decoded) == 30
+        assert all(np.array_equal(a, b) for a, b in zip(frames, decoded))
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_lossless_x264_bit_exact(self, tmp_path):
+        import cv2
+        import numpy as np
+        from src.core.encoder import VideoEncoder
+        from src.utils.config import OutputConfig
+        
+        frames = [
+            np.random.default_rng(i).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+            for i in range(3)
+        ]
+        output = str(tmp_path / "out.mkv")
+        encoder = VideoEncoder(OutputConfig(lossless=True, preset="ultrafast"))
+        writer = encoder.open_writer(output, 64, 48, 30)
+        for frame in frames:
+            writer.write(frame)
+        writer.close()
+        
+        cap = cv2.VideoCapture(output)
+        decoded = [cap.read()[1] for _ in frames]
+        cap.release()
+        assert all(np.array_equal(a, b) for a, b in zip(frames, decoded))
 
 
 class TestExtractor:
     def test_import(self):
         from src.core.extractor import FrameExtractor
         assert FrameExtractor is not None
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_downsample_many(self, tmp_path):
+        import cv2
+        from src.core.extractor import FrameExtractor
+        from tests.conftest import write_clip
+        
+        clip = write_clip(tmp_path / "60fps.mp4", frames=17, fps=60)
+        stats = FrameExtractor().downsample_many(
+            clip, str(tmp_path / "clip_{fps}fps.mp4"), skips=[2, 3, 4]
+        )
+        
+        assert {s: stats[s]["output_frames"] for s in stats} == {2: 9, 3: 6, 4: 5}
+        assert all(stats[s]["input_frames"] == 17 for s in stats)
+        assert not any(stats[s]["frames_estimated"] for s in stats)
+        
+        cap = cv2.VideoCapture(str(tmp_path / "clip_20fps.mp4"))
+        assert cap.get(cv2.CAP_PROP_FPS) == pytest.approx(20)
+        assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 6
+        cap.release()
+    
+    def test_downsample_many_needs_placeholder(self, tiny_clip, tmp_path):
+        from src.core.extractor import FrameExtractor
+        
+        with pytest.raises(ValueError):
+            FrameExtractor().downsample_many(tiny_clip, str(tmp_path / "out.mp4"), skips=[2, 3])
+
+
+class TestReader:
+    @pytest.mark.parametrize("help_text, expected", [
+        ("-vsync <>  set video sync method\n-fps_mode  set framerate mode\n", "-fps_mode"),
+        ("-vsync <>  video sync method\n", "-vsync"),
+    ])
+    def test_passthrough_option_follows_ffmpeg_version(self, monkeypatch, help_text, expected):
+        import subprocess
+        from src.core import reader
+        
+        monkeypatch.setattr(
+            reader.subprocess, "run",
+            lambda *args, **kwargs: subprocess.CompletedProcess(args, 0, help_text, "")
+        )
+        reader.passthrough_args.cache_clear()
+        try:
+            assert reader.passthrough_args() == [expected, "passthrough"]
+        finally:
+            reader.passthrough_args.cache_clear()
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_random_access_matches_sequential(self, tmp_path):
+        import subprocess
+        import numpy as np
+        from src.core.reader import VideoReader
+        from tests.conftest import write_clip
+        
+        source = write_clip(tmp_path / "src.mp4", frames=30)
+        clip = str(tmp_path / "gop8.mkv")
+        subprocess.run(
+            ["ffmpeg", "-v", "error", "-i", source, "-c:v", "libx264", "-g", "8", "-bf", "2", clip],
+            check=True
+        )
+        
+        with VideoReader(clip) as reader:
+            frames = list(reader)
+            assert len(reader) == len(frames) == 30
+            assert reader.index["keyframes"] == [0, 8, 16, 24]
+            assert reader.keyframe_before(13) == 8
+            
+            for i in [29, 3, 17, 16, 0, 9, -1]:
+                assert np.array_equal(reader[i], frames[i])
+            assert all(np.array_equal(a, b) for a, b in zip(reader[10:20], frames[10:20]))
+            assert all(np.array_equal(a, b) for a, b in zip(reader[25:2:-4], frames[25:2:-4]))
+            
+            with pytest.raises(IndexError):
+                reader[30]
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_index_cached_in_sidecar(self, tiny_clip, monkeypatch):
+        from src.core import reader as reader_module
+        
+        reader_module.VideoReader(tiny_clip).close()
+        assert os.path.exists(tiny_clip + reader_module.INDEX_SUFFIX)
+        
+        def fail(path):
+            raise AssertionError("index rebuilt")
+        
+        monkeypatch.setattr(reader_module, "build_index", fail)
+        with reader_module.VideoReader(tiny_clip) as reader:
+            assert len(reader) == 8
+    
+    @pytest.mark.filterwarnings("error::pytest.PytestUnraisableExceptionWarning")
+    def test_missing_file(self, tmp_path):
+        import gc
+        from src.core.reader import VideoReader
+        
+        with pytest.raises(FileNotFoundError):
+            VideoReader(str(tmp_path / "missing.mp4"))
+        # The half-built reader is collected without errors from __del__
+        gc.collect()
+
+
+class TestCompare:
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_render_all_outputs(self, tmp_path):
+        import cv2
+        from src.core.compare import OUTPUTS, ComparisonRenderer
+        from tests.conftest import write_clip
+        
+        reference = write_clip(tmp_path / "ref.mp4", frames=12, fps=60)
+        interpolated = write_clip(tmp_path / "interp.mp4", frames=11, fps=60)
+        
+        renderer = ComparisonRenderer()
+        stats = renderer.render_many(
+            [(reference, interpolated, str(tmp_path / "a")),
+             (reference, interpolated, str(tmp_path / "b"))],
+            seed=0
+        )
+        
+        assert len(stats) == 2
+        outputs = stats[0]["outputs"]
+        assert set(outputs) == set(OUTPUTS)
+        
+        expected = {
+            "side_by_side": (11, 128, 60),
+            "blind": (23, 64, 60),
+            "diff": (11, 64, 60),
+            "slowmo": (11, 64, 15),
+        }
+        for kind, (frames, width, fps) in expected.items():
+            cap = cv2.VideoCapture(outputs[kind])
+            assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == frames, kind
+            assert int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) == width, kind
+            assert cap.get(cv2.CAP_PROP_FPS) == pytest.approx(fps), kind
+            cap.release()
+        
+        assert "Clip A:" in open(stats[0]["answer"]).read()
+
+
+class TestPipeline:
+    def _pipeline(self, tmp_path, calls, scale=1.0):
+        from src.core.pipeline import Pipeline, Step
+        
+        source = tmp_path / "source.txt"
+        clip = tmp_path / "clip.txt"
+        
+        def extract(upstream):
+            calls.append("extract")
+            clip.write_text(source.read_text().upper())
+        
+        def measure(upstream):
+            calls.append("measure")
+            return len(clip.read_text()) * scale
+        
+        def report(upstream):
+            calls.append("report")
+            (tmp_path / "report.txt").write_text(str(upstream["measure"]))
+        
+        pipeline = Pipeline(str(tmp_path / "cache.json"))
+        pipeline.add(Step("extract", extract, inputs=[str(source)], outputs=[str(clip)]))
+        pipeline.add(Step("measure", measure, inputs=[str(clip)], params={"scale": scale}))
+        pipeline.add(Step(
+            "report", report, outputs=[str(tmp_path / "report.txt")], after=["measure"]
+        ))
+        return pipeline
+    
+    def test_reruns_only_invalidated_steps(self, tmp_path):
+        source = tmp_path / "source.txt"
+        source.write_text("abc")
+        calls = []
+        
+        self._pipeline(tmp_path, calls).run()
+        assert calls == ["extract", "measure", "report"]
+        
+        calls.clear()
+        pipeline = self._pipeline(tmp_path, calls)
+        assert pipeline.run()["measure"] == 3
+        assert calls == []
+        assert set(pipeline.status.values()) == {"cached"}
+        
+        calls.clear()
+        self._pipeline(tmp_path, calls, scale=2.0).run()
+        assert calls == ["measure", "report"]
+        
+        # Touching a file without changing its content invalidates nothing
+        calls.clear()
+        source.write_text("abc")
+        os.utime(source, ns=(1, 1))
+        self._pipeline(tmp_path, calls, scale=2.0).run()
+        assert calls == []
+        
+        # A rerun step that writes identical output does not invalidate downstream
+        self._pipeline(tmp_path, calls, scale=2.0).run(force=["extract"])
+        assert calls == ["extract"]
+        
+        calls.clear()
+        source.write_text("abcd")
+        self._pipeline(tmp_path, calls, scale=2.0).run()
+        assert calls == ["extract", "measure", "report"]
+    
+    def test_independent_steps_run_concurrently(self, tmp_path):
+        import threading
+        from src.core.pipeline import Pipeline, Step
+        
+        barrier = threading.Barrier(2, timeout=5)
+        pipeline = Pipeline(str(tmp_path / "cache.json"), workers=2)
+        pipeline.add(Step("a", lambda upstream: barrier.wait()))
+        pipeline.add(Step("b", lambda upstream: barrier.wait()))
+        pipeline.add(Step("c", lambda upstream: 1 / 0, after=["a"]))
+        pipeline.add(Step("d", lambda upstream: None, after=["c"]))
+        pipeline.run()
+        
+        assert pipeline.status == {"a": "ran", "b": "ran", "c": "failed", "d": "skipped"}
+        assert isinstance(pipeline.errors["c"], ZeroDivisionError)
+    
+    def test_stage_limit(self, tmp_path):
+        import threading
+        import time
+        from src.core.pipeline import Pipeline, Step
+        
+        active, peak = [], []
+        lock = threading.Lock()
+        
+        def work(upstream):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+        
+        pipeline = Pipeline(str(tmp_path / "cache.json"), workers=4, limits={"gpu": 1})
+        for i in range(4):
+            pipeline.add(Step(f"s{i}", work, stage="gpu"))
+        pipeline.run()
+        
+        assert max(peak) == 1
+        
+        with pytest.raises(ValueError, match="evaluate=0"):
+            Pipeline(str(tmp_path / "cache.json"), limits={"evaluate": 0})
+
+
+
+class TestExperimentRunner:
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_intermediates_are_bit_exact(self, tmp_path):
+        import cv2
+        import numpy as np
+        from scripts.run_experiment import ExperimentRunner
+        from tests.conftest import write_clip
+        
+        def frames(path):
+            cap = cv2.VideoCapture(str(path))
+            decoded = []
+            while True:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                decoded.append(frame)
+            cap.release()
+            return decoded
+        
+        source = write_clip(tmp_path / "source.mp4", frames=12, fps=60)
+        runner = ExperimentRunner(source, clip_duration=1)
+        runner.clip_60fps = tmp_path / "clip_60fps.mkv"
+        runner.clip_30fps = tmp_path / "clip_30fps.mkv"
+        runner.log = lambda message: None
+        
+        assert runner.extract_clip() and runner.downsample_to_30fps()
+        
+        reference = frames(runner.clip_60fps)
+        assert len(reference) == 12
+        assert all(np.array_equal(a, b) for a, b in zip(reference, frames(source)))
+        downsampled = frames(runner.clip_30fps)
+        assert len(downsampled) == 6
+        assert all(np.array_equal(a, b) for a, b in zip(downsampled, reference[::2]))
+
+class TestBatch:
+    def test_manifest_defaults(self, tmp_path):
+        from src.core.batch import BatchManifest
+        
+        path = tmp_path / "batch.yaml"
+        path.write_text(
+            "defaults:\n  multi: 4\n  scale: 0.5\n"
+            "clips:\n  - {game: arc, source: a.mp4}\n  - {game: arc, source: a.mp4, multi: 2}\n"
+        )
+        clips = BatchManifest.load(str(path)).clips
+        assert [(c.multi, c.scale) for c in clips] == [(4, 0.5), (2, 0.5)]
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_run_aggregates_per_game(self, tmp_path, stub_model):
+        from src.core.batch import BatchClip, BatchRunner
+        from tests.conftest import write_clip
+        
+        tarkov = write_clip(tmp_path / "tarkov.mp4", frames=12, fps=60)
+        arc = write_clip(tmp_path / "arc.mp4", frames=10, fps=60)
+        clips = [
+            BatchClip(game="tarkov", source=tarkov, duration=None),
+            BatchClip(game="tarkov", source=tarkov, duration=None),
+            BatchClip(game="arc", source=arc, duration=None),
+            BatchClip(game="arc", source=str(tmp_path / "missing.mp4")),
+        ]
+        
+        runner = BatchRunner(
+            str(tmp_path / "batch"), model=stub_model, workers=3,
+            limits={"interpolate": 1}, games={"arc": "ARC Raiders"}
+        )
+        summary = runner.run(clips)
+        
+        assert [row["clip"] for row in summary["clips"]][:2] == ["tarkov_0s", "tarkov_0s_2"]
+        assert [row["ok"] for row in summary["clips"]] == [True, True, True, False]
+        assert summary["clips"][3]["failed_stage"] == "extract"
+        
+        games = summary["games"]
+        assert games["tarkov"]["clips"] == 2 and games["tarkov"]["frames"] == 10
+        assert games["arc"]["name"] == "ARC Raiders" and games["arc"]["failed"] == 1
+        assert 0 < games["arc"]["ssim"] <= 1
+        assert (tmp_path / "batch" / "summary.csv").exists()
+        
+        rerun = runner.run(clips[:3])
+        assert all(row["cached"] for row in rerun["clips"])
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_model_change_reruns_interpolation(self, tmp_path, stub_model, monkeypatch):
+        import torch
+        
+        from src.core import weights
+        from src.core.batch import BatchClip, BatchRunner
+        from tests.conftest import write_clip
+        
+        monkeypatch.setattr(weights, "_pool", None)
+        store = weights.configure_pool(str(tmp_path / "models")).store
+        clips = [BatchClip(game="arc", source=write_clip(tmp_path / "arc.mp4"), duration=None)]
+        
+        def run(version):
+            runner = BatchRunner(
+                str(tmp_path / "batch"), model=stub_model, version=version, scale=0.5
+            )
+            return runner.run(clips)["clips"][0]
+        
+        first = run("4.25")
+        assert first["interpolation"]["scale"] == 0.5
+        assert run("4.25")["cached"]
+        assert not run("4.25.lite")["cached"]
+        
+        torch.save({"block.weight": torch.zeros(4)}, tmp_path / "flownet.pkl")
+        store.add("4.25.lite", str(tmp_path / "flownet.pkl"))
+        assert not run("4.25.lite")["cached"]
+        assert run("4.25.lite")["cached"]
+
+
+class TestWeights:
+    @staticmethod
+    def _weights(path, size):
+        import torch
+        torch.save({"module.block.weight": torch.zeros(size)}, path)
+        return str(path)
+    
+    def test_store_is_content_addressed(self, tmp_path):
+        from src.core.weights import WeightStore
+        
+        store = WeightStore(str(tmp_path / "models"))
+        weights = self._weights(tmp_path / "flownet.pkl", 16)
+        
+        blob = store.add("4.25", weights)
+        assert store.add("4.25-copy", weights) == blob
+        assert len(list((tmp_path / "models" / "blobs").iterdir())) == 1
+        assert "4.25" in store and store.verify("4.25")
+        
+        with pytest.raises(ValueError, match="Checksum mismatch"):
+            store.add("bad", weights, sha256="0" * 64)
+        assert "bad" not in store
+        
+        state = store.load_state_dict("4.25")
+        assert state["module.block.weight"].shape == (16,)
+    
+    def test_legacy_weights_need_matching_checksum(self, tmp_path, monkeypatch):
+        from src.core import weights
+        
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "train_log").mkdir()
+        legacy = self._weights(tmp_path / "train_log" / "flownet.pkl", 8)
+        store = weights.WeightStore(str(tmp_path / "models"))
+        monkeypatch.setattr(weights.urllib.request, "urlretrieve", lambda url, path: None)
+        
+        with pytest.raises(ValueError, match="Checksum mismatch"):
+            store.fetch("4.25", sha256="0" * 64)
+        assert "4.25" not in store
+        assert store.versions()["legacy"]["sha256"] == store.file_sha256(legacy)
+        
+        assert store.fetch("4.25", sha256=store.file_sha256(legacy)) == store.path("legacy")
+    
+    def test_pool_keeps_recent_models_within_budget(self, tmp_path):
+        import threading
+        from src.core.weights import ModelPool, WeightStore
+        
+        store = WeightStore(str(tmp_path / "models"))
+        for version in ("a", "b", "c"):
+            store.add(version, self._weights(tmp_path / f"{version}.pkl", 256 + ord(version)))  # ~1.4 kB
+        
+        loads = []
+        pool = ModelPool(store, budget_bytes=3000, factory=lambda state: loads.append(state) or object())
+        
+        threads = [threading.Thread(target=pool.get, args=("a",)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(loads) == 1
+        
+        first = pool.get("a")
+        pool.get("b")
+        assert pool.get("a") is first
+        pool.get("c")  # over budget: "b" is least recently used
+        assert list(pool.resident) == ["a", "c"]
+        assert len(loads) == 3
+    
+    def test_engine_loads_from_pool(self, tmp_path, stub_model, monkeypatch):
+        from src.core import weights
+        from src.core.engine import RIFEEngine
+        
+        store = weights.WeightStore(str(tmp_path / "models"))
+        store.add("4.25.lite", self._weights(tmp_path / "lite.pkl", 4))
+        monkeypatch.setattr(weights, "_pool", weights.ModelPool(store, factory=lambda state: stub_model))
+        
+        assert RIFEEngine(version="4.25.lite").model is stub_model
+    
+    def test_build_model_rejects_other_architecture(self, monkeypatch):
+        import sys
+        import types
+        import torch
+        from src.core.engine import RIFEEngine
+        
+        class Model:
+            def __init__(self):
+                self.flownet = torch.nn.Sequential(torch.nn.Conv2d(6, 4, 3))
+            
+            def eval(self):
+                pass
+            
+            def device(self):
+                pass
+        
+        monkeypatch.setitem(sys.modules, "train_log", types.ModuleType("train_log"))
+        monkeypatch.setitem(sys.modules, "train_log.RIFE_HDv3", types.SimpleNamespace(Model=Model))
+        state = {f"module.{k}": v for k, v in Model().flownet.state_dict().items()}
+        
+        assert isinstance(RIFEEngine.build_model(state).flownet, torch.nn.Sequential)
+        with pytest.raises(RuntimeError, match="do not match the flownet"):
+            RIFEEngine.build_model({**state, "module.1.weight": torch.zeros(4)})
+        with pytest.raises(RuntimeError, match="do not match the flownet"):
+            RIFEEngine.build_model({"module.0.weight": state["module.0.weight"]})
 
+    
+    def test_versions_load_their_own_model_code(self, tmp_path, monkeypatch):
+        import sys
+        import textwrap
+        import torch
+        from src.core.weights import ModelPool, WeightStore
+        
+        store = WeightStore(str(tmp_path / "models"))
+        for version, channels in (("4.25", 8), ("4.25.lite", 4)):
+            code = tmp_path / version / "train_log"
+            code.mkdir(parents=True)
+            # Practical-RIFE's modules import each other through the train_log package
+            (code / "IFNet_HDv3.py").write_text(textwrap.dedent(f"""
+                import torch
+                
+                class IFNet(torch.nn.Sequential):
+                    def __init__(self):
+                        super().__init__(torch.nn.Conv2d(6, {channels}, 3))
+            """))
+            (code / "RIFE_HDv3.py").write_text(textwrap.dedent("""
+                from train_log.IFNet_HDv3 import IFNet
+                
+                class Model:
+                    def __init__(self):
+                        self.flownet = IFNet()
+                    
+                    def eval(self):
+                        pass
+                    
+                    def device(self):
+                        pass
+            """))
+            store.add_code(version, str(code))
+            weights = torch.nn.Conv2d(6, channels, 3).state_dict()
+            path = tmp_path / f"{version}.pkl"
+            torch.save({f"module.0.{k}": v for k, v in weights.items()}, path)
+            store.add(version, str(path))
+        
+        monkeypatch.delitem(sys.modules, "train_log", raising=False)
+        pool = ModelPool(store)
+        full, lite = pool.get("4.25"), pool.get("4.25.lite")
+        
+        assert full.flownet[0].out_channels == 8
+        assert lite.flownet[0].out_channels == 4
+        assert list(pool.resident) == ["4.25", "4.25.lite"]
+        assert "train_log" not in sys.modules
+
+class TestServer:
+    @pytest.mark.parametrize("transport", ["tcp", "unix"])
+    def test_remote_interpolate_streams_progress(self, tiny_clip, stub_model, tmp_path, transport):
+        from src.core.engine import RIFEEngine
+        from src.core.server import JobClient, JobServer
+        
+        address = f"unix:{tmp_path / 'rife.sock'}" if transport == "unix" else "127.0.0.1:0"
+        server = JobServer(engine=RIFEEngine(model=stub_model)).start(address)
+        try:
+            client = JobClient(server.address, timeout=30)
+            assert client.health()["model_loaded"]
+            
+            progress = []
+            output = str(tmp_path / "out.mp4")
+            stats = client.run(
+                "interpolate", {"input": tiny_clip, "output": output, "multi": 2},
+                progress_callback=progress.append
+            )
+            assert stats["output_frames"] == 15
+            assert progress and progress[-1] == pytest.approx(100.0)
+            
+            scores = client.run("metrics", {"interpolated": output, "reference": output})
+            assert scores["frames"] == 15
+            
+            with pytest.raises(RuntimeError):
+                client.run("interpolate", {"input": str(tmp_path / "missing.mp4"), "output": output})
+        finally:
+            server.stop()
+    
+    def test_priority_order(self, tiny_clip, stub_model, tmp_path):
+        from src.core.engine import RIFEEngine
+        from src.core.server import JobServer
+        
+        server = JobServer(engine=RIFEEngine(model=stub_model))
+        params = {"interpolated": tiny_clip, "reference": tiny_clip}
+        low = server.submit("metrics", params, priority=0)
+        cancelled = server.submit("metrics", params, priority=0)
+        high = server.submit("metrics", params, priority=5)
+        server.cancel(cancelled.id)
+        
+        server.start("127.0.0.1:0")
+        try:
+            events = {job.id: list(job.follow(timeout=10)) for job in (low, high)}
+        finally:
+            server.stop()
+        
+        started = {job_id: next(e["time"] for e in ev if e["event"] == "started")
+                   for job_id, ev in events.items()}
+        assert started[high.id] < started[low.id]
+        assert cancelled.status == "cancelled" and low.status == high.status == "done"
+    
+    def test_served_cpu_mode_keeps_separate_cache_entries(self, tiny_clip, conv_model, tmp_path):
+        from src.core.engine import RIFEEngine
+        from src.core.framecache import FrameCache
+        from src.core.interpolator import RIFEInterpolator
+        from src.core.server import JobClient, JobServer
+        from src.core.weights import DEFAULT_VERSION
+        
+        frames = str(tmp_path / "frames")
+        engine = RIFEEngine(model=conv_model, device="cpu", cpu_mode="int8-dynamic")
+        server = JobServer(engine=engine).start("127.0.0.1:0")
+        try:
+            client = JobClient(server.address, timeout=30)
+            params = {"input": tiny_clip, "output": str(tmp_path / "served.mp4"),
+                      "frame_cache": frames}
+            served = client.run("interpolate", params)
+            local = RIFEInterpolator(
+                engine=RIFEEngine(model=conv_model, device="cpu", version=DEFAULT_VERSION)
+            ).process(tiny_clip, str(tmp_path / "local.mp4"), cache=FrameCache(frames))
+            again = client.run("interpolate", params)
+        finally:
+            server.stop()
+        
+        assert served["cache"]["hits"] == 0
+        assert local["cache"]["hits"] == 0
+        assert again["cache"]["hits"] == 7
+    
+    def test_requires_token_and_json(self, stub_model, tmp_path):
+        import http.client
+        import json
+        import stat
+        
+        from src.core.engine import RIFEEngine
+        from src.core.server import JobClient, JobServer, token_path
+        
+        server = JobServer(engine=RIFEEngine(model=stub_model)).start("127.0.0.1:0")
+        try:
+            path = token_path(server.address)
+            assert path.read_text() == server.token
+            assert stat.S_IMODE(path.stat().st_mode) == 0o600
+            
+            host, port = server.address.rsplit(":", 1)
+            body = json.dumps({"type": "metrics", "params": {}})
+            
+            def post(headers):
+                conn = http.client.HTTPConnection(host, int(port), timeout=10)
+                try:
+                    conn.request("POST", "/jobs", body, headers)
+                    return conn.getresponse().status
+                finally:
+                    conn.close()
+            
+            auth = {"Authorization": f"Bearer {server.token}"}
+            assert post({"Content-Type": "application/json"}) == 401
+            assert post({"Content-Type": "text/plain", **auth}) == 415
+            assert post({"Content-Type": "application/json", "Authorization": "Bearer x"}) == 401
+            assert post({"Content-Type": "application/json", **auth}) == 202
+            with pytest.raises(RuntimeError):
+                JobClient(server.address, timeout=10, token="wrong").health()
+        finally:
+            server.stop()
+        assert not path.exists()
+    
+    def test_finished_jobs_and_events_bounded(self, stub_model, monkeypatch):
+        from src.core.engine import RIFEEngine
+        from src.core.server import Job, JobServer
+        
+        monkeypatch.setattr(Job, "max_events", 10)
+        job = Job("metrics", {})
+        for n in range(50):
+            job.emit("progress", progress=n)
+        job.status = "done"
+        job.emit("done")
+        assert len(job.events) == 10
+        assert [e["event"] for e in job.follow()][-1] == "done"
+        
+        server = JobServer(engine=RIFEEngine(model=stub_model), keep_finished=2)
+        jobs = [server.submit("metrics", {}) for _ in range(4)]
+        for job in jobs:
+            server.cancel(job.id)
+        newest = server.submit("metrics", {})
+        assert set(server.jobs) == {jobs[2].id, jobs[3].id, newest.id}
+        
+        server.job_ttl = 0
+        server.submit("metrics", {})
+        assert newest.id in server.jobs and jobs[3].id not in server.jobs
+
+
+class TestWatcher:
+    def test_waits_for_stable_size(self, tmp_path):
+        from src.core.watcher import FolderWatcher
+        
+        inbox = tmp_path / "inbox"
+        inbox.mkdir()
+        recording = inbox / "capture.mp4"
+        recording.write_bytes(b"x" * 10)
+        
+        calls = []
+        watcher = FolderWatcher(
+            str(inbox), str(tmp_path / "out"), stable_polls=1,
+            process=lambda src, dst: calls.append(src) or {}
+        )
+        assert watcher.poll() == []
+        with open(recording, "ab") as f:
+            f.write(b"x" * 10)  # still being written
+        assert watcher.poll() == []
+        assert watcher.poll() == [recording]
+        watcher.drain()
+        assert calls == [str(recording)]
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_ledger_survives_restart(self, tmp_path, stub_model):
+        from src.core.watcher import FolderWatcher
+        from tests.conftest import write_clip
+        
+        inbox = tmp_path / "inbox"
+        inbox.mkdir()
+        for name in ("a", "b", "c"):
+            write_clip(inbox / f"{name}.mp4")
+        (inbox / "broken.mp4").write_bytes(b"not a video")
+        
+        def watcher():
+            return FolderWatcher(
+                str(inbox), str(tmp_path / "out"), model=stub_model,
+                concurrency=2, interval=0.01, stable_polls=1
+            )
+        
+        first = watcher()
+        first.run(once=True)
+        status = {Path(e["path"]).name: e["status"] for e in first.processed}
+        assert status == {"a.mp4": "done", "b.mp4": "done", "c.mp4": "done", "broken.mp4": "failed"}
+        assert (tmp_path / "out" / "a_mp4_interp.mp4").exists()
+        
+        second = watcher()
+        second.run(once=True)
+        assert second.processed == []
+        
+        write_clip(inbox / "d.mp4")
+        third = watcher()
+        third.run(once=True)
+        assert [Path(e["path"]).name for e in third.processed] == ["d.mp4"]
+    
+    def test_engine_uses_configured_model(self, tmp_path, conv_model):
+        from src.core.cpu_modes import CpuModel
+        from src.core.watcher import FolderWatcher
+        
+        watcher = FolderWatcher(
+            str(tmp_path / "in"), str(tmp_path / "out"), model=conv_model,
+            version="4.25.lite", cpu_mode="int8-dynamic"
+        )
+        engines = [watcher._engine() for _ in range(2)]
+        assert all(e.version == "4.25.lite" and e.cpu_mode == "int8-dynamic" for e in engines)
+        # Wrapped for the CPU mode once, then shared by every file's engine
+        assert isinstance(watcher.model, CpuModel)
+        assert engines[0].model is engines[1].model is watcher.model
+    
+    def test_outputs_in_watched_folder(self, tmp_path):
+        from src.core.watcher import FolderWatcher
+        
+        for name in ("a.mp4", "a.mkv"):
+            (tmp_path / name).write_bytes(b"capture")
+        
+        def process(input_path, output_path):
+            Path(output_path).write_bytes(b"output")
+            return {}
+        
+        watcher = FolderWatcher(
+            str(tmp_path), str(tmp_path), process=process, interval=0.01, stable_polls=1
+        )
+        watcher.run(once=True)
+        watcher.run(once=True)
+        
+        assert sorted(Path(e["path"]).name for e in watcher.processed) == ["a.mkv", "a.mp4"]
+        assert sorted(Path(e["output"]).name for e in watcher.processed) == [
+            "a_mkv_interp.mp4", "a_mp4_interp.mp4"
+        ]
+
+
+class TestTuner:
+    def test_candidates_fill_cores(self):
+        from src.core.tuner import ThreadTuner
+        
+        candidates = ThreadTuner().candidates(cores=8)
+        
+        assert {c.workers for c in candidates} == {1, 2, 4, 8}
+        assert all(c.workers * c.torch_threads == 8 for c in candidates)
+    
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_run_picks_best(self, tiny_clip, stub_model):
+        from src.core.tuner import ThreadTuner
+        from src.utils.config import ThreadsConfig
+        
+        tuner = ThreadTuner(max_frames=4, model=stub_model)
+        results = tuner.run(tiny_clip, [ThreadsConfig(torch_threads=1, ffmpeg_threads=1)])
+        
+        assert results["trials"][0]["frames"] == 4
+        assert results["best"]["torch_threads"] == 1
+    
+    @pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="no CPU affinity support")
+    def test_single_run_not_pinned(self):
+        from src.utils.config import ThreadsConfig
+        from src.utils.threads import apply_thread_profile
+        
+        before = os.sched_getaffinity(0)
+        try:
+            apply_thread_profile(ThreadsConfig(workers=4, pin_cores=True), ffmpeg_only=True)
+            assert os.sched_getaffinity(0) == before
+        finally:
+            os.sched_setaffinity(0, before)
+            apply_thread_profile(ThreadsConfig(), ffmpeg_only=True)
+
+    
+    def test_single_run_uses_whole_split(self, monkeypatch):
+        from src.utils import threads
+        from src.utils.config import ThreadsConfig
+        
+        monkeypatch.setattr(threads, "available_cores", lambda: list(range(8)))
+        profile = ThreadsConfig(torch_threads=2, ffmpeg_threads=1, workers=4, pin_cores=True)
+        
+        single = threads.rescale_profile(profile)
+        assert (single.torch_threads, single.ffmpeg_threads, single.workers) == (8, 4, 1)
+        assert threads.rescale_profile(profile, jobs=2).torch_threads == 4
+        assert threads.rescale_profile(profile, jobs=4) == profile
+        assert threads.rescale_profile(ThreadsConfig(torch_threads=16)).torch_threads == 16
 
 class TestConfig:
     def test_default_config(self):
@@ -68,3 +1575,41 @@ class TestConfig:
         if config_path.exists():
             config = Config(str(config_path))
             assert config.model.version is not None
+    
+    def test_save_section_keeps_other_keys(self, tmp_path):
+        from src.utils.config import Config
+        
+        path = tmp_path / "config.yaml"
+        path.write_text("model:\n  version: \"4.25\"  # keep me\nthreads:\n  workers: 4\n")
+        
+        Config.save_section(str(path), "threads", {"workers": 2, "torch_threads": 3})
+        
+        assert "# keep me" in path.read_text()
+        config = Config(str(path))
+        assert config.threads.workers == 2
+        assert config.threads.torch_threads == 3
+    
+    def test_profiles(self, tmp_path):
+        from src.utils.config import Config
+        
+        path = tmp_path / "config.yaml"
+        path.write_text(
+            "output:\n  crf: 18\n  codec: libx265\n"
+            "profiles:\n  lan:\n    hardware: {batch_size: 8}\n    output: {crf: 30}\n"
+            "  broken:\n    output: {crff: 30}\n"
+        )
+        config = Config(str(path))
+        
+        realtime = config.with_profile("realtime")
+        assert realtime.profile == "realtime"
+        assert realtime.output.preset == "ultrafast" and realtime.output.codec == "libx265"
+        assert realtime.interpolation.scale == 0.5 and realtime.metrics.sample_every > 1
+        assert config.output.preset == "medium"
+        
+        lan = config.with_profile("lan")
+        assert lan.hardware.batch_size == 8 and lan.output.crf == 30
+        
+        with pytest.raises(ValueError, match="crff"):
+            config.with_profile("broken")
+        with pytest.raises(ValueError, match="Unknown profile"):
+            config.with_profile("turbo")
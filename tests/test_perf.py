@@ -0,0 +1,112 @@
+"""Microbenchmarks for hot paths.
+
+Runs on any CPU-only machine with fixed, tiny synthetic inputs and a stubbed
+model. Compare across commits with:
+
+    pytest tests/test_perf.py --benchmark-only --benchmark-autosave
+    pytest tests/test_perf.py --benchmark-only --benchmark-compare
+"""
+
+import shutil
+
+import cv2
+import pytest
+
+from tests.conftest import write_clip
+
+pytest.importorskip("pytest_benchmark")
+
+requires_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+
+
+@pytest.fixture(scope="module")
+def clip(tmp_path_factory):
+    return write_clip(tmp_path_factory.mktemp("perf") / "clip.mp4", frames=16, size=(160, 96))
+
+
+@pytest.fixture(scope="module")
+def frame_pair(clip):
+    cap = cv2.VideoCapture(clip)
+    _, frame0 = cap.read()
+    _, frame1 = cap.read()
+    cap.release()
+    return frame0, frame1
+
+
+@pytest.fixture
+def engine(stub_model):
+    from src.core.engine import RIFEEngine
+    return RIFEEngine(model=stub_model, device="cpu")
+
+
+def test_decode(benchmark, clip):
+    def decode():
+        cap = cv2.VideoCapture(clip)
+        frames = 0
+        while cap.read()[0]:
+            frames += 1
+        cap.release()
+        return frames
+
+    assert benchmark(decode) == 16
+
+
+def test_preprocess_pair(benchmark, engine, frame_pair):
+    tensor = benchmark(engine.to_tensor, frame_pair)
+    assert tensor.shape == (2, 3, 128, 256)
+
+
+def test_postprocess(benchmark, engine, frame_pair):
+    tensor = engine.to_tensor(frame_pair)
+    frames = benchmark(engine.to_frames, tensor, 96, 160)
+    assert frames[0].shape == (96, 160, 3)
+
+
+def test_interpolate_pair(benchmark, engine, frame_pair):
+    result = benchmark(engine.interpolate, *frame_pair, 2)
+    assert len(result) == 1
+
+
+def test_interpolate_pair_8x(benchmark, engine, frame_pair):
+    result = benchmark(engine.interpolate, *frame_pair, 8)
+    assert len(result) == 7
+
+
+def test_psnr(benchmark, frame_pair):
+    from src.core.metrics import psnr
+    assert benchmark(psnr, *frame_pair) > 0
+
+
+def test_ssim(benchmark, frame_pair):
+    from src.core.metrics import ssim
+    assert -1 <= benchmark(ssim, *frame_pair) <= 1
+
+
+@requires_ffmpeg
+def test_downsample(benchmark, clip, tmp_path):
+    from src.core.extractor import FrameExtractor
+
+    extractor = FrameExtractor()
+    stats = benchmark(extractor.downsample, clip, str(tmp_path / "half.mp4"), 2)
+    assert stats["output_frames"] == 8
+
+
+@requires_ffmpeg
+def test_pipeline(benchmark, engine, clip, tmp_path):
+    from src.core.interpolator import RIFEInterpolator
+
+    interpolator = RIFEInterpolator(engine=engine)
+    stats = benchmark(interpolator.process, clip, str(tmp_path / "out.mp4"), 2)
+    assert stats["output_frames"] == 31
+
+
+def test_telemetry_record(benchmark):
+    from src.utils import telemetry
+    from src.utils.telemetry import TelemetrySink
+
+    sink = TelemetrySink(interval=0.05).start()
+    try:
+        benchmark(telemetry.count, "frames", 1, kind="synthesized")
+    finally:
+        sink.stop()
+    assert sink.snapshot()["counters"]